@@ -0,0 +1,217 @@
+# benchmarks/mock_fxn.py
+"""In-process stand-ins for the FXN server sidecar and for subscribers.
+
+MockSidecar answers the routes of server/src/index.ts with canned results
+from a configurable subscription listing; MockSubscribers serves any number
+of subscriber endpoints (/s/<i>/offers, /results, /errors) from one port.
+Both run on an event loop in a background thread so synchronous clients and
+the code under test's own loop can use them alike.
+"""
+import asyncio
+import json
+import threading
+import time
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+
+class BackgroundServer:
+    """Runs an aiohttp application on its own loop in a daemon thread."""
+
+    def __init__(self, host: str = "127.0.0.1"):
+        self.host = host
+        self.port: Optional[int] = None
+        self.loop = asyncio.new_event_loop()
+        self._runner: Optional[web.AppRunner] = None
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def build_app(self) -> web.Application:
+        raise NotImplementedError
+
+    async def _start(self):
+        # Benchmarks open far more connections than aiohttp's default backlog
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, 0, backlog=4096)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    def call(self, coroutine):
+        """Run coroutine on the server's loop from any other thread"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def __enter__(self):
+        self._thread.start()
+        self.call(self._start())
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.call(self._runner.cleanup())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+def subscription_rows(recipients: List[str], lifetime: float = 30 * 24 * 3600) -> List[Dict]:
+    """A provider listing in the shape the sidecar returns, one row per recipient"""
+    end_time = format(int(time.time() + lifetime), "x")
+    return [
+        {
+            "subscriber": f"Subscriber{i:040d}",
+            "subscriptionPDA": f"Pda{i:041d}",
+            "subscription": {"endTime": end_time, "recipient": recipient},
+            "status": "active",
+        }
+        for i, recipient in enumerate(recipients)
+    ]
+
+
+class MockSidecar(BackgroundServer):
+    """The FXN server routes, each answering after latency seconds.
+
+    Write routes return a fake signature; provider listings, streams and
+    event streams serve self.subscriptions. push_change() sends a change
+    event to every open event stream.
+    """
+
+    def __init__(self, subscriptions: Optional[List[Dict]] = None, latency: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.subscriptions = subscriptions or []
+        self.latency = latency
+        self.requests = 0
+        self._event_queues: List[asyncio.Queue] = []
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/health", self.health)
+        for path in ("/agent", "/subscribe/request", "/subscribe/approve", "/subscribe",
+                     "/renew", "/cancel", "/fee"):
+            app.router.add_post(path, self.write)
+        app.router.add_put("/agent", self.write)
+        app.router.add_post("/batch", self.batch)
+        app.router.add_get("/subscriptions/provider/{provider}", self.provider_subscriptions)
+        app.router.add_get("/subscriptions/provider/{provider}/stream", self.stream)
+        app.router.add_get("/subscriptions/provider/{provider}/events", self.events)
+        app.router.add_get("/subscriptions/user/{user}", self.provider_subscriptions)
+        return app
+
+    async def _delay(self):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def health(self, request):
+        return web.json_response({"success": True, "uptime": 0})
+
+    async def write(self, request):
+        await request.read()
+        await self._delay()
+        return web.json_response({"success": True, "signature": "mock-signature"})
+
+    async def batch(self, request):
+        body = await request.json()
+        await self._delay()
+        return web.json_response({"success": True, "results": [
+            {"success": True, "signature": "mock-signature"} for _ in body.get("operations", [])
+        ]})
+
+    async def provider_subscriptions(self, request):
+        await self._delay()
+        return web.json_response({"success": True, "subscriptions": self.subscriptions})
+
+    async def stream(self, request):
+        await self._delay()
+        cursor = int(request.query.get("cursor", 0))
+        limit = int(request.query.get("limit", 0)) or len(self.subscriptions)
+        end = min(len(self.subscriptions), cursor + limit)
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        for row in self.subscriptions[cursor:end]:
+            await response.write(json.dumps(row).encode() + b"\n")
+        next_cursor = end if end < len(self.subscriptions) else None
+        await response.write(json.dumps({"nextCursor": next_cursor}).encode() + b"\n")
+        await response.write_eof()
+        return response
+
+    async def events(self, request):
+        await self._delay()
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        queue: asyncio.Queue = asyncio.Queue()
+        self._event_queues.append(queue)
+        try:
+            await response.write(f"event: snapshot\ndata: {json.dumps(self.subscriptions)}\n\n".encode())
+            while True:
+                change = await queue.get()
+                await response.write(f"event: change\ndata: {json.dumps(change)}\n\n".encode())
+        finally:
+            self._event_queues.remove(queue)
+
+    def push_change(self, change_type: str, row: Dict) -> None:
+        """Send a {type, subscription} change event to every event stream"""
+        def push():
+            for queue in self._event_queues:
+                queue.put_nowait({"type": change_type, "subscription": row})
+        self.loop.call_soon_threadsafe(push)
+
+
+class MockSubscribers(BackgroundServer):
+    """count subscriber endpoints at /s/<i>, answering offers after latency seconds.
+
+    Offers are acknowledged, or answered with a receipt_request when
+    request_receipts is set. Arrival times of offers are kept per
+    subscriber for fan-out latency measurements.
+    """
+
+    def __init__(self, count: int, latency: float = 0.0, request_receipts: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.count = count
+        self.latency = latency
+        self.request_receipts = request_receipts
+        self.offer_times: Dict[int, List[float]] = {}
+        self.results = 0
+        self.errors = 0
+
+    def urls(self) -> List[str]:
+        return [f"{self.base_url}/s/{i}" for i in range(self.count)]
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/s/{index}/offers", self.offer)
+        app.router.add_post("/s/{index}/results", self.result)
+        app.router.add_post("/s/{index}/errors", self.error)
+        return app
+
+    def reset(self) -> None:
+        self.offer_times.clear()
+        self.results = 0
+        self.errors = 0
+
+    async def offer(self, request):
+        await request.read()
+        index = int(request.match_info["index"])
+        self.offer_times.setdefault(index, []).append(time.perf_counter())
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.request_receipts:
+            return web.json_response({
+                "type": "receipt_request",
+                "image_url": f"https://example.com/receipts/{index}.jpg",
+                "request_id": f"bench-{index}-{len(self.offer_times[index])}",
+            })
+        return web.json_response({"type": "ack"})
+
+    async def result(self, request):
+        await request.read()
+        self.results += 1
+        return web.json_response({"status": "success"})
+
+    async def error(self, request):
+        await request.read()
+        self.errors += 1
+        return web.json_response({"status": "received"})
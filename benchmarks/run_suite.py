@@ -0,0 +1,342 @@
+# benchmarks/run_suite.py
+"""End-to-end benchmark suite against a mock FXN sidecar and mock subscribers.
+
+Measures, without Node.js, Solana or an OpenAI key:
+
+- sdk: FXNClient and AsyncFXNClient calls per second against the mock sidecar
+- poll: poll_subscribers_loop cycle time for each subscriber count
+- offers: make_offers fan-out time until the last subscriber has its offer
+- broadcast: EventBus fan-out to real websocket clients
+
+Results are written as JSON (to benchmarks/results/<UTC time>.json unless
+--output is given) so runs can be compared; pass an earlier file as
+--baseline to print the change in each number. Run from the repository root:
+
+    python benchmarks/run_suite.py --subscribers 100 1000 5000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import aiohttp
+import base58
+from aiohttp import web
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+for path in ("python", "examples/fxn-ag2", "examples/ag2-aag"):
+    sys.path.append(os.path.join(ROOT, path))
+
+# The swarm builds its agents from the environment and keeps its workspace
+# in the current directory
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("AUTOGEN_USE_DOCKER", "False")
+
+from solana.keypair import Keypair
+
+from fxn_protocol import AsyncFXNClient, FXNClient
+from fxn_protocol import tracer
+from src.bookkeeping_swarm import BookkeepingSwarm
+from src.offer_scheduler import OfferScheduler
+from web.event_bus import EventBus
+
+from mock_fxn import BackgroundServer, MockSidecar, MockSubscribers, subscription_rows
+
+PROVIDER = {"publicKey": "Provider1111111111111111111111111111111111", "secretKey": "bench"}
+POLL_INTERVAL = 3600  # long enough that no offer slot comes due while polling
+
+
+def summary(durations):
+    """min, mean and p50/p95/p99 of a list of seconds"""
+    ordered = sorted(durations)
+    if not ordered:
+        return {}
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"count": len(ordered), "min": ordered[0], "mean": sum(ordered) / len(ordered),
+            "p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99)}
+
+
+def bench_sdk(sidecar, args):
+    port = sidecar.port
+    results = {}
+    with FXNClient(port=port, host=sidecar.host, start_server=False) as client:
+        durations = []
+        for _ in range(args.calls):
+            started = time.perf_counter()
+            client.set_fee(PROVIDER, 10)
+            durations.append(time.perf_counter() - started)
+        results["sync_set_fee"] = {"calls_per_second": len(durations) / sum(durations), **summary(durations)}
+
+        durations = []
+        for _ in range(args.calls // 10 or 1):
+            started = time.perf_counter()
+            client.get_provider_subscriptions(PROVIDER, PROVIDER["publicKey"])
+            durations.append(time.perf_counter() - started)
+        results["sync_provider_listing"] = {"rows": len(sidecar.subscriptions), **summary(durations)}
+
+    async def concurrent():
+        async with AsyncFXNClient(port=port, host=sidecar.host, limit=args.concurrency) as client:
+            semaphore = asyncio.Semaphore(args.concurrency)
+            durations = []
+
+            async def call():
+                async with semaphore:
+                    started = time.perf_counter()
+                    await client.set_fee(PROVIDER, 10)
+                    durations.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(call() for _ in range(args.calls)))
+            return time.perf_counter() - started, durations
+
+    elapsed, durations = asyncio.run(concurrent())
+    results["async_set_fee"] = {"concurrency": args.concurrency,
+                                "calls_per_second": len(durations) / elapsed, **summary(durations)}
+    return results
+
+
+async def run_poll_cycles(swarm, cycles):
+    tracer.reset()
+    swarm.scheduler = OfferScheduler(POLL_INTERVAL)
+    loop_task = asyncio.create_task(swarm.poll_subscribers_loop())
+    while tracer.percentiles().get("subscribers.poll", {}).get("count", 0) < cycles:
+        await asyncio.sleep(0.001)
+    loop_task.cancel()
+    await asyncio.gather(loop_task, return_exceptions=True)
+    durations = [span.duration for span in tracer.spans if span.name == "subscribers.poll"]
+    # The first cycle schedules every subscriber; later ones find no changes
+    return {"first_cycle": durations[0], "steady": summary(durations[1:]),
+            "subscribers": len(swarm.scheduler)}
+
+
+async def run_offers(swarm, subscribers, rounds):
+    rounds_out = []
+    for _ in range(rounds):
+        tracer.reset()
+        subscribers.reset()
+        urls = subscribers.urls()
+        started = time.perf_counter()
+        accepted = await swarm.make_offers(urls)
+        elapsed = time.perf_counter() - started
+        arrivals = [times[0] - started for times in subscribers.offer_times.values()]
+        rounds_out.append({
+            "seconds": elapsed,
+            "offers_per_second": len(urls) / elapsed,
+            "accepted": sum(accepted),
+            "last_arrival": max(arrivals),
+            "offer_send": tracer.percentiles().get("offer.send", {}),
+        })
+    return min(rounds_out, key=lambda result: result["seconds"])
+
+
+def bench_swarm(args):
+    """Poll cycle and offer fan-out for each subscriber count"""
+    secret_key = base58.b58encode(bytes(Keypair().secret_key)).decode()
+    poll, offers = {}, {}
+    tracer.enabled = True
+    for count in args.subscribers:
+        with MockSubscribers(count, latency=args.subscriber_latency) as subscribers, \
+                MockSidecar(subscription_rows(subscribers.urls()), latency=args.sidecar_latency) as sidecar:
+
+            async def run():
+                swarm = BookkeepingSwarm(secret_key, offer_interval=POLL_INTERVAL,
+                                         max_concurrent_offers=args.max_concurrent_offers)
+                swarm.fxn_sdk_url = sidecar.base_url
+                swarm.OFFER_INTERVAL = 0  # poll back to back
+                try:
+                    return (await run_poll_cycles(swarm, args.cycles),
+                            await run_offers(swarm, subscribers, args.rounds))
+                finally:
+                    await swarm.session.close()
+
+            poll[str(count)], offers[str(count)] = asyncio.run(run())
+    tracer.enabled = False
+    return poll, offers
+
+
+class BusServer(BackgroundServer):
+    """The visualisation server's /ws route: every socket is an EventBus client"""
+
+    class Socket:
+        # The bus expects FastAPI's WebSocket methods
+        def __init__(self, ws):
+            self.ws = ws
+
+        async def send_text(self, frame):
+            await self.ws.send_str(frame)
+
+        async def close(self):
+            await self.ws.close()
+
+    def __init__(self, bus, **kwargs):
+        super().__init__(**kwargs)
+        self.bus = bus
+
+    def build_app(self):
+        app = web.Application()
+        app.router.add_get("/ws", self.websocket)
+        self.bus.bind(self.loop)
+        return app
+
+    async def websocket(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        socket = self.Socket(ws)
+        self.bus.connect(socket, int(request.query["since"]) if "since" in request.query else None)
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            self.bus.disconnect(socket)
+        return ws
+
+
+def bench_broadcast(args):
+    bus = EventBus(max_history=args.updates)
+    with BusServer(bus) as server:
+
+        async def run():
+            async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+                sockets = await asyncio.gather(*(
+                    session.ws_connect(f"{server.base_url}/ws?since=0") for _ in range(args.clients)
+                ))
+                while len(bus.clients) < args.clients:
+                    await asyncio.sleep(0.001)
+
+                async def receive(ws):
+                    frames = 0
+                    async for message in ws:
+                        frames += 1
+                        if json.loads(message.data)["seq"] >= args.updates:
+                            return frames, time.perf_counter()
+
+                def publish():
+                    # From another thread in bursts, as the chat thread publishes
+                    for i in range(args.updates):
+                        bus.publish_threadsafe({"ts": time.time(), "agent": "reason_agent",
+                                                "status": {"message": f"update {i}", "isProcessing": True}})
+                        if (i + 1) % args.burst == 0:
+                            time.sleep(args.pause)
+
+                receivers = [asyncio.create_task(receive(ws)) for ws in sockets]
+                started = time.perf_counter()
+                await asyncio.get_running_loop().run_in_executor(None, publish)
+                received = await asyncio.gather(*receivers)
+                for ws in sockets:
+                    await ws.close()
+                return started, received
+
+        started, received = asyncio.run(run())
+        finished = [done - started for _, done in received]
+        return {
+            "clients": args.clients,
+            "updates": args.updates,
+            "seconds": max(finished),
+            "last_client": summary(finished),
+            "frames_encoded": bus.frames_encoded,
+            "frames_received": sum(frames for frames, _ in received),
+            "clients_dropped": bus.clients_dropped,
+        }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results, prefix=""):
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from flatten(value, f"{name}.")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def print_results(results, baseline=None):
+    previous = dict(flatten(baseline["results"])) if baseline else {}
+    for name, value in flatten(results):
+        line = f"{name:<60} {value:>14.6g}"
+        if previous.get(name):
+            line += f" {100 * (value - previous[name]) / previous[name]:>+9.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=("sdk", "swarm", "broadcast"),
+                        default=["sdk", "swarm", "broadcast"])
+    parser.add_argument("--calls", type=int, default=2000, help="SDK calls per measurement")
+    parser.add_argument("--concurrency", type=int, default=50, help="AsyncFXNClient calls in flight")
+    parser.add_argument("--listing-rows", type=int, default=1000, help="rows in the SDK's provider listing")
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--cycles", type=int, default=20, help="poll cycles per subscriber count")
+    parser.add_argument("--rounds", type=int, default=3, help="offer rounds per subscriber count; best is kept")
+    parser.add_argument("--max-concurrent-offers", type=int, default=50)
+    parser.add_argument("--sidecar-latency", type=float, default=0.0, help="seconds added to each sidecar call")
+    parser.add_argument("--subscriber-latency", type=float, default=0.0, help="seconds added to each offer reply")
+    parser.add_argument("--clients", type=int, default=500, help="websocket clients")
+    parser.add_argument("--updates", type=int, default=200, help="status updates to broadcast")
+    parser.add_argument("--burst", type=int, default=10, help="updates published back to back")
+    parser.add_argument("--pause", type=float, default=0.01, help="seconds between bursts")
+    parser.add_argument("--output", help="JSON results file")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    output = args.output or os.path.join(
+        HERE, "results", datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ.json"))
+    output = os.path.abspath(output)
+
+    results = {}
+    if "sdk" in args.only:
+        tracer.enabled = False
+        rows = subscription_rows([f"http://10.0.{i % 256}.1:3005" for i in range(args.listing_rows)])
+        with MockSidecar(rows, latency=args.sidecar_latency) as sidecar:
+            results["sdk"] = bench_sdk(sidecar, args)
+    if "swarm" in args.only:
+        with tempfile.TemporaryDirectory() as workdir:
+            cwd = os.getcwd()
+            os.chdir(workdir)
+            try:
+                results["poll"], results["offers"] = bench_swarm(args)
+            finally:
+                os.chdir(cwd)
+    if "broadcast" in args.only:
+        results["broadcast"] = bench_broadcast(args)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print_results(results, baseline)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
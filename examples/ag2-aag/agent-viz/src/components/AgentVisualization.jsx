@@ -1,6 +1,13 @@
 import React, { useState, useEffect } from 'react';
 import { motion } from 'framer-motion';
 
+// The agents no longer wait for the page, so status updates can arrive in
+// quick bursts. They are played back one at a time, at least
+// PLAYBACK_STEP_MS apart, keeping the agents' own spacing (from each
+// update's timestamp) up to PLAYBACK_MAX_GAP_MS.
+const PLAYBACK_STEP_MS = 1000;
+const PLAYBACK_MAX_GAP_MS = 3000;
+
 // SVG Robot components
 const BaseRobot = ({ name, isProcessing, type = 'default' }) => {
   console.log('rerendering base robot ', name, isProcessing);
@@ -107,51 +114,120 @@ const AgentVisualization = () => {
   const [messages, setMessages] = useState([]);
 
   useEffect(() => {
-    const ws = new WebSocket('ws://localhost:8000/ws');
-    console.log('Connected to socket');
-    
-    ws.onmessage = (event) => {
-      console.log('Socket message ', event);
-      try {
-        const data = JSON.parse(event.data);
-        
-        const currentData = data?.current || {};
-        const agentName = currentData?.agent;
-        const status = currentData?.status || {};
+    // Last sequence applied, sent on reconnect so the server replays only
+    // the updates missed while disconnected
+    let lastSeq = null;
+    let ws = null;
+    let retryTimer = null;
+    let retryDelay = 500;
+    let closed = false;
+    const playback = [];
+    let playbackTimer = null;
+    let lastShown = null; // {at, ts} of the update shown most recently
 
-        console.log('status is', status);
-        console.log('data is', currentData);
-        console.log('name is', agentName);
-        
-        if (agentName) {
-          setAgents(prev => prev.map(agent => 
-            agent.name === agentName
-              ? {...agent, isProcessing: Boolean(status.isProcessing)}
-              : agent
-          ));
-        }
-        
-        if (status.message) {
-          setMessages(prev => [...prev, {
-            agent: agentName,
-            message: status.message
-          }].slice(-10)); // Keep last 10 messages
-        }
-      } catch (error) {
-        console.error('Error processing WebSocket message:', error);
+    const applyUpdate = (update) => {
+      const agentName = update?.agent;
+      const status = update?.status || {};
+
+      if (agentName) {
+        setAgents(prev => prev.map(agent => 
+          agent.name === agentName
+            ? {...agent, isProcessing: Boolean(status.isProcessing)}
+            : agent
+        ));
+      }
+      
+      if (status.message) {
+        setMessages(prev => [...prev, {
+          agent: agentName,
+          message: status.message
+        }].slice(-10)); // Keep last 10 messages
       }
     };
 
-    ws.onerror = (error) => {
-      console.error('WebSocket error:', error);
+    const schedulePlayback = () => {
+      if (playbackTimer !== null || playback.length === 0) {
+        return;
+      }
+      const next = playback[0];
+      let wait = 0;
+      if (lastShown !== null) {
+        const gap = next.ts && lastShown.ts ? (next.ts - lastShown.ts) * 1000 : 0;
+        const spacing = Math.min(Math.max(PLAYBACK_STEP_MS, gap), PLAYBACK_MAX_GAP_MS);
+        wait = Math.max(0, lastShown.at + spacing - Date.now());
+      }
+      playbackTimer = setTimeout(() => {
+        playbackTimer = null;
+        const update = playback.shift();
+        lastShown = {at: Date.now(), ts: update.ts};
+        applyUpdate(update);
+        schedulePlayback();
+      }, wait);
     };
 
-    ws.onclose = () => {
-      console.log('WebSocket connection closed');
+    const connect = () => {
+      const query = lastSeq === null ? '' : `?since=${lastSeq}`;
+      ws = new WebSocket(`ws://localhost:8000/ws${query}`);
+      console.log('Connected to socket');
+
+      ws.onopen = () => {
+        retryDelay = 500;
+      };
+      
+      ws.onmessage = (event) => {
+        try {
+          const data = JSON.parse(event.data);
+
+          if (data?.reset) {
+            // The server could not resume from lastSeq; rebuild from its
+            // buffer straight away instead of replaying it
+            lastSeq = null;
+            playback.length = 0;
+            clearTimeout(playbackTimer);
+            playbackTimer = null;
+            setMessages([]);
+          }
+          // Older servers send the full state as `current` without sequence numbers
+          const updates = data?.updates || (data?.current ? [data.current] : []);
+          for (const update of updates) {
+            if (update.seq !== undefined && lastSeq !== null && update.seq <= lastSeq) {
+              continue;
+            }
+            if (data?.reset) {
+              applyUpdate(update);
+            } else {
+              playback.push(update);
+            }
+            if (update.seq !== undefined) {
+              lastSeq = update.seq;
+            }
+          }
+        } catch (error) {
+          console.error('Error processing WebSocket message:', error);
+        }
+        schedulePlayback();
+      };
+
+      ws.onerror = (error) => {
+        console.error('WebSocket error:', error);
+      };
+
+      ws.onclose = () => {
+        console.log('WebSocket connection closed');
+        if (!closed) {
+          retryTimer = setTimeout(connect, retryDelay);
+          retryDelay = Math.min(retryDelay * 2, 10000);
+        }
+      };
     };
 
+    connect();
+
     return () => {
-      if (ws.readyState === WebSocket.OPEN) {
+      closed = true;
+      clearTimeout(retryTimer);
+      clearTimeout(playbackTimer);
+      if (ws && ws.readyState === WebSocket.OPEN) {
         ws.close();
       }
     };
@@ -1,47 +1,50 @@
 import os
-import requests
 import json
-from urllib.parse import urlencode
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+
+from expert_catalogue import ExpertCatalogue
+from expert_index import ExpertIndex, tokenize
+from fxn_protocol.tracing import tracer
+
+logger = logging.getLogger(__name__)
 
 class ExpertFinderAgent:
     """Agent responsible for finding and consulting domain experts."""
     
-    def __init__(self, base_url="https://fxn.world/api"):
+    def __init__(self, base_url="https://fxn.world/api", sync_interval=300, snapshot_path=None,
+                 index=None, memo_size=256):
         self.base_url = base_url
         self.name = "expert_finder"
+        # The full agent list is kept locally and re-synced in the background;
+        # descriptions are re-indexed only when the catalogue changes
+        self.catalogue = ExpertCatalogue(
+            base_url,
+            sync_interval=sync_interval,
+            snapshot_path=snapshot_path or os.getenv("FXN_EXPERT_SNAPSHOT")
+        )
+        # Ranking backend: BM25 by default, or any object with the same
+        # sync/search interface such as expert_embeddings.EmbeddingIndex
+        self.index = index if index is not None else self._default_index()
+        self._indexed_version = None
+        # Recent lookups keyed by query terms; cleared whenever the index changes
+        self.memo_size = memo_size
+        self._memo = OrderedDict()
+
+    @staticmethod
+    def _default_index():
+        if os.getenv("FXN_EXPERT_RANKER") == "embedding":
+            from expert_embeddings import EmbeddingIndex
+            return EmbeddingIndex()
+        return ExpertIndex()
         
-    def query_experts(self, topic, page_size=24):
-        """Query the API for experts on a specific topic."""
-        endpoint = f"{self.base_url}/agents"
-        
-        # Simplified query - just pagination and sorting
-        params = {
-            "pageSize": page_size,
-            "sort": json.dumps({
-                "field": "createdAt",
-                "direction": "desc"
-            })
-        }
-        
-        try:
-            # Make the API request
-            response = requests.get(
-                f"{endpoint}?{urlencode(params)}",
-                headers={"Content-Type": "application/json"}
-            )
-            
-            # Add debug logging
-            print(f"API Request URL: {response.url}")
-            print(f"Response status: {response.status_code}")
-            if not response.ok:
-                print(f"Error response: {response.text}")
-                
-            response.raise_for_status()
-            return response.json()
-            
-        except requests.exceptions.RequestException as e:
-            print(f"Error querying experts: {e}")
-            return None
+    def query_experts(self, topic, page_size=None):
+        """Return the locally synced expert catalogue."""
+        # topic and page_size are unused: matching happens on the local index
+        self.catalogue.start()
+        return {'agents': self.catalogue.agents()}
             
     def format_expert_info(self, expert):
         """Format expert information for agent consumption."""
@@ -52,61 +55,72 @@ class ExpertFinderAgent:
             'status': expert.get('status', '')
         }
         
+    def refresh_experts(self, force=False):
+        """Re-index experts if the catalogue changed since the last query."""
+        if force:
+            self.catalogue.sync()
+        if self._indexed_version is not None and self._indexed_version == self.catalogue.version:
+            return False
+        version = self.catalogue.version
+        return self._apply_experts(version, self.query_experts(None))
+
+    def _apply_experts(self, version, experts_response):
+        if not experts_response or 'agents' not in experts_response:
+            return False
+        self._indexed_version = version
+        changed, removed = self.index.sync(experts_response['agents'])
+        if changed or removed:
+            self._memo.clear()
+            logger.info("Expert index updated: %d changed, %d removed, %d searchable",
+                        changed, removed, len(self.index))
+        return True
+
     def find_relevant_expert(self, query):
         """Find the most relevant expert for a given query."""
+        return self.find_relevant_experts([query])[0]
+
+    def find_relevant_experts(self, queries):
+        """Find the most relevant expert for each query, in order.
+
+        Queries with the same terms are looked up once, recent ones are
+        answered from a memo, and the rest are scored together in one pass.
+        """
+        with tracer.span("expert.lookup", queries=len(queries)):
+            return self._find_relevant_experts(queries)
+
+    def _find_relevant_experts(self, queries):
         try:
-            experts_response = self.query_experts(None)
-            if experts_response and 'agents' in experts_response:
-                experts = experts_response['agents']
-                if experts:
-                    # Filter for active agents only
-                    active_experts = [e for e in experts if e.get('status') == 'active']
-                    
-                    # Score each expert based on description matching
-                    query_terms = set(self._extract_topics(query))
-                    scored_experts = []
-                    
-                    for expert in active_experts:
-                        description = expert.get('description', '').lower()
-                        if not description:
-                            continue
-                            
-                        # Calculate relevance score based on term matches in description
-                        description_terms = set(self._extract_topics(description))
-                        score = len(description_terms.intersection(query_terms))
-                        
-                        if score > 0:
-                            scored_experts.append((score, expert))
-                    
-                    # Return the best match if any
-                    if scored_experts:
-                        scored_experts.sort(reverse=True)  # Sort by score
-                        return self.format_expert_info(scored_experts[0][1])
-            
-            return None
+            with tracer.span("expert.refresh"):
+                self.refresh_experts()
+            keys = [tuple(sorted(tokenize(query))) for query in queries]
+            # Results are kept here as well, since a memo smaller than one
+            # batch evicts part of it before the batch is answered
+            results = {}
+            missing = []
+            for key in keys:
+                if key in results:
+                    continue
+                if key in self._memo:
+                    self._memo.move_to_end(key)
+                    results[key] = self._memo[key]
+                else:
+                    results[key] = None
+                    missing.append(key)
+            if missing:
+                with tracer.span("expert.search", queries=len(missing)):
+                    matches = self.index.search_many([" ".join(key) for key in missing], limit=1)
+                for key, match in zip(missing, matches):
+                    results[key] = self._memo[key] = self.format_expert_info(match[0][1]) if match else None
+                    while len(self._memo) > self.memo_size:
+                        self._memo.popitem(last=False)
+            return [results[key] for key in keys]
         except Exception as e:
-            print(f"Error finding relevant expert: {e}")
-            return None
+            logger.exception("Error finding relevant experts: %s", e)
+            return [None] * len(queries)
         
     def _extract_topics(self, text):
         """Extract potential topics from text."""
-        if not text:
-            return []
-            
-        # Remove common words and split into potential topics
-        common_words = {'the', 'a', 'an', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'and',
-                       'this', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had',
-                       'do', 'does', 'did', 'will', 'would', 'should', 'could', 'can', 'test', 'part'}
-        
-        words = text.lower().split()
-        topics = [
-            word for word in words 
-            if word not in common_words
-            and len(word) > 2  # Reduced minimum length to catch more meaningful terms
-            and not any(char in word for char in '.,?!:;()')
-        ]
-        print(f"Extracted topics from text: {topics}")
-        return topics
+        return tokenize(text)
 
     def receive(self, message, sender):
         """Handle incoming messages from other agents."""
@@ -117,4 +131,121 @@ class ExpertFinderAgent:
             if expert:
                 return f"Found relevant expert: {json.dumps(expert, indent=2)}"
             return "No relevant experts found."
-        return "I can help find experts. Please include 'need_expert' in your request."
\ No newline at end of file
+        return "I can help find experts. Please include 'need_expert' in your request."
+
+    def receive_many(self, messages, sender):
+        """receive() for several messages, with all expert lookups batched."""
+        queries = [
+            message.lower().replace('need_expert:', '').strip()
+            for message in messages if "need_expert" in message.lower()
+        ]
+        experts = iter(self.find_relevant_experts(queries))
+        replies = []
+        for message in messages:
+            if "need_expert" not in message.lower():
+                replies.append("I can help find experts. Please include 'need_expert' in your request.")
+                continue
+            expert = next(experts)
+            if expert:
+                replies.append(f"Found relevant expert: {json.dumps(expert, indent=2)}")
+            else:
+                replies.append("No relevant experts found.")
+        return replies
+
+class AsyncExpertFinderAgent(ExpertFinderAgent):
+    """ExpertFinderAgent for asyncio callers.
+
+    The catalogue is fetched in an executor so lookups never block the event
+    loop, and every lookup gives up after lookup_timeout. Concurrent lookups
+    with the same terms share one in-flight task, and prefetch() starts a
+    lookup early so the result is ready by the time it is needed. submit()
+    runs a lookup on the agent's own loop thread for synchronous callers.
+    """
+
+    def __init__(self, *args, lookup_timeout=10.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lookup_timeout = lookup_timeout
+        # Query terms -> the lookup currently running for them
+        self._inflight = {}
+        self._refreshing = None
+        self._loop = None
+
+    async def refresh_experts_async(self):
+        """refresh_experts() without blocking the loop; concurrent callers share one refresh."""
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.ensure_future(self._refresh())
+        return await asyncio.shield(self._refreshing)
+
+    async def _refresh(self):
+        if self._indexed_version is not None and self._indexed_version == self.catalogue.version:
+            return False
+        version = self.catalogue.version
+        # query_experts may sync over the network (and is wrapped with
+        # visualisation delays in the demo), so it runs off the loop
+        experts_response = await asyncio.get_running_loop().run_in_executor(None, self.query_experts, None)
+        # Re-indexing stays on the loop so it never overlaps a search
+        return self._apply_experts(version, experts_response)
+
+    async def _lookup(self, key):
+        with tracer.span("expert.refresh"):
+            await self.refresh_experts_async()
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            return self._memo[key]
+        with tracer.span("expert.search", queries=1):
+            match = self.index.search(" ".join(key), limit=1)
+        expert = self.format_expert_info(match[0][1]) if match else None
+        self._memo[key] = expert
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        return expert
+
+    async def find_relevant_expert_async(self, query):
+        """Find the most relevant expert for query, or None on timeout or error."""
+        with tracer.span("expert.lookup", queries=1) as span:
+            key = tuple(sorted(tokenize(query)))
+            task = self._inflight.get(key)
+            span.set_tag("coalesced", task is not None)
+            if task is None:
+                task = self._inflight[key] = asyncio.ensure_future(self._lookup(key))
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            try:
+                # Shielded so a caller that times out leaves the shared lookup
+                # running; its result still lands in the memo for the next caller
+                return await asyncio.wait_for(asyncio.shield(task), self.lookup_timeout)
+            except asyncio.TimeoutError:
+                span.set_tag("timed_out", True)
+                logger.warning("Expert lookup timed out after %ss: %s", self.lookup_timeout, query)
+                return None
+            except Exception as e:
+                logger.exception("Error finding relevant expert: %s", e)
+                return None
+
+    def prefetch(self, query):
+        """Start looking up query now; returns the task so it can be awaited later."""
+        return asyncio.ensure_future(self.find_relevant_expert_async(query))
+
+    async def receive_async(self, message, sender):
+        """receive() for asyncio callers."""
+        if "need_expert" in message.lower():
+            query = message.lower().replace('need_expert:', '').strip()
+            expert = await self.find_relevant_expert_async(query)
+            if expert:
+                return f"Found relevant expert: {json.dumps(expert, indent=2)}"
+            return "No relevant experts found."
+        return "I can help find experts. Please include 'need_expert' in your request."
+
+    def start(self):
+        """Run the agent's event loop in a daemon thread, if it is not running yet."""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(target=self._loop.run_forever, name="expert-finder", daemon=True).start()
+        return self._loop
+
+    def submit(self, message, sender=None):
+        """Start receive_async() on the agent's loop from any thread.
+
+        Returns a concurrent.futures.Future; its result() is ready within
+        about lookup_timeout, so callers can do other work in the meantime.
+        """
+        return asyncio.run_coroutine_threadsafe(self.receive_async(message, sender), self.start())
@@ -0,0 +1,142 @@
+# benchmarks/bench_broadcast.py
+"""Fan-out of agent status updates to simulated visualisation clients.
+
+Compares the EventBus (delta frames, encoded once) with the previous
+broadcaster (one json.dumps of the last 10 updates per client per update,
+clients sent to one after another) on
+in-process websocket stand-ins. Updates are published from a separate
+thread, as the chat thread does. Run from the examples/ag2-aag directory:
+
+    python benchmarks/bench_broadcast.py --clients 1000 --updates 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Tracing comes from the Python SDK in this repository when it is not installed
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "python"))
+
+from web.event_bus import EventBus
+
+LEGACY_HISTORY = 10
+
+
+class SimulatedClient:
+    """Stand-in for a FastAPI WebSocket that waits latency seconds per send."""
+
+    def __init__(self, final_marker, latency=0.0, stalled=False):
+        self.final_marker = final_marker
+        self.latency = latency
+        self.stalled = stalled
+        self.frames = 0
+        self.bytes = 0
+        self.done = asyncio.Event()
+
+    async def send_text(self, frame):
+        if self.stalled:
+            await asyncio.Event().wait()
+        await asyncio.sleep(self.latency)
+        self.frames += 1
+        self.bytes += len(frame)
+        if self.final_marker in frame:
+            self.done.set()
+
+    async def close(self):
+        self.done.set()
+
+
+def status(i):
+    return {"agent": "reason_agent", "status": {"message": f"update {i}", "isProcessing": True}}
+
+
+def publish_from_thread(publish, updates, burst, pause):
+    def run():
+        for i in range(updates):
+            publish(status(i))
+            if (i + 1) % burst == 0:
+                time.sleep(pause)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+async def run_legacy(args, final_marker):
+    # The broadcaster this replaced: a queue polled every 100ms, re-encoding
+    # the history for every client and awaiting each send in turn
+    message_queue = queue.Queue()
+    history = []
+    clients = [SimulatedClient(final_marker, args.latency) for _ in range(args.clients)]
+    encodes = 0
+    start = time.perf_counter()
+    producer = publish_from_thread(message_queue.put, args.updates, args.burst, args.pause)
+    delivered = 0
+    while delivered < args.updates:
+        if not message_queue.empty():
+            message = message_queue.get()
+            if len(history) >= LEGACY_HISTORY:
+                history.pop(0)
+            history.append(message)
+            for client in clients:
+                encodes += 1
+                await client.send_text(json.dumps({"current": message, "history": history}))
+            delivered += 1
+        await asyncio.sleep(0.1)
+    elapsed = time.perf_counter() - start
+    producer.join()
+    return (elapsed, encodes, sum(client.frames for client in clients),
+            sum(client.bytes for client in clients), 0)
+
+
+async def run_bus(args, final_marker):
+    bus = EventBus(max_history=args.history, max_pending=args.max_pending)
+    bus.bind(asyncio.get_running_loop())
+    slow = int(args.clients * args.slow_fraction)
+    clients = [SimulatedClient(final_marker, args.latency, stalled=i < slow) for i in range(args.clients)]
+    for client in clients:
+        bus.connect(client)
+    start = time.perf_counter()
+    producer = publish_from_thread(bus.publish_threadsafe, args.updates, args.burst, args.pause)
+    # Stalled clients only finish if the bus drops them, so wait for the rest
+    await asyncio.gather(*(client.done.wait() for client in clients[slow:]))
+    elapsed = time.perf_counter() - start
+    producer.join()
+    frames = sum(client.frames for client in clients)
+    sent = sum(client.bytes for client in clients)
+    await bus.close()
+    return elapsed, bus.frames_encoded, frames, sent, bus.clients_dropped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--burst", type=int, default=10, help="updates published back to back")
+    parser.add_argument("--pause", type=float, default=0.01, help="seconds between bursts")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per send")
+    parser.add_argument("--slow-fraction", type=float, default=0.01,
+                        help="share of clients that never drain (EventBus run only)")
+    parser.add_argument("--max-pending", type=int, default=32)
+    parser.add_argument("--history", type=int, default=1000, help="EventBus ring buffer depth")
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    final_marker = f'"update {args.updates - 1}"'
+    runs = [("event bus", run_bus)]
+    if not args.skip_legacy:
+        runs.insert(0, ("legacy", run_legacy))
+
+    print(f"{args.clients} clients, {args.updates} updates in bursts of {args.burst}\n")
+    print(f"{'broadcaster':<12} {'seconds':>9} {'encodes':>9} {'frames sent':>12} {'MB sent':>9} {'dropped':>8}")
+    for name, run in runs:
+        elapsed, encodes, frames, sent, dropped = asyncio.run(run(args, final_marker))
+        print(f"{name:<12} {elapsed:>9.2f} {encodes:>9} {frames:>12} {sent / 1e6:>9.1f} {dropped:>8}")
+
+
+if __name__ == "__main__":
+    main()
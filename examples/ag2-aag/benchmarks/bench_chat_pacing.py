@@ -0,0 +1,98 @@
+# benchmarks/bench_chat_pacing.py
+"""Wall time of a simulated chat with server-side and client-side pacing.
+
+Runs EnhancedThinkerAgent's instrumented reasoner, user proxy and expert
+finder around stub agents (a fixed sleep stands in for each LLM call) and
+a local expert list, so no API key or network is needed. "paused" counts
+pacing sleeps on every thread, including the expert lookup that runs
+alongside the chat, so it can exceed the chat's wall time. Run from the
+examples/ag2-aag directory:
+
+    python benchmarks/bench_chat_pacing.py --chats 3 --turns 2
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Tracing comes from the Python SDK in this repository when it is not installed
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "python"))
+
+from agent_network import AsyncExpertFinderAgent
+from enhanced_reasoning_agent import EnhancedThinkerAgent
+
+EXPERTS = [
+    {"id": "1", "name": "ml-ops", "status": "active", "feePerDay": 5,
+     "description": "distributed machine learning systems training infrastructure"},
+    {"id": "2", "name": "weather", "status": "active", "feePerDay": 3,
+     "description": "weather forecasting rainfall agriculture"},
+]
+QUESTION = "What are the key considerations for implementing a distributed machine learning system?"
+
+
+class RecordingVisualizer:
+    def __init__(self):
+        self.updates = 0
+
+    def update_agent_status(self, agent_name, message, thinking=False):
+        self.updates += 1
+
+
+class StubAgent:
+    """Stands in for an AG2 agent; receive() takes llm_latency seconds."""
+
+    def __init__(self, name, llm_latency):
+        self.name = name
+        self.llm_latency = llm_latency
+
+    def receive(self, message, sender, request_reply=None, silent=False):
+        time.sleep(self.llm_latency)
+        return f"{self.name} considered: {str(message)[:40]}"
+
+
+def run_chats(pacing, args):
+    visualizer = RecordingVisualizer()
+    thinker = EnhancedThinkerAgent(pacing=pacing, visualizer=visualizer)
+    if pacing == "server":
+        thinker.VISUALIZATION_DELAY = args.delay
+
+    expert_finder = AsyncExpertFinderAgent()
+    expert_finder.query_experts = lambda topic, page_size=None: {"agents": EXPERTS}
+    expert_finder.start()
+    thinker.expert_finder = thinker.instrument_expert_finder(expert_finder)
+    reasoner = thinker.instrument_reasoner(StubAgent("reason_agent", args.llm_latency))
+    user_proxy = thinker.instrument_user_proxy(StubAgent("user_proxy", args.llm_latency))
+
+    for _ in range(args.chats):
+        started = time.perf_counter()
+        paused_before = thinker.paused_seconds
+        message = QUESTION
+        for _ in range(args.turns):
+            reply = reasoner.receive(message, user_proxy)
+            message = user_proxy.receive(reply, reasoner)
+        thinker.record_chat_timing(QUESTION, time.perf_counter() - started,
+                                   thinker.paused_seconds - paused_before)
+    return thinker.chat_timings, visualizer.updates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=3)
+    parser.add_argument("--turns", type=int, default=2, help="reasoner/user proxy exchanges per chat")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per stub LLM reply")
+    parser.add_argument("--delay", type=float, default=3.0, help="VISUALIZATION_DELAY for server pacing")
+    args = parser.parse_args()
+
+    results = [(pacing, *run_chats(pacing, args)) for pacing in ("server", "client")]
+
+    print(f"\n{args.chats} chats of {args.turns} turns, {args.llm_latency}s per LLM reply\n")
+    print(f"{'pacing':<8} {'chat':>5} {'seconds':>9} {'paused':>9} {'status updates':>15}")
+    for pacing, timings, updates in results:
+        for number, timing in enumerate(timings, 1):
+            print(f"{pacing:<8} {number:>5} {timing['seconds']:>9.2f} {timing['paused_seconds']:>9.2f} "
+                  f"{updates // len(timings):>15}")
+
+
+if __name__ == "__main__":
+    main()
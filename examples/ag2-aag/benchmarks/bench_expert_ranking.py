@@ -0,0 +1,100 @@
+# benchmarks/bench_expert_ranking.py
+"""Build time, query latency and memory of the expert ranking backends.
+
+Compares the BM25 ExpertIndex with the NumPy EmbeddingIndex on synthetic
+expert catalogues. Run from the examples/ag2-aag directory:
+
+    python benchmarks/bench_expert_ranking.py --experts 10000 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from expert_embeddings import EmbeddingIndex
+from expert_index import ExpertIndex
+
+DOMAINS = [
+    "defi trading market making liquidity arbitrage",
+    "weather forecasting climate agriculture rainfall",
+    "smart contract security audits solidity rust",
+    "sports betting odds football basketball analytics",
+    "medical imaging radiology diagnosis research",
+    "music production mixing mastering audio",
+    "legal contracts compliance regulation review",
+    "supply chain logistics shipping inventory",
+]
+QUERIES = [
+    "need help auditing a rust smart contract",
+    "who can forecast rainfall for my farm",
+    "looking for a market maker for liquidity",
+    "football analytics for betting odds",
+]
+
+
+def catalogue(count, seed=7):
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(20000)]
+    experts = []
+    for i in range(count):
+        words = rng.choice(DOMAINS).split() + rng.sample(vocabulary, 12)
+        rng.shuffle(words)
+        experts.append({
+            "id": str(i),
+            "name": f"expert-{i}",
+            "description": " ".join(words),
+            "status": "active" if i % 10 else "inactive",
+            "feePerDay": rng.randint(1, 100),
+        })
+    return experts
+
+
+def measure(index, experts, repeats):
+    start = time.perf_counter()
+    index.sync(experts)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for query in QUERIES:
+            index.search(query, limit=5)
+    per_query = (time.perf_counter() - start) / (repeats * len(QUERIES))
+    return build, per_query
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--experts", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeats", type=int, default=25)
+    args = parser.parse_args()
+
+    print(f"{'experts':>8}  {'backend':<22}{'build s':>10}{'query ms':>10}")
+    for count in args.experts:
+        experts = catalogue(count)
+        backends = {"ExpertIndex (BM25)": ExpertIndex(), "EmbeddingIndex": EmbeddingIndex()}
+        for name, index in backends.items():
+            build, per_query = measure(index, experts, args.repeats)
+            print(f"{count:>8}  {name:<22}{build:>10.2f}{per_query * 1000:>10.3f}")
+
+        # Warm start from a memory-mapped snapshot instead of re-embedding
+        embedding = backends["EmbeddingIndex"]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "experts")
+            embedding.save(path)
+            start = time.perf_counter()
+            loaded = EmbeddingIndex.load(path)
+            load = time.perf_counter() - start
+            start = time.perf_counter()
+            for _ in range(args.repeats):
+                for query in QUERIES:
+                    loaded.search(query, limit=5)
+            per_query = (time.perf_counter() - start) / (args.repeats * len(QUERIES))
+            print(f"{count:>8}  {'EmbeddingIndex (mmap)':<22}{load:>10.2f}{per_query * 1000:>10.3f}"
+                  f"   matrix {embedding.matrix.nbytes / 2 ** 20:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
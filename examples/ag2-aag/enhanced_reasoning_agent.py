@@ -1,37 +1,60 @@
 import os
+import logging
 import threading
 import time
 from typing import Any, Dict, List, Optional
 from autogen import UserProxyAgent, ReasoningAgent
 from dotenv import load_dotenv
 from web.web_server import WebVisualizer
-from agent_network import ExpertFinderAgent
+from agent_network import AsyncExpertFinderAgent
+from fxn_protocol.tracing import tracer
 
 # Load environment variables and configure API
 load_dotenv()
+logger = logging.getLogger(__name__)
 config_list = [{"model": "gpt-4", "api_key": os.environ.get("OPENAI_API_KEY")}]
 
 class EnhancedThinkerAgent:
-    def __init__(self):
-        """Initialize the enhanced thinker agent with web visualization."""
-        self.visualizer = WebVisualizer()
+    def __init__(self, pacing: Optional[str] = None, visualizer: Optional[WebVisualizer] = None):
+        """Initialize the enhanced thinker agent with web visualization.
+
+        pacing (default FXN_VIZ_PACING, else "client"): with "client" the page
+        replays the timestamped status updates at a readable speed and the
+        agents never wait for it; "server" restores the old behaviour of
+        sleeping VISUALIZATION_DELAY seconds around each status update.
+        """
+        self.visualizer = visualizer or WebVisualizer()
         self.chat_complete = threading.Event()
         self.chat_result = None
         self.fxn_thinking = False
-        self.VISUALIZATION_DELAY = 3  # Reduced delay for better responsiveness
+        self.pacing = pacing or os.getenv("FXN_VIZ_PACING", "client")
+        self.VISUALIZATION_DELAY = 3 if self.pacing == "server" else 0
+        self.paused_seconds = 0.0
+        # One entry per chat: wall time and how much of it was pacing sleeps
+        self.chat_timings: List[Dict[str, Any]] = []
+
+    def pause(self):
+        """Hold the calling thread so the page can show a status (server pacing only)."""
+        if self.VISUALIZATION_DELAY:
+            time.sleep(self.VISUALIZATION_DELAY)
+            self.paused_seconds += self.VISUALIZATION_DELAY
         
     def create_the_expert_finder(self):
         """Create and configure the expert finder agent with visualization hooks."""
-        expert_finder = ExpertFinderAgent()
-        
+        expert_finder = AsyncExpertFinderAgent()
+        expert_finder.start()
+        return self.instrument_expert_finder(expert_finder)
+
+    def instrument_expert_finder(self, expert_finder):
+        """Report the expert finder's searches to the visualizer."""
         # Wrap the expert finder's methods to show FXN thinking state
         original_query = expert_finder.query_experts
         def wrapped_query_experts(*args, **kwargs):
             self.visualizer.update_agent_status("FXN", "Searching network...", thinking=True)
-            time.sleep(self.VISUALIZATION_DELAY)
+            self.pause()
             result = original_query(*args, **kwargs)
             self.visualizer.update_agent_status("FXN", "Search complete", thinking=False)
-            time.sleep(self.VISUALIZATION_DELAY)
+            self.pause()
             return result
         expert_finder.query_experts = wrapped_query_experts
         
@@ -54,20 +77,33 @@ class EnhancedThinkerAgent:
                 "max_depth": 4   # Increased to allow deeper reasoning
             }
         )
-        
+        return self.instrument_reasoner(reasoning_agent)
+
+    def instrument_reasoner(self, reasoning_agent):
+        """Consult the expert finder on each message and report progress to the visualizer."""
         original_receive = reasoning_agent.receive
         def wrapped_receive(message, sender, request_reply=None, silent=False):
+            with tracer.span("reasoner.turn"):
+                return receive_turn(message, sender, request_reply, silent)
+
+        def receive_turn(message, sender, request_reply=None, silent=False):
             try:
+                # Start the expert lookup first so it runs while the status
+                # updates below are shown, instead of after them
+                expert_request = f"need_expert: {message}"
+                pending_expert = self.expert_finder.submit(expert_request, reasoning_agent.name)
+
                 self.visualizer.update_agent_status(reasoning_agent.name, message, thinking=True)
-                time.sleep(self.VISUALIZATION_DELAY)
+                self.pause()
                 
                 # Always try to consult expert finder first
                 self.visualizer.update_agent_status(
                     reasoning_agent.name,
                     "Checking if expert consultation would be valuable..."
                 )
-                expert_request = f"need_expert: {message}"
-                expert_response = self.expert_finder.receive(expert_request, reasoning_agent.name)
+                # Bounded by the finder's lookup_timeout
+                with tracer.span("expert.wait"):
+                    expert_response = pending_expert.result()
                 
                 if "Found relevant expert" in expert_response:
                     self.visualizer.update_agent_status(
@@ -75,13 +111,15 @@ class EnhancedThinkerAgent:
                         "Expert found, incorporating expertise...", 
                         thinking=True
                     )
-                    time.sleep(self.VISUALIZATION_DELAY)
+                    self.pause()
                     
                     # Modify the message to include expert context
                     enhanced_message = f"{message}\n\nExpert Context: {expert_response}"
-                    result = original_receive(enhanced_message, sender, request_reply, silent)
+                    with tracer.span("reasoner.llm", expert=True):
+                        result = original_receive(enhanced_message, sender, request_reply, silent)
                 else:
-                    result = original_receive(message, sender, request_reply, silent)
+                    with tracer.span("reasoner.llm", expert=False):
+                        result = original_receive(message, sender, request_reply, silent)
                 
                 # Grade the response
                 self.visualizer.update_agent_status(
@@ -122,18 +160,22 @@ class EnhancedThinkerAgent:
             2. Monitor and report on agent status
             3. Keep track of the conversation flow"""
         )
-        
+        return self.instrument_user_proxy(user_proxy)
+
+    def instrument_user_proxy(self, user_proxy):
+        """Report the user proxy's messages to the visualizer."""
         # Wrap the receive method to update visualization
         original_receive = user_proxy.receive
         def wrapped_receive(message, sender, request_reply=None, silent=False):
             self.visualizer.update_agent_status(user_proxy.name, message, thinking=True)
-            time.sleep(self.VISUALIZATION_DELAY)
-            result = original_receive(message, sender, request_reply, silent)
+            self.pause()
+            with tracer.span("user_proxy.turn"):
+                result = original_receive(message, sender, request_reply, silent)
             self.visualizer.update_agent_status(
                 user_proxy.name, 
                 result if result else "Done processing"
             )
-            time.sleep(self.VISUALIZATION_DELAY)
+            self.pause()
             return result
         user_proxy.receive = wrapped_receive
         
@@ -198,7 +240,7 @@ class EnhancedThinkerAgent:
             return f"{scaled_score:.1f}/10.0"
             
         except Exception as e:
-            print(f"Error in grading: {str(e)}")
+            logger.warning("Error in grading: %s", e)
             return "0.0/10.0"
 
     def run_chat(self, question: str) -> None:
@@ -208,41 +250,58 @@ class EnhancedThinkerAgent:
             "user_proxy", 
             f"Initial question: {question}"
         )
-        time.sleep(self.VISUALIZATION_DELAY)
+        # Prefetch the expert for the question; the reasoner's lookup for the
+        # same message then joins this one or hits the memo
+        self.expert_finder.submit(f"need_expert: {question}", "user_proxy")
+        self.pause()
         
+        started = time.perf_counter()
+        paused_before = self.paused_seconds
         chat_result = self.user_proxy.initiate_chat(
             self.reasoning_agent, 
             message=question
         )
+        self.record_chat_timing(question, time.perf_counter() - started, self.paused_seconds - paused_before)
         self.chat_result = chat_result
         self.chat_complete.set()
 
+    def record_chat_timing(self, question: str, seconds: float, paused_seconds: float) -> Dict[str, Any]:
+        timing = {
+            "question": question,
+            "pacing": self.pacing,
+            "seconds": seconds,
+            "paused_seconds": paused_seconds
+        }
+        self.chat_timings.append(timing)
+        logger.info("Chat finished in %.1fs (%.1fs of it paused for visualization)", seconds, paused_seconds)
+        return timing
+
     def initiate_a_chat(self, question: str) -> Any:
         """Start the visualization and chat in separate threads."""
-        print("Creating agents...")
+        logger.info("Creating agents...")
         
         # Create agents first
         self.user_proxy = self.create_the_user_proxy()
-        print("Created user proxy")
+        logger.debug("Created user proxy")
         
         self.expert_finder = self.create_the_expert_finder()
-        print("Created expert finder")
+        logger.debug("Created expert finder")
         
         self.reasoning_agent = self.create_the_reasoner()
-        print("Created reasoning agent")
+        logger.debug("Created reasoning agent")
         
         # Start web server in a separate thread
-        print("Starting web visualization server...")
+        logger.info("Starting web visualization server...")
         server_thread = threading.Thread(target=self.visualizer.start)
         server_thread.daemon = True
         server_thread.start()
         
-        print("Starting chat thread...")
+        logger.info("Starting chat thread...")
         chat_thread = threading.Thread(target=self.run_chat, args=(question,))
         chat_thread.daemon = True
         chat_thread.start()
         
-        print("\nVisualization is available at http://localhost:8000")
+        logger.info("Visualization is available at http://localhost:8000")
         
         # Wait for chat to complete
         self.chat_complete.wait()
@@ -250,6 +309,10 @@ class EnhancedThinkerAgent:
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
     # Example usage
     ta = EnhancedThinkerAgent()
     
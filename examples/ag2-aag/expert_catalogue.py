@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import logging
+import threading
+import requests
+from urllib.parse import urlencode
+
+from expert_index import expert_id
+from fxn_protocol.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+class ExpertCatalogue:
+    """Local copy of the full FXN agent list, kept in sync in the background.
+
+    Pages of /agents are fetched with If-None-Match / If-Modified-Since, so
+    an unchanged page costs a 304 and is served from the previous sync. The
+    catalogue can be written to snapshot_path after each sync and read back
+    on start, so a restarted process has experts before the first request.
+    """
+
+    def __init__(self, base_url="https://fxn.world/api", page_size=100,
+                 sync_interval=300, snapshot_path=None, max_pages=1000):
+        self.base_url = base_url
+        self.page_size = page_size
+        self.sync_interval = sync_interval
+        self.snapshot_path = snapshot_path
+        self.max_pages = max_pages
+        self.session = requests.Session()
+        self.experts = {}
+        # page number -> {"etag", "last_modified", "agents"} from the last sync
+        self.pages = {}
+        self.version = 0
+        self.synced_at = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if snapshot_path:
+            self.load_snapshot()
+
+    def agents(self):
+        """Every known agent, newest first as the API orders them."""
+        with self._lock:
+            return list(self.experts.values())
+
+    def _fetch_page(self, page):
+        params = {
+            "page": page,
+            "pageSize": self.page_size,
+            "sort": json.dumps({
+                "field": "createdAt",
+                "direction": "desc"
+            })
+        }
+        headers = {"Content-Type": "application/json"}
+        cached = self.pages.get(page)
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        with tracer.span("GET /agents", page=page) as span:
+            response = self.session.get(
+                f"{self.base_url}/agents?{urlencode(params)}",
+                headers=headers,
+                timeout=30
+            )
+            span.set_tag("status", response.status_code)
+        if response.status_code == 304 and cached:
+            return cached, False
+        response.raise_for_status()
+        body = response.json()
+        entry = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "agents": body.get("agents", []),
+            "has_more": body.get("hasMore"),
+            "total_pages": body.get("totalPages")
+        }
+        return entry, True
+
+    def sync(self):
+        """Page through the agent list; returns True if anything changed."""
+        with tracer.span("catalogue.sync") as span:
+            changed = self._sync()
+            span.set_tag("changed", changed)
+            return changed
+
+    def _sync(self):
+        pages = {}
+        changed = False
+        for page in range(1, self.max_pages + 1):
+            entry, fetched = self._fetch_page(page)
+            pages[page] = entry
+            changed = changed or (fetched and entry["agents"] != self.pages.get(page, {}).get("agents"))
+            if entry.get("has_more") is False:
+                break
+            if entry.get("total_pages") is not None and page >= entry["total_pages"]:
+                break
+            if len(entry["agents"]) < self.page_size:
+                break
+        changed = changed or len(pages) != len(self.pages)
+
+        experts = {}
+        for page in sorted(pages):
+            for agent in pages[page]["agents"]:
+                experts.setdefault(expert_id(agent), agent)
+        with self._lock:
+            self.pages = pages
+            self.synced_at = time.time()
+            if changed:
+                self.experts = experts
+                self.version += 1
+        if changed and self.snapshot_path:
+            self.save_snapshot()
+        return changed
+
+    def load_snapshot(self):
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return False
+        with self._lock:
+            self.pages = {int(page): entry for page, entry in snapshot.get("pages", {}).items()}
+            self.experts = {}
+            for page in sorted(self.pages):
+                for agent in self.pages[page]["agents"]:
+                    self.experts.setdefault(expert_id(agent), agent)
+            self.synced_at = snapshot.get("synced_at")
+            self.version += 1
+        return True
+
+    def save_snapshot(self):
+        with self._lock:
+            snapshot = {"synced_at": self.synced_at, "pages": self.pages}
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def start(self):
+        """Sync now if there is nothing local yet, then keep syncing in a daemon thread."""
+        if self._thread is not None:
+            return
+        if not self.experts:
+            self._sync_quietly()
+        self._thread = threading.Thread(target=self._run, name="expert-catalogue", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.sync_interval):
+            self._sync_quietly()
+
+    def _sync_quietly(self):
+        try:
+            if self.sync():
+                logger.info("Expert catalogue synced: %d experts", len(self.experts))
+        except requests.exceptions.RequestException as e:
+            # Keep serving the previous copy until the next attempt
+            logger.warning("Error syncing expert catalogue: %s", e)
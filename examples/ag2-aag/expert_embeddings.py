@@ -0,0 +1,210 @@
+import json
+import zlib
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from expert_index import expert_id, tokenize
+
+def _features(text):
+    """Words plus their character trigrams, so related word forms
+    ("trading", "trader") land on shared dimensions."""
+    features = []
+    for word in tokenize(text):
+        features.append(word)
+        padded = f"<{word}>"
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return features
+
+@lru_cache(maxsize=65536)
+def _bucket(feature, dim):
+    digest = zlib.crc32(feature.encode())
+    # The top bit picks the sign so collisions tend to cancel out
+    return digest % dim, -1.0 if digest & 0x80000000 else 1.0
+
+class HashingEmbedder:
+    """Offline text embedding: signed feature hashing into dim buckets, L2-normalised."""
+
+    def __init__(self, dim=512):
+        self.dim = dim
+
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        rows, columns, signs = [], [], []
+        for row, text in enumerate(texts):
+            for feature in _features(text):
+                column, sign = _bucket(feature, self.dim)
+                rows.append(row)
+                columns.append(column)
+                signs.append(sign)
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(matrix, (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)),
+                  np.array(signs, dtype=np.float32))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.embed_many([text])[0]
+
+class EmbeddingIndex:
+    """Expert ranking backend over a contiguous matrix of description vectors.
+
+    Drop-in alternative to ExpertIndex: a query is one matrix-vector product
+    against every expert followed by argpartition for the top results. Like
+    ExpertIndex, only experts sharing at least one term with the query can
+    match, so unrelated queries find nobody rather than whoever overlaps on
+    a character trigram. Rows of removed or inactive experts are zeroed and
+    reused. save() writes the matrix as .npy so load() can memory-map it
+    instead of re-embedding.
+    """
+
+    def __init__(self, dim=512, min_score=0.0, embedder: Optional[HashingEmbedder] = None):
+        self.embedder = embedder or HashingEmbedder(dim)
+        self.min_score = min_score
+        self.matrix = np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self.experts: Dict[str, dict] = {}
+        self.rows: Dict[str, int] = {}
+        self.keys: List[Optional[str]] = []
+        self._free: List[int] = []
+        # Term -> rows of experts whose description contains it
+        self.postings: Dict[str, Set[int]] = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _searchable(self, expert):
+        return expert.get('status') == 'active' and bool(tokenize(expert.get('description', '')))
+
+    def _allocate(self, key):
+        if self._free:
+            row = self._free.pop()
+        else:
+            row = len(self.keys)
+            self.keys.append(None)
+            if row >= self.matrix.shape[0]:
+                # Grow geometrically; this also copies a memory-mapped matrix into RAM
+                grown = np.zeros((max(16, row * 2), self.embedder.dim), dtype=np.float32)
+                grown[:self.matrix.shape[0]] = self.matrix
+                self.matrix = grown
+        self.keys[row] = key
+        self.rows[key] = row
+        self._post(row, self.experts[key])
+        return row
+
+    def _post(self, row, expert):
+        for term in set(tokenize(expert.get('description', ''))):
+            self.postings.setdefault(term, set()).add(row)
+
+    def _release(self, key):
+        row = self.rows.pop(key, None)
+        if row is not None:
+            for term in set(tokenize(self.experts[key].get('description', ''))):
+                rows = self.postings[term]
+                rows.discard(row)
+                if not rows:
+                    del self.postings[term]
+            self.matrix[row] = 0
+            self.keys[row] = None
+            self._free.append(row)
+
+    def upsert(self, expert):
+        """Embed one expert; returns True if anything changed."""
+        return self.sync_many([expert]) > 0
+
+    def remove(self, key):
+        if key not in self.experts:
+            return False
+        self._release(key)
+        del self.experts[key]
+        return True
+
+    def sync_many(self, experts: Iterable[dict]) -> int:
+        """Upsert experts, embedding every changed description in one batch;
+        returns how many experts changed."""
+        pending = []
+        changed = 0
+        for expert in experts:
+            key = expert_id(expert)
+            if self.experts.get(key) == expert:
+                continue
+            changed += 1
+            if key in self.experts:
+                self._release(key)
+            self.experts[key] = expert
+            if self._searchable(expert):
+                pending.append((key, expert.get('description', '')))
+        if pending:
+            vectors = self.embedder.embed_many([text for _, text in pending])
+            for (key, _), vector in zip(pending, vectors):
+                row = self._allocate(key)  # May replace self.matrix
+                self.matrix[row] = vector
+        return changed
+
+    def sync(self, experts: Iterable[dict]) -> Tuple[int, int]:
+        """Bring the index in line with a full expert listing; returns (changed, removed)."""
+        experts = list(experts)
+        before = {key: expert for key, expert in self.experts.items()}
+        self.sync_many(experts)
+        changed = sum(1 for expert in experts if before.get(expert_id(expert)) != expert)
+        seen = {expert_id(expert) for expert in experts}
+        stale = [key for key in self.experts if key not in seen]
+        for key in stale:
+            self.remove(key)
+        return changed, len(stale)
+
+    def search(self, query, limit=1) -> List[Tuple[float, dict]]:
+        """Best matching active experts for query as (score, expert), best first."""
+        return self.search_many([query], limit)[0]
+
+    def search_many(self, queries, limit=1) -> List[List[Tuple[float, dict]]]:
+        """search() for several queries with one matrix-matrix product."""
+        if not self.rows or not queries:
+            return [[] for _ in queries]
+        queries = list(queries)
+        used = len(self.keys)
+        scores = self.matrix[:used] @ self.embedder.embed_many(queries).T
+        # Rule out experts that share no term with the query
+        shares_term = np.zeros(scores.shape, dtype=bool)
+        for column, query in enumerate(queries):
+            for term in set(tokenize(query)):
+                rows = self.postings.get(term)
+                if rows:
+                    shares_term[list(rows), column] = True
+        scores[~shares_term] = -np.inf
+        limit = min(limit, used)
+        top = np.argpartition(-scores, limit - 1, axis=0)[:limit]
+        results = []
+        for column in range(scores.shape[1]):
+            column_scores = scores[:, column]
+            rows = top[:, column]
+            rows = rows[np.argsort(-column_scores[rows])]
+            matches = []
+            for row in rows:
+                key = self.keys[row]
+                score = float(column_scores[row])
+                if key is not None and score > self.min_score:
+                    matches.append((score, self.experts[key]))
+            results.append(matches)
+        return results
+
+    def save(self, path):
+        """Write the matrix to path.npy and the expert metadata to path.json."""
+        np.save(f"{path}.npy", self.matrix[:len(self.keys)])
+        with open(f"{path}.json", "w") as f:
+            json.dump({"dim": self.embedder.dim, "keys": self.keys, "experts": self.experts}, f)
+
+    @classmethod
+    def load(cls, path, mmap=True, min_score=0.0):
+        """Open a saved index, memory-mapping the matrix copy-on-write."""
+        with open(f"{path}.json") as f:
+            meta = json.load(f)
+        index = cls(dim=meta["dim"], min_score=min_score)
+        index.matrix = np.load(f"{path}.npy", mmap_mode="c" if mmap else None)
+        index.keys = meta["keys"]
+        index.experts = meta["experts"]
+        index.rows = {key: row for row, key in enumerate(index.keys) if key is not None}
+        index._free = [row for row, key in enumerate(index.keys) if key is None]
+        for key, row in index.rows.items():
+            index._post(row, index.experts[key])
+        return index
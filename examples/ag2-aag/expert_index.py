@@ -0,0 +1,148 @@
+import heapq
+import math
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+COMMON_WORDS = frozenset({
+    'the', 'a', 'an', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'and',
+    'this', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had',
+    'do', 'does', 'did', 'will', 'would', 'should', 'could', 'can', 'test', 'part'
+})
+PUNCTUATION = '.,?!:;()'
+
+def tokenize(text):
+    """Split text into lower-case topic terms, dropping common words."""
+    if not text:
+        return []
+    terms = []
+    for word in text.lower().split():
+        # Trailing punctuation ("defi?") is stripped; words with punctuation
+        # inside are skipped as before
+        word = word.strip(PUNCTUATION)
+        if (len(word) > 2 and word not in COMMON_WORDS
+                and not any(char in word for char in PUNCTUATION)):
+            terms.append(word)
+    return terms
+
+def expert_id(expert):
+    """Stable key for an expert returned by the agents API."""
+    return expert.get('id') or expert.get('pubkey') or expert.get('name', '')
+
+class ExpertIndex:
+    """BM25 inverted index over the descriptions of active experts.
+
+    Postings map each term to the experts whose description contains it and
+    the term's frequency there, so a query only touches the experts that
+    share a term with it. Experts are added, updated and removed one at a
+    time; only active experts with a description are indexed.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.experts: Dict[str, dict] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.total_length = 0
+        # Per-expert BM25 length normalisation, rebuilt lazily after changes
+        self._norms: Dict[str, float] = {}
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def upsert(self, expert):
+        """Index or re-index one expert; returns True if anything changed."""
+        key = expert_id(expert)
+        if self.experts.get(key) == expert:
+            return False
+        self.remove(key)
+        self._norms = {}
+        self.experts[key] = expert
+        if expert.get('status') != 'active':
+            return True
+        terms = Counter(tokenize(expert.get('description', '')))
+        if not terms:
+            return True
+        for term, frequency in terms.items():
+            self.postings.setdefault(term, {})[key] = frequency
+        length = sum(terms.values())
+        self.doc_lengths[key] = length
+        self.total_length += length
+        return True
+
+    def remove(self, key):
+        expert = self.experts.pop(key, None)
+        if expert is None:
+            return False
+        length = self.doc_lengths.pop(key, None)
+        if length is not None:
+            self._norms = {}
+            self.total_length -= length
+            for term in set(tokenize(expert.get('description', ''))):
+                posting = self.postings.get(term)
+                if posting is not None:
+                    posting.pop(key, None)
+                    if not posting:
+                        del self.postings[term]
+        return True
+
+    def sync(self, experts: Iterable[dict]) -> Tuple[int, int]:
+        """Bring the index in line with a full expert listing.
+
+        Returns (changed, removed) counts so callers can tell a no-op refresh.
+        """
+        seen = set()
+        changed = 0
+        for expert in experts:
+            seen.add(expert_id(expert))
+            changed += self.upsert(expert)
+        stale = [key for key in self.experts if key not in seen]
+        for key in stale:
+            self.remove(key)
+        return changed, len(stale)
+
+    def _norms_for_search(self):
+        norms = self._norms
+        if not norms:
+            average_length = self.total_length / len(self.doc_lengths)
+            norms = self._norms = {
+                key: self.k1 * (1 - self.b + self.b * length / average_length)
+                for key, length in self.doc_lengths.items()
+            }
+        return norms
+
+    def _term_scores(self, term, norms):
+        # BM25 contribution of term to every expert that contains it
+        posting = self.postings.get(term)
+        if not posting:
+            return None
+        count = len(self.doc_lengths)
+        idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+        weight = idf * (self.k1 + 1)
+        return {key: weight * frequency / (frequency + norms[key])
+                for key, frequency in posting.items()}
+
+    def search(self, query, limit=1) -> List[Tuple[float, dict]]:
+        """Best matching active experts for query as (score, expert), best first."""
+        return self.search_many([query], limit)[0]
+
+    def search_many(self, queries, limit=1) -> List[List[Tuple[float, dict]]]:
+        """search() for several queries, scoring each distinct term only once."""
+        if not self.doc_lengths:
+            return [[] for _ in queries]
+        norms = self._norms_for_search()
+        term_scores = {}
+        results = []
+        for query in queries:
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                if term not in term_scores:
+                    term_scores[term] = self._term_scores(term, norms)
+                contributions = term_scores[term]
+                if contributions is None:
+                    continue
+                for key, score in contributions.items():
+                    scores[key] = scores.get(key, 0.0) + score
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            results.append([(score, self.experts[key]) for key, score in best])
+        return results
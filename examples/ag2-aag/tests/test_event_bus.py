@@ -0,0 +1,116 @@
+# tests/test_event_bus.py
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Tracing comes from the Python SDK in this repository when it is not installed
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "python"))
+
+from web.event_bus import EventBus
+
+
+class RecordingSocket:
+    """Stands in for a FastAPI WebSocket; blocked sockets never finish a send."""
+
+    def __init__(self, blocked=False):
+        self.blocked = blocked
+        self.frames = []
+        self.closed = False
+
+    async def send_text(self, frame):
+        if self.blocked:
+            await asyncio.Event().wait()
+        self.frames.append(json.loads(frame))
+
+    async def close(self):
+        self.closed = True
+
+
+async def published_bus(count, max_history=3, **kwargs):
+    bus = EventBus(max_history=max_history, **kwargs)
+    bus.bind(asyncio.get_running_loop())
+    for i in range(count):
+        bus.publish({"agent": "reason_agent", "status": f"update {i + 1}"})
+        # Let each update go out in its own frame
+        await asyncio.sleep(0)
+    return bus
+
+
+def seqs(frame):
+    return [update["seq"] for update in frame["updates"]]
+
+
+@pytest.mark.asyncio
+async def test_replay_boundaries():
+    """Clients get what they missed, nothing when caught up, and a reset otherwise"""
+    bus = await published_bus(5)
+    # History holds seq 3..5
+    assert [seq for seq, _ in bus.history] == [3, 4, 5]
+
+    new_client = json.loads(bus.replay(None))
+    assert new_client["reset"] is True and seqs(new_client) == [3, 4, 5]
+
+    assert bus.replay(5) is None
+
+    behind = json.loads(bus.replay(3))
+    assert "reset" not in behind and behind["seq"] == 5 and seqs(behind) == [4, 5]
+
+    # The oldest resumable position: everything buffered is new to the client
+    edge = json.loads(bus.replay(2))
+    assert "reset" not in edge and seqs(edge) == [3, 4, 5]
+
+    fallen_off = json.loads(bus.replay(1))
+    assert fallen_off["reset"] is True and seqs(fallen_off) == [3, 4, 5]
+
+    # A client from before a server restart has seen more than the new bus
+    restarted = json.loads(bus.replay(9))
+    assert restarted["reset"] is True and seqs(restarted) == [3, 4, 5]
+
+    await bus.close()
+
+
+@pytest.mark.asyncio
+async def test_replay_on_empty_history():
+    bus = EventBus()
+    assert bus.replay(None) is None
+    assert bus.replay(4) is None
+
+
+@pytest.mark.asyncio
+async def test_connect_sends_missed_updates_then_new_frames():
+    """A reconnecting client is caught up first and then receives live frames"""
+    bus = await published_bus(3)
+    socket = RecordingSocket()
+    bus.connect(socket, since=1)
+    bus.publish({"agent": "user_proxy", "status": "update 4"})
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+    assert [seqs(frame) for frame in socket.frames] == [[2, 3], [4]]
+    assert socket.frames[1]["updates"][0]["agent"] == "user_proxy"
+    await bus.close()
+
+
+@pytest.mark.asyncio
+async def test_burst_is_coalesced_and_slow_clients_are_dropped():
+    """Updates published together share a frame; a client that stops draining is dropped"""
+    bus = await published_bus(0, max_history=100, max_pending=2)
+    fast, slow = RecordingSocket(), RecordingSocket(blocked=True)
+    bus.connect(fast)
+    bus.connect(slow)
+
+    for burst in range(4):
+        for i in range(3):
+            bus.publish({"agent": "reason_agent", "status": f"burst {burst} update {i}"})
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    assert [len(frame["updates"]) for frame in fast.frames] == [3, 3, 3, 3]
+    assert bus.frames_encoded == 4
+    assert bus.clients_dropped == 1
+    assert slow.closed and slow not in bus.clients
+    await bus.close()
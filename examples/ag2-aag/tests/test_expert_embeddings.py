@@ -0,0 +1,92 @@
+# tests/test_expert_embeddings.py
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from expert_embeddings import EmbeddingIndex
+from expert_index import ExpertIndex
+
+
+def expert(id, description, status="active"):
+    return {"id": id, "name": f"expert-{id}", "description": description,
+            "status": status, "feePerDay": 1}
+
+
+def test_rows_are_zeroed_and_reused():
+    """Removed and re-embedded experts free their rows for the next expert"""
+    index = EmbeddingIndex(dim=64)
+    assert index.upsert(expert("1", "weather forecasting rainfall"))
+    assert index.upsert(expert("2", "defi lending protocols"))
+    assert not index.upsert(expert("1", "weather forecasting rainfall"))
+    assert index.rows == {"1": 0, "2": 1}
+
+    assert index.remove("1")
+    assert not index.remove("1")
+    assert not index.matrix[0].any()
+    assert index.keys[:2] == [None, "2"]
+    assert "weather" not in index.postings
+
+    assert index.upsert(expert("3", "solar energy forecasting"))
+    assert index.rows["3"] == 0
+    assert index.postings["forecasting"] == {0}
+    assert index.search("solar forecasting")[0][1]["id"] == "3"
+
+    # A changed description replaces the old vector and terms
+    assert index.upsert(expert("2", "music production mastering"))
+    assert index.search("defi lending") == []
+    assert index.search("music mastering")[0][1]["id"] == "2"
+
+
+def test_inactive_experts_are_kept_but_not_searchable():
+    """Inactive experts and experts without a description get no row"""
+    index = EmbeddingIndex(dim=64)
+    assert index.sync([expert("1", "weather forecasting"), expert("2", "defi lending")]) == (2, 0)
+    assert index.upsert(expert("1", "weather forecasting", status="inactive"))
+    assert index.upsert(expert("3", "", status="active"))
+    assert len(index) == 1 and set(index.experts) == {"1", "2", "3"}
+    assert index.search("weather forecasting") == []
+
+    assert index.upsert(expert("1", "weather forecasting"))
+    assert index.search("weather forecasting")[0][1]["id"] == "1"
+
+    assert index.sync([expert("2", "defi lending")]) == (0, 2)
+    assert set(index.experts) == {"2"} and len(index) == 1
+
+
+def test_unrelated_queries_match_nobody_like_bm25():
+    """Experts that only overlap on hashed trigrams are not matches"""
+    experts = [expert("1", "defi lending protocols"), expert("2", "weather forecasting rainfall")]
+    embedding, bm25 = EmbeddingIndex(), ExpertIndex()
+    embedding.sync(experts)
+    bm25.sync(experts)
+    for query in ("nothing here", "cooking recipes tonight", "defining lendings"):
+        assert embedding.search(query) == bm25.search(query) == []
+    assert embedding.search("need defi help")[0][1]["id"] == "1"
+
+    batch = embedding.search_many(["lending", "nothing here", "rainfall"], limit=2)
+    assert [[match["id"] for _, match in results] for results in batch] == [["1"], [], ["2"]]
+
+
+def test_save_and_load_memory_maps_the_matrix(tmp_path):
+    """A loaded index searches like the saved one and keeps its free rows"""
+    index = EmbeddingIndex(dim=64)
+    index.sync([expert("1", "weather forecasting"), expert("2", "defi lending"),
+                expert("3", "smart contract audits")])
+    index.remove("2")
+    path = str(tmp_path / "experts")
+    index.save(path)
+
+    loaded = EmbeddingIndex.load(path)
+    assert isinstance(loaded.matrix, np.memmap)
+    assert loaded.rows == {"1": 0, "3": 2} and loaded._free == [1]
+    for query in ("weather forecasting", "contract audits", "defi lending"):
+        assert loaded.search(query) == index.search(query)
+
+    # Writes stay in memory, the file on disk is untouched
+    loaded.upsert(expert("4", "defi lending"))
+    assert loaded.rows["4"] == 1
+    assert loaded.search("defi lending")[0][1]["id"] == "4"
+    assert not np.load(f"{path}.npy")[1].any()
@@ -0,0 +1,222 @@
+# tests/test_expert_finder.py
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Tracing comes from the Python SDK in this repository when it is not installed
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "python"))
+
+from agent_network import AsyncExpertFinderAgent
+from expert_catalogue import ExpertCatalogue
+from expert_index import ExpertIndex
+
+
+def expert(id, description, status="active", name=None):
+    return {"id": id, "name": name or f"expert-{id}", "description": description,
+            "status": status, "feePerDay": 1}
+
+
+def test_index_upsert_and_remove_keep_postings_consistent():
+    """Re-indexing and removing experts leaves no stale postings or lengths behind"""
+    index = ExpertIndex()
+    assert index.upsert(expert("1", "weather forecasting rainfall"))
+    assert index.upsert(expert("2", "rainfall insurance pricing"))
+    assert not index.upsert(expert("1", "weather forecasting rainfall"))
+    assert index.total_length == 6
+    assert index.postings["rainfall"] == {"1": 1, "2": 1}
+
+    # A new description replaces the old terms
+    assert index.upsert(expert("1", "solar energy forecasting forecasting"))
+    assert "weather" not in index.postings
+    assert index.postings["forecasting"] == {"1": 2}
+    assert index.postings["rainfall"] == {"2": 1}
+    assert index.total_length == 7
+    assert index.search("solar forecasting")[0][1]["id"] == "1"
+
+    # Inactive experts stay known but are not searchable
+    assert index.upsert(expert("2", "rainfall insurance pricing", status="inactive"))
+    assert "rainfall" not in index.postings
+    assert len(index) == 1 and "2" in index.experts
+    assert index.search("rainfall insurance") == []
+
+    assert index.remove("1")
+    assert not index.remove("1")
+    assert index.postings == {} and index.total_length == 0 and len(index) == 0
+
+
+def test_index_sync_reports_changes_and_removals():
+    """sync() upserts the listing, drops experts missing from it and counts both"""
+    index = ExpertIndex()
+    assert index.sync([expert("1", "weather rainfall"), expert("2", "defi lending")]) == (2, 0)
+    assert index.sync([expert("1", "weather rainfall"), expert("2", "defi lending")]) == (0, 0)
+    assert index.sync([expert("2", "defi lending protocols"), expert("3", "ml ops")]) == (2, 1)
+    assert set(index.experts) == {"2", "3"}
+    assert index.search("weather rainfall") == []
+    assert index.total_length == sum(index.doc_lengths.values())
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, etag=None):
+        self.status_code = status_code
+        self._body = body
+        self.headers = {"ETag": etag} if etag else {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+    def json(self):
+        return self._body
+
+
+class FakeAgentsAPI:
+    """Serves /agents pages with ETags and answers 304 when the page is unchanged."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        page = int(url.split("page=")[1].split("&")[0])
+        self.requests.append((page, headers.get("If-None-Match")))
+        agents = self.pages[page - 1] if page <= len(self.pages) else []
+        etag = f'"{page}-{hash(str(agents))}"'
+        if headers.get("If-None-Match") == etag:
+            return FakeResponse(304)
+        return FakeResponse(200, {"agents": agents, "hasMore": page < len(self.pages)}, etag)
+
+
+def test_catalogue_sync_detects_changes_only():
+    """Unchanged pages are 304s and leave the version alone; edits and dropped pages bump it"""
+    api = FakeAgentsAPI([[expert("1", "weather")], [expert("2", "defi")]])
+    catalogue = ExpertCatalogue(page_size=1)
+    catalogue.session = api
+
+    assert catalogue.sync() is True
+    assert catalogue.version == 1
+    assert [agent["id"] for agent in catalogue.agents()] == ["1", "2"]
+
+    api.requests.clear()
+    assert catalogue.sync() is False
+    assert catalogue.version == 1
+    assert all(etag is not None for _, etag in api.requests)
+
+    api.pages[1] = [expert("2", "defi lending")]
+    assert catalogue.sync() is True
+    assert catalogue.version == 2
+    assert catalogue.agents()[1]["description"] == "defi lending"
+
+    # The listing shrinks to one page
+    api.pages = api.pages[:1]
+    assert catalogue.sync() is True
+    assert catalogue.version == 3
+    assert [agent["id"] for agent in catalogue.agents()] == ["1"]
+
+
+class CountingIndex(ExpertIndex):
+    def __init__(self):
+        super().__init__()
+        self.searches = 0
+        self.batches = []
+
+    def search(self, query, limit=1):
+        self.searches += 1
+        return super().search(query, limit)
+
+    def search_many(self, queries, limit=1):
+        self.batches.append(list(queries))
+        return super().search_many(queries, limit)
+
+
+def finder(catalogue_delay=0.0, lookup_timeout=10.0, memo_size=256):
+    agent = AsyncExpertFinderAgent(index=CountingIndex(), lookup_timeout=lookup_timeout,
+                                   memo_size=memo_size)
+    agent.catalogue_calls = 0
+    lock = threading.Lock()
+
+    def query_experts(topic, page_size=None):
+        with lock:
+            agent.catalogue_calls += 1
+        time.sleep(catalogue_delay)
+        return {"agents": [expert("1", "weather forecasting rainfall"), expert("2", "defi lending")]}
+
+    agent.query_experts = query_experts
+    return agent
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_with_the_same_terms_share_one_search():
+    """Lookups for the same terms, in any order, coalesce into one refresh and one search"""
+    agent = finder(catalogue_delay=0.05)
+    results = await asyncio.gather(
+        agent.find_relevant_expert_async("weather rainfall"),
+        agent.find_relevant_expert_async("rainfall weather?"),
+        agent.find_relevant_expert_async("Weather, rainfall"),
+    )
+    assert [result["name"] for result in results] == ["expert-1"] * 3
+    assert agent.index.searches == 1
+    assert agent.catalogue_calls == 1
+    assert agent._inflight == {}
+
+    # Later lookups are answered from the memo
+    assert (await agent.find_relevant_expert_async("rainfall weather"))["name"] == "expert-1"
+    assert agent.index.searches == 1
+
+
+@pytest.mark.asyncio
+async def test_timed_out_lookup_still_fills_the_memo():
+    """A caller that gives up gets None, and the shared lookup finishes for the next one"""
+    agent = finder(catalogue_delay=0.2, lookup_timeout=0.05)
+    assert await agent.find_relevant_expert_async("defi lending") is None
+    await asyncio.sleep(0.3)
+    assert agent._inflight == {}
+
+    agent.lookup_timeout = 10.0
+    assert (await agent.find_relevant_expert_async("lending defi"))["name"] == "expert-2"
+    assert agent.index.searches == 1
+    assert agent.catalogue_calls == 1
+
+
+def test_batched_lookup_searches_each_distinct_query_once():
+    """Queries with the same terms share one search, all in a single pass, in order"""
+    agent = finder()
+    results = agent.find_relevant_experts(
+        ["weather rainfall", "defi lending", "Rainfall, weather?", "cooking recipes"]
+    )
+    assert [result and result["name"] for result in results] == ["expert-1", "expert-2", "expert-1", None]
+    assert agent.index.batches == [["rainfall weather", "defi lending", "cooking recipes"]]
+
+    # Answered from the memo, misses included
+    assert agent.find_relevant_experts(["lending defi", "recipes cooking"])[0]["name"] == "expert-2"
+    assert len(agent.index.batches) == 1
+    assert agent.catalogue_calls == 1
+
+
+def test_batched_lookup_survives_a_memo_smaller_than_the_batch():
+    """Results evicted from the memo within the same batch are still returned"""
+    agent = finder(memo_size=1)
+    results = agent.find_relevant_experts(["weather rainfall", "defi lending", "weather rainfall"])
+    assert [result["name"] for result in results] == ["expert-1", "expert-2", "expert-1"]
+    assert list(agent._memo) == [("defi", "lending")]
+
+
+def test_receive_many_keeps_replies_aligned_with_messages():
+    """Messages without need_expert get the usage reply in their own position"""
+    agent = finder()
+    replies = agent.receive_many([
+        "need_expert: weather rainfall",
+        "hello there",
+        "NEED_EXPERT: cooking recipes",
+        "need_expert: defi lending",
+    ], sender=None)
+    assert replies[0].startswith("Found relevant expert:") and '"expert-1"' in replies[0]
+    assert replies[1] == "I can help find experts. Please include 'need_expert' in your request."
+    assert replies[2] == "No relevant experts found."
+    assert '"expert-2"' in replies[3]
+    assert agent.index.batches == [["rainfall weather", "cooking recipes", "defi lending"]]
+    assert agent.receive_many([], sender=None) == []
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+from fxn_protocol.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+class ClientChannel:
+    """One connected client: a bounded queue of encoded frames and the task sending them."""
+
+    def __init__(self, websocket, max_pending: int):
+        self.websocket = websocket
+        self.frames: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self.task: Optional[asyncio.Task] = None
+
+    async def run(self, on_error):
+        try:
+            while True:
+                frame = await self.frames.get()
+                await self.websocket.send_text(frame)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            on_error(self, e)
+
+class EventBus:
+    """Fan-out of agent status updates to WebSocket clients.
+
+    Updates can be published from any thread; they are handed to the event
+    loop with call_soon_threadsafe. Updates that arrive together are
+    coalesced into one frame, which is serialised once and queued to every
+    client. Each client has its own sender task and a bounded queue, so a
+    slow client never holds up the others; a client whose queue is full is
+    dropped.
+
+    Every update gets a sequence number and is kept, already encoded, in a
+    ring buffer of the last max_history updates. Frames carry only the new
+    updates: {"seq": <last>, "updates": [{"seq": n, ...}, ...]}. A client
+    that reconnects with the last sequence it saw is sent just what it
+    missed; one that is too far behind, or new, gets the whole buffer in a
+    frame marked "reset".
+    """
+
+    def __init__(self, max_history: int = 1000, max_pending: int = 32, coalesce_delay: float = 0.0):
+        self.max_pending = max_pending
+        self.coalesce_delay = coalesce_delay
+        # (seq, encoded update), oldest first; appends evict in O(1)
+        self.history: deque = deque(maxlen=max_history)
+        self.seq = 0
+        self.clients: Dict[object, ClientChannel] = {}
+        self.frames_encoded = 0
+        self.frames_queued = 0
+        self.clients_dropped = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._pending: List[dict] = []
+        self._flush_scheduled = False
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Attach the bus to the loop serving the clients; flushes anything published earlier."""
+        with self._lock:
+            self._loop = loop
+            backlog, self._pending = self._pending, []
+        for update in backlog:
+            loop.call_soon_threadsafe(self.publish, update)
+
+    def publish_threadsafe(self, update: dict) -> None:
+        """publish() from any thread."""
+        with self._lock:
+            if self._loop is None:
+                # The server is not up yet; keep the update for bind()
+                self._pending.append(update)
+                return
+            loop = self._loop
+        loop.call_soon_threadsafe(self.publish, update)
+
+    def publish(self, update: dict) -> None:
+        """Queue an update for the next frame; must run on the bus's loop."""
+        self._pending.append(update)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            if self.coalesce_delay > 0:
+                self._loop.call_later(self.coalesce_delay, self._flush)
+            else:
+                # Everything published before the loop gets back to this
+                # callback goes out in the same frame
+                self._loop.call_soon(self._flush)
+
+    @staticmethod
+    def _frame(seq: int, encoded: List[str], reset: bool = False) -> str:
+        # Updates are encoded once when published and only joined here
+        head = f'{{"seq": {seq}, "reset": true, ' if reset else f'{{"seq": {seq}, '
+        return f'{head}"updates": [{", ".join(encoded)}]}}'
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        updates, self._pending = self._pending, []
+        if not updates:
+            return
+        with tracer.span("viz.broadcast", updates=len(updates), clients=len(self.clients)):
+            self._broadcast(updates)
+
+    def _broadcast(self, updates: List[dict]) -> None:
+        encoded = []
+        for update in updates:
+            self.seq += 1
+            entry = json.dumps({"seq": self.seq, **update})
+            self.history.append((self.seq, entry))
+            encoded.append(entry)
+        frame = self._frame(self.seq, encoded)
+        self.frames_encoded += 1
+        for channel in list(self.clients.values()):
+            self._offer(channel, frame)
+
+    def replay(self, since: Optional[int] = None) -> Optional[str]:
+        """Frame bringing a client that last saw sequence since up to date, or None if it is."""
+        if not self.history:
+            return None
+        first_seq = self.history[0][0]
+        if since is not None and first_seq - 1 <= since <= self.seq:
+            if since == self.seq:
+                return None
+            # Sequence numbers are contiguous, so the offset is direct
+            missed: List[Tuple[int, str]] = list(islice(self.history, since - first_seq + 1, None))
+            return self._frame(self.seq, [entry for _, entry in missed])
+        # New client, one from before a restart, or too far behind the buffer
+        return self._frame(self.seq, [entry for _, entry in self.history], reset=True)
+
+    def _offer(self, channel: ClientChannel, frame: str) -> None:
+        try:
+            channel.frames.put_nowait(frame)
+            self.frames_queued += 1
+        except asyncio.QueueFull:
+            logger.warning("Dropping slow visualisation client")
+            self.clients_dropped += 1
+            self.disconnect(channel.websocket)
+            asyncio.ensure_future(self._close(channel.websocket))
+
+    @staticmethod
+    async def _close(websocket) -> None:
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+    def connect(self, websocket, since: Optional[int] = None) -> ClientChannel:
+        """Start sending frames to websocket, beginning with what it missed since sequence since."""
+        channel = ClientChannel(websocket, self.max_pending)
+        self.clients[websocket] = channel
+        channel.task = asyncio.ensure_future(channel.run(self._on_send_error))
+        frame = self.replay(since)
+        if frame is not None:
+            self._offer(channel, frame)
+        return channel
+
+    def disconnect(self, websocket) -> None:
+        channel = self.clients.pop(websocket, None)
+        if channel is not None and channel.task is not None:
+            channel.task.cancel()
+
+    def _on_send_error(self, channel: ClientChannel, error: Exception) -> None:
+        logger.info("Error in broadcast: %s", error)
+        self.disconnect(channel.websocket)
+
+    async def close(self) -> None:
+        tasks = [channel.task for channel in self.clients.values() if channel.task is not None]
+        self.clients.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
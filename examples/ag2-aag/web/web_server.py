@@ -1,13 +1,16 @@
 from fastapi import FastAPI, WebSocket
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 import uvicorn
-import json
-from typing import Set
-import queue
 import asyncio
+import logging
 import os
+import time
 from pathlib import Path
+from web.event_bus import EventBus
+from fxn_protocol.tracing import tracer
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
@@ -17,13 +20,23 @@ DIST_DIR = BASE_DIR / 'agent-viz' / 'dist'
 ASSETS_DIR = DIST_DIR / 'assets'
 INDEX_HTML = DIST_DIR / 'index.html'
 
-# Mount the Vite build directory for assets
-app.mount("/assets", StaticFiles(directory=str(ASSETS_DIR)), name="assets")
+# Mount the Vite build directory for assets; skipped before `npm run build`
+# so the module can still be imported, e.g. by the benchmarks
+if ASSETS_DIR.is_dir():
+    app.mount("/assets", StaticFiles(directory=str(ASSETS_DIR)), name="assets")
+
+# Updates kept for clients that reconnect; each one costs a single ring
+# buffer slot, so this can be far larger than what the page shows
+MAX_HISTORY = int(os.getenv("FXN_VIZ_HISTORY", "1000"))
+# Frames queued per client before it is considered too slow and dropped
+MAX_PENDING_FRAMES = 32
+
+event_bus = EventBus(max_history=MAX_HISTORY, max_pending=MAX_PENDING_FRAMES)
 
-active_connections: Set[WebSocket] = set()
-message_queue = queue.Queue()
-message_history = []
-MAX_HISTORY = 10
+@app.get("/metrics")
+async def metrics():
+    """Span latency percentiles in the Prometheus text format."""
+    return PlainTextResponse(tracer.prometheus(), media_type="text/plain; version=0.0.4")
 
 @app.get("/{full_path:path}")
 async def serve_spa(full_path: str):
@@ -33,46 +46,27 @@ async def serve_spa(full_path: str):
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
-    active_connections.add(websocket)
-    
-    if message_history:
-        try:
-            await websocket.send_text(json.dumps({
-                "current": message_history[-1],
-                "history": message_history
-            }))
-        except Exception as e:
-            print(f"Error sending history: {e}")
-    
+    # A reconnecting client passes ?since=<last seq> to get only what it missed
+    try:
+        since = int(websocket.query_params["since"])
+    except (KeyError, ValueError):
+        since = None
+    event_bus.connect(websocket, since)
     try:
         while True:
             await websocket.receive_text()
     except Exception as e:
-        print(f"WebSocket error: {e}")
-        active_connections.remove(websocket)
-
-async def broadcast_messages():
-    while True:
-        if not message_queue.empty():
-            message = message_queue.get()
-            if len(message_history) >= MAX_HISTORY:
-                message_history.pop(0)
-            message_history.append(message)
-            
-            for connection in list(active_connections):
-                try:
-                    await connection.send_text(json.dumps({
-                        "current": message,
-                        "history": message_history
-                    }))
-                except Exception as e:
-                    print(f"Error in broadcast: {e}")
-                    active_connections.remove(connection)
-        await asyncio.sleep(0.1)
+        logger.debug("WebSocket closed: %s", e)
+    finally:
+        event_bus.disconnect(websocket)
 
 @app.on_event("startup")
 async def startup_event():
-    asyncio.create_task(broadcast_messages())
+    event_bus.bind(asyncio.get_running_loop())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await event_bus.close()
 
 class WebVisualizer:
     def __init__(self, host="localhost", port=8000):
@@ -81,9 +75,11 @@ class WebVisualizer:
         self._server_thread = None
 
     def update_agent_status(self, agent_name: str, message: str, thinking: bool = False):
-        """Update agent status and add to message queue."""
-        print(f"Agent {agent_name}: {message} ({'thinking' if thinking else 'idle'})")
-        message_queue.put({
+        """Update agent status; safe to call from any thread."""
+        logger.info("Agent %s: %s (%s)", agent_name, message, 'thinking' if thinking else 'idle')
+        event_bus.publish_threadsafe({
+            # The page paces its playback from these timestamps
+            "ts": time.time(),
             "agent": agent_name,
             "status": {
                 "message": message,
@@ -93,6 +89,6 @@ class WebVisualizer:
 
     def start(self):
         """Start the web server in the main thread."""
-        print(f"\nStarting visualization server at http://{self.host}:{self.port}")
-        print("Open this URL in your browser to see the agent visualization")
+        logger.info("Starting visualization server at http://%s:%s", self.host, self.port)
+        logger.info("Open this URL in your browser to see the agent visualization")
         uvicorn.run(app, host=self.host, port=self.port, log_level="error")
\ No newline at end of file
@@ -0,0 +1,80 @@
+# benchmarks/bench_signing.py
+"""Messages per second of payload signing and verification.
+
+Compares the previous signing code (base58 of the whole signed message over
+json.dumps, pubkey stringified per call) with PayloadSigner writing version 1
+and version 2 envelopes. Run from the examples/fxn-ag2 directory:
+
+    python benchmarks/bench_signing.py --messages 20000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import base58
+from solana.keypair import Keypair
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.signing import LEGACY_ENVELOPE_VERSION, PayloadSigner, verify_payload
+
+
+def offer(i: int, provider: str) -> dict:
+    return {
+        "type": "service_offer",
+        "service": "receipt_processing",
+        "timestamp": datetime.utcnow().isoformat(),
+        "provider": provider,
+        "sequence": i,
+        "capabilities": {
+            "receipt_analysis": True,
+            "data_processing": True,
+            "data_storage": True
+        }
+    }
+
+
+def legacy_sign(keypair: Keypair, data: dict) -> dict:
+    """_sign_payload before PayloadSigner"""
+    message = json.dumps(data).encode()
+    signature = base58.b58encode(keypair.sign(message)).decode()
+    return {"data": data, "signature": signature, "pubkey": str(keypair.public_key)}
+
+
+def rate(count: int, run) -> float:
+    start = time.perf_counter()
+    run()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=20000)
+    args = parser.parse_args()
+
+    keypair = Keypair()
+    signer = PayloadSigner(keypair)
+    legacy_signer = PayloadSigner(keypair, LEGACY_ENVELOPE_VERSION)
+    messages = [offer(i, signer.pubkey) for i in range(args.messages)]
+
+    results = {
+        "legacy sign": rate(args.messages, lambda: [legacy_sign(keypair, m) for m in messages]),
+        "sign v1": rate(args.messages, lambda: [legacy_signer.sign(m) for m in messages]),
+        "sign v2": rate(args.messages, lambda: [signer.sign(m) for m in messages]),
+    }
+    legacy_envelopes = [legacy_signer.sign(m) for m in messages]
+    envelopes = [signer.sign(m) for m in messages]
+    results["verify v1"] = rate(args.messages, lambda: [verify_payload(e) for e in legacy_envelopes])
+    results["verify v2"] = rate(args.messages, lambda: [verify_payload(e) for e in envelopes])
+
+    print(f"{args.messages} messages")
+    print(f"{'operation':<15}{'messages/s':>12}")
+    for name, per_second in results.items():
+        print(f"{name:<15}{per_second:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
 # bookkeeping_swarm.py
 import os
 import json
+import time
+import uuid
 import base58
 import asyncio
+import logging
 import aiohttp
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -15,16 +18,62 @@ from autogen.agentchat.contrib.multimodal_conversable_agent import MultimodalCon
 from solana.keypair import Keypair
 from solana.transaction import Transaction
 
+from src.job_queue import ReceiptJob, ReceiptJobQueue
+from src.result_cache import ReceiptResultCache, content_key, url_key
+from src.signing import ENVELOPE_VERSION, PayloadSigner
+from src.offer_scheduler import OfferScheduler
+from fxn_protocol.events import SSEParser
+from fxn_protocol.tracing import tracer
+
 # Load environment variables
 load_dotenv()
 
-print(f"Env is: {os.getenv('AUTOGEN_USE_DOCKER')}")
+logger = logging.getLogger(__name__)
+logger.debug("AUTOGEN_USE_DOCKER is %s", os.getenv('AUTOGEN_USE_DOCKER'))
 
 class BookkeepingSwarm:
     OFFER_INTERVAL = 300  # 5 minutes in seconds
 
-    def __init__(self, wallet_private_key: str, port: int = 3000, offer_interval: int = 300):
+    def __init__(self, wallet_private_key: str, port: int = 3000, offer_interval: int = 300,
+                 max_concurrent_offers: int = 50, offer_timeout: float = 30,
+                 receipt_workers: int = 4, receipt_queue_size: int = 100,
+                 job_db_path: Optional[str] = None, max_job_attempts: int = 5,
+                 result_cache_path: Optional[str] = None,
+                 result_cache_ttl: float = 7 * 24 * 3600, result_cache_size: int = 10000,
+                 max_image_bytes: int = 20 * 1024 * 1024,
+                 offer_validity: Optional[float] = None,
+                 envelope_version: int = ENVELOPE_VERSION):
         self.OFFER_INTERVAL = offer_interval  # Allow override in tests
+
+        # Offers go out concurrently, at most max_concurrent_offers at a time,
+        # and each is abandoned after offer_timeout seconds. Receipt requests
+        # from offer responses are queued for a fixed pool of workers so slow
+        # processing never holds up the offer cycle.
+        self.offer_timeout = offer_timeout
+        self.offer_semaphore = asyncio.Semaphore(max_concurrent_offers)
+        self.receipt_worker_count = receipt_workers
+        self.receipt_queue_size = receipt_queue_size
+        self.receipt_workers: List[asyncio.Task] = []
+
+        # One signed offer is shared by every subscriber until it is about to
+        # expire; it defaults to being valid for one offer interval
+        self.offer_validity = offer_validity if offer_validity is not None else offer_interval
+        self.capabilities = {
+            "receipt_analysis": True,
+            "data_processing": True,
+            "data_storage": True
+        }
+        self._offer_body: Optional[bytes] = None
+
+        # Active subscribers keyed by subscription PDA; each is offered to once
+        # per interval at its own slot rather than all at once
+        self.scheduler = OfferScheduler(offer_interval)
+        self._schedule_changed = asyncio.Event()
+        self._offer_tasks = set()
+        self._offer_expires_at = 0.0
+        self._jobs_available = asyncio.Event()
+        self._job_finished = asyncio.Condition()
+        self._receipt_slots_reserved = 0
         self.config_list = [
             {
                 "model": "gpt-4-vision-preview",
@@ -33,7 +82,7 @@ class BookkeepingSwarm:
         ]
 
         self.fxn_sdk_url = f"http://localhost:{port}"
-        print(f"Initializing swarm with SDK URL: {self.fxn_sdk_url}")
+        logger.info("Initializing swarm with SDK URL: %s", self.fxn_sdk_url)
 
         # Connect to the FXN client
         self.fxn_sdk_url = f"http://localhost:{port}"
@@ -41,11 +90,27 @@ class BookkeepingSwarm:
 
         # Initialize Solana Wallet
         self.keypair = Keypair.from_secret_key(base58.b58decode(wallet_private_key))
+        self.signer = PayloadSigner(self.keypair, envelope_version)
 
         # Create working directory
         self.work_dir = Path("workspace")
         self.work_dir.mkdir(exist_ok=True)
 
+        # Durable receipt job queue; survives restarts of the swarm
+        self.job_queue = ReceiptJobQueue(
+            job_db_path or str(self.work_dir / "receipt_jobs.sqlite3"),
+            max_attempts=max_job_attempts
+        )
+
+        # Processed receipts keyed by image URL and image content hash, so a
+        # resubmitted receipt skips both model rounds
+        self.result_cache = ReceiptResultCache(
+            result_cache_path or str(self.work_dir / "receipt_results.sqlite3"),
+            ttl=result_cache_ttl,
+            max_entries=result_cache_size
+        )
+        self.max_image_bytes = max_image_bytes
+
         # Initialize agents
         self.image_analyzer = MultimodalConversableAgent(
             name="image_analyzer",
@@ -89,53 +154,77 @@ class BookkeepingSwarm:
         )
 
     async def process_receipt(self, image_url: str, requestor_url: str) -> Dict:
-        """Process a single receipt image and return categorized data"""
-        try:
-            print(f"\n=== Processing receipt ===")
-            print(f"Image URL: {image_url}")
-            print(f"Requestor URL: {requestor_url}")
-
-            # First, analyze the image
-            image_analysis = await self.manager.a_initiate_chat(
-                self.image_analyzer,
-                message={
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": "Process this receipt image and extract all relevant information"},
-                        {"type": "image_url", "image_url": image_url}
-                    ]
-                }
-            )
-            print("Image analysis completed")
-
-            # Process the extracted data
-            processed_data = await self.manager.a_initiate_chat(
-                self.data_processor,
-                message={
-                    "role": "user",
-                    "content": f"Process and categorize this receipt data: {json.dumps(image_analysis.summary)}"
-                }
-            )
-            print("Data processing completed")
+        """Process a single receipt image and return signed categorized data"""
+        with tracer.span("receipt.process"):
+            receipt_data = await self.analyze_receipt(image_url, requestor_url)
+            with tracer.span("receipt.sign"):
+                return self._sign_payload(receipt_data)
 
-            return self._sign_payload(processed_data.summary)
-        except Exception as e:
-            print(f"Error in process_receipt: {e}")
-            raise
+    async def analyze_receipt(self, image_url: str, requestor_url: str) -> Dict:
+        """Process a single receipt image and return categorized data"""
+        with tracer.span("receipt.analyze") as span:
+            try:
+                logger.info("Processing receipt %s for %s", image_url, requestor_url)
+
+                keys = [url_key(image_url)]
+                cached = self.result_cache.get(*keys, count_miss=False)
+                if cached is None:
+                    # Same image under a different URL
+                    with tracer.span("receipt.content_hash"):
+                        image_hash = await self._image_content_key(image_url)
+                    if image_hash is not None:
+                        keys.append(image_hash)
+                        cached = self.result_cache.get(image_hash)
+                    else:
+                        self.result_cache.record_miss()
+                span.set_tag("cached", cached is not None)
+                if cached is not None:
+                    logger.info("Returning cached receipt result")
+                    return cached
+
+                # First, analyze the image
+                with tracer.span("receipt.image_analysis"):
+                    image_analysis = await self.manager.a_initiate_chat(
+                        self.image_analyzer,
+                        message={
+                            "role": "user",
+                            "content": [
+                                {"type": "text", "text": "Process this receipt image and extract all relevant information"},
+                                {"type": "image_url", "image_url": image_url}
+                            ]
+                        }
+                    )
+                logger.debug("Image analysis completed")
+
+                # Process the extracted data
+                with tracer.span("receipt.data_processing"):
+                    processed_data = await self.manager.a_initiate_chat(
+                        self.data_processor,
+                        message={
+                            "role": "user",
+                            "content": f"Process and categorize this receipt data: {json.dumps(image_analysis.summary)}"
+                        }
+                    )
+                logger.debug("Data processing completed")
+
+                self.result_cache.set(processed_data.summary, *keys)
+                return processed_data.summary
+            except Exception as e:
+                logger.error("Error in analyze_receipt: %s", e)
+                raise
 
     async def handle_subscriber_request(self, request_data: Dict, callback_url: str) -> None:
         """Process a subscriber's request and send back results"""
         try:
-            print(f"\n=== Handling subscriber request ===")
-            print(f"Request data: {request_data}")
-            print(f"Callback URL: {callback_url}")
+            logger.info("Handling subscriber request from %s", callback_url)
+            logger.debug("Request data: %s", request_data)
 
-            # Process the receipt
-            receipt_data = await self.process_receipt(
+            # Process the receipt; the results envelope below is the only signature
+            receipt_data = await self.analyze_receipt(
                 request_data["image_url"],
                 callback_url
             )
-            print("Receipt processing completed")
+            logger.debug("Receipt processing completed")
 
             # Post results back to subscriber
             payload = self._sign_payload({
@@ -145,19 +234,17 @@ class BookkeepingSwarm:
                 "request_id": request_data.get("request_id")
             })
 
-            print(f"Sending results to: {callback_url}/results")
-            print(f"Payload: {payload}")
+            logger.debug("Sending results to %s/results: %s", callback_url, payload)
 
-            async with self.session.post(f"{callback_url}/results", json=payload) as response:
-                print(f"Response status: {response.status}")
-                if response.status != 200:
-                    print(f"Error sending results to {callback_url}: {response.status}")
+            with tracer.span("receipt.deliver") as span:
+                async with self.session.post(f"{callback_url}/results", json=payload) as response:
+                    span.set_tag("status", response.status)
+                    logger.debug("Response status: %s", response.status)
+                    if response.status != 200:
+                        logger.warning("Error sending results to %s: %s", callback_url, response.status)
 
         except Exception as e:
-            print(f"Error in handle_subscriber_request: {e}")
-            print(f"Error type: {type(e).__name__}")
-            import traceback
-            print(f"Traceback:\n{traceback.format_exc()}")
+            logger.exception("Error in handle_subscriber_request: %s", e)
 
             # Notify subscriber of error
             error_payload = self._sign_payload({
@@ -168,109 +255,390 @@ class BookkeepingSwarm:
             })
             await self.session.post(f"{callback_url}/errors", json=error_payload)
 
+    async def _image_content_key(self, image_url: str) -> Optional[str]:
+        """Hash of the image bytes, or None if the image can't be fetched"""
+        if not image_url.startswith(("http://", "https://")):
+            return None
+        try:
+            async with self.session.get(image_url) as response:
+                if response.status != 200:
+                    return None
+                image_bytes = await response.content.read(self.max_image_bytes + 1)
+                if len(image_bytes) > self.max_image_bytes:
+                    return None
+                return content_key(image_bytes)
+        except Exception as e:
+            logger.warning("Could not fetch %s for hashing: %s", image_url, e)
+            return None
+
+    def cache_stats(self) -> Dict:
+        """Hit-rate metrics of the receipt result cache"""
+        return self.result_cache.stats()
+
     def _sign_payload(self, data: Dict) -> Dict:
         """Sign the payload with the Solana wallet"""
-        message = json.dumps(data).encode()
-        signature = base58.b58encode(self.keypair.sign(message)).decode()
-        return {
-            "data": data,
-            "signature": signature,
-            "pubkey": str(self.keypair.public_key)
-        }
-
-    async def make_offer(self, subscriber_url: str) -> bool:
-            """Make an offer to a subscriber and handle their immediate response"""
-            try:
-                print(f"Making offer to {subscriber_url}")
+        return self.signer.sign(data)
+
+    def current_offer(self) -> bytes:
+        """The shared signed service_offer body, re-signed once it nears expiry"""
+        now = time.time()
+        # Keep at least offer_timeout of validity so offers in flight stay valid
+        if self._offer_body is None or now + self.offer_timeout >= self._offer_expires_at:
+            expires_at = now + max(self.offer_validity, self.offer_timeout * 2)
+            with tracer.span("offer.sign"):
                 payload = self._sign_payload({
                     "type": "service_offer",
                     "service": "receipt_processing",
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "provider": str(self.keypair.public_key),
-                    "capabilities": {
-                        "receipt_analysis": True,
-                        "data_processing": True,
-                        "data_storage": True
-                    }
+                    "timestamp": datetime.utcfromtimestamp(now).isoformat(),
+                    "valid_until": datetime.utcfromtimestamp(expires_at).isoformat(),
+                    "provider": self.signer.pubkey,
+                    "capabilities": self.capabilities
                 })
+                self._offer_body = json.dumps(payload).encode()
+            self._offer_expires_at = expires_at
+        return self._offer_body
 
-                print(f"Making offer to {subscriber_url}")
-                async with self.session.post(f"{subscriber_url}/offers", json=payload) as response:
-                    if response.status == 200:
-                        # If subscriber responds with a request, handle it immediately
-                        response_data = await response.json()
-                        print(f"Received response from subscriber: {response_data}")
-
-                        if response_data.get('type') == 'receipt_request':
-                            # Handle the receipt processing request
-                            await self.handle_subscriber_request(
-                                request_data=response_data,
-                                callback_url=subscriber_url  # or response_data.get('callback_url') if specified
-                            )
-                        return True
-                    else:
-                        print(f"Offer not accepted. Status: {response.status}")
-                        return False
-            except Exception as e:
-                print(f"Error making offer to {subscriber_url}: {e}")
-                return False
+    def invalidate_offer(self) -> None:
+        """Force the next offer to be re-signed"""
+        self._offer_body = None
 
+    def set_capabilities(self, capabilities: Dict[str, bool]) -> None:
+        """Change the advertised capabilities and re-sign the offer"""
+        self.capabilities = dict(capabilities)
+        self.invalidate_offer()
 
-    async def get_provider_subscriptions(self) -> List:
-            """Get subscriptions for this provider using SDK HTTP endpoint"""
+    async def make_offer(self, subscriber_url: str) -> bool:
+            """Make an offer to a subscriber and handle their immediate response"""
+            with tracer.span("offer.send") as span:
+                try:
+                    logger.debug("Making offer to %s", subscriber_url)
+                    async with self.session.post(
+                        f"{subscriber_url}/offers",
+                        data=self.current_offer(),
+                        headers={"Content-Type": "application/json"}
+                    ) as response:
+                        span.set_tag("status", response.status)
+                        if response.status == 200:
+                            # If subscriber responds with a request, handle it immediately
+                            response_data = await response.json()
+                            logger.debug("Received response from subscriber: %s", response_data)
+
+                            if response_data.get('type') == 'receipt_request':
+                                # Queue the receipt processing request for the workers
+                                await self.enqueue_receipt_request(
+                                    request_data=response_data,
+                                    callback_url=subscriber_url  # or response_data.get('callback_url') if specified
+                                )
+                            return True
+                        else:
+                            logger.info("Offer to %s not accepted. Status: %s", subscriber_url, response.status)
+                            return False
+                except Exception as e:
+                    span.set_tag("error", type(e).__name__)
+                    logger.warning("Error making offer to %s: %s", subscriber_url, e)
+                    return False
+
+
+    async def enqueue_receipt_request(self, request_data: Dict, callback_url: str) -> bool:
+        """Durably queue a receipt request for the workers.
+
+        The request is written straight away, so it survives a cancelled offer
+        or a restart; backpressure is applied before offering instead (see
+        _reserve_receipt_slot). Returns False if a request with the same
+        request_id was already queued.
+        """
+        self.start_receipt_workers()
+        request_id = request_data.get("request_id") or str(uuid.uuid4())
+        added = self.job_queue.enqueue(request_id, callback_url, request_data)
+        if added:
+            self._jobs_available.set()
+        else:
+            logger.info("Ignoring duplicate receipt request %s", request_id)
+        return added
+
+    def receipt_queue_full(self) -> bool:
+        backlog = self.job_queue.backlog_count() + self._receipt_slots_reserved
+        return backlog >= self.receipt_queue_size
+
+    async def _reserve_receipt_slot(self) -> None:
+        """Wait until the receipt queue has room, then hold one slot for an offer.
+
+        Jobs running or due count against receipt_queue_size, as do offers in
+        flight, since each may come back with a request. Jobs waiting out a
+        retry backoff do not count. Each freed slot wakes one waiting offer,
+        which passes the wakeup on if there is still room.
+        """
+        if not self.receipt_queue_full():
+            self._receipt_slots_reserved += 1
+            return
+        self.start_receipt_workers()
+        async with self._job_finished:
+            await self._job_finished.wait_for(lambda: not self.receipt_queue_full())
+            self._receipt_slots_reserved += 1
+            if not self.receipt_queue_full():
+                self._job_finished.notify(1)
+
+    async def _release_receipt_slot(self) -> None:
+        self._receipt_slots_reserved -= 1
+        async with self._job_finished:
+            self._job_finished.notify(1)
+
+    def start_receipt_workers(self) -> None:
+        """Start the receipt worker pool if it is not running"""
+        self.receipt_workers = [task for task in self.receipt_workers if not task.done()]
+        while len(self.receipt_workers) < self.receipt_worker_count:
+            self.receipt_workers.append(asyncio.create_task(self._receipt_worker()))
+
+    async def _receipt_worker(self) -> None:
+        while True:
+            self._jobs_available.clear()
+            job = self.job_queue.claim()
+            if job is None:
+                # Sleep until a job is enqueued or a retry becomes due
+                wait = self.job_queue.seconds_until_next_job()
+                try:
+                    await asyncio.wait_for(self._jobs_available.wait(), timeout=wait or 1.0)
+                except asyncio.TimeoutError:
+                    pass
+                continue
             try:
-                provider_address = str(self.keypair.public_key)
-                print(f"Requesting subscriptions for provider: {provider_address}")
-                print(f"SDK URL: {self.fxn_sdk_url}")
-
-                async with self.session.get(
-                    f"{self.fxn_sdk_url}/subscriptions/provider/{provider_address}"
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        print(f"Received subscriptions: {data}")
-                        return data.get('subscriptions', [])
-                    else:
-                        response_text = await response.text()
-                        print(f"Error getting subscriptions. Status: {response.status}")
-                        print(f"Response body: {response_text}")
-                        return []
+                await self.run_job(job)
             except Exception as e:
-                print(f"Error calling FXN SDK: {e}")
-                print(f"Error details: {type(e).__name__}")
-                # Optional: print full traceback
-                import traceback
-                print(f"Traceback: {traceback.format_exc()}")
-                return []
+                logger.exception("Error in receipt worker: %s", e)
+            async with self._job_finished:
+                self._job_finished.notify(1)
 
-    async def poll_subscribers_loop(self):
-            """Continuous loop to poll subscribers and make offers"""
-            while True:
+    async def run_job(self, job: ReceiptJob) -> None:
+        """Process a queued receipt and deliver the result, retrying on failure"""
+        with tracer.span("receipt.job", attempt=job.attempts):
+            await self._run_job(job)
+
+    async def _run_job(self, job: ReceiptJob) -> None:
+        try:
+            receipt_data = job.result
+            if receipt_data is None:
+                receipt_data = await self.analyze_receipt(
+                    job.request_data["image_url"],
+                    job.callback_url
+                )
+                self.job_queue.save_result(job.request_id, receipt_data)
+
+            payload = self._sign_payload({
+                "type": "receipt_processed",
+                "timestamp": datetime.utcnow().isoformat(),
+                "data": receipt_data,
+                "request_id": job.request_id
+            })
+            with tracer.span("receipt.deliver") as span:
+                async with self.session.post(f"{job.callback_url}/results", json=payload) as response:
+                    span.set_tag("status", response.status)
+                    if response.status != 200:
+                        raise RuntimeError(f"Subscriber returned status {response.status} for results")
+            self.job_queue.complete(job.request_id)
+            logger.info("Receipt request %s completed", job.request_id)
+
+        except Exception as e:
+            if self.job_queue.retry(job, str(e)):
+                logger.warning("Receipt request %s failed, will retry: %s", job.request_id, e)
+                return
+
+            logger.error("Receipt request %s failed permanently: %s", job.request_id, e)
+            error_payload = self._sign_payload({
+                "type": "processing_error",
+                "timestamp": datetime.utcnow().isoformat(),
+                "error": str(e),
+                "request_id": job.request_id
+            })
+            async with self.session.post(f"{job.callback_url}/errors", json=error_payload):
+                pass
+
+    async def _make_offer_limited(self, subscriber_url: str) -> bool:
+        # Hold the offer back while receipts are backed up, so a request the
+        # subscriber sends in reply always has room; this wait is not part
+        # of the offer timeout
+        await self._reserve_receipt_slot()
+        try:
+            async with self.offer_semaphore:
                 try:
-                    # Get current subscribers from FXN SDK via HTTP
-                    subscribers = await self.get_provider_subscriptions()
-                    print(f"Active subscribers: {subscribers}")
-
-                    # Make offers to each active subscriber
-                    for subscriber in subscribers:
-                        if subscriber.get('status') == "active":
-                            # Get recipient URL from the nested subscription object
-                            recipient_url = subscriber.get('subscription', {}).get('recipient')
-                            if recipient_url:
-                                await self.make_offer(recipient_url)
-                            else:
-                                print(f"No recipient URL found for subscriber: {subscriber}")
-
-                    # Wait for next interval
-                    await asyncio.sleep(self.OFFER_INTERVAL)
+                    return await asyncio.wait_for(self.make_offer(subscriber_url), self.offer_timeout)
+                except asyncio.TimeoutError:
+                    logger.warning("Offer to %s timed out after %ss", subscriber_url, self.offer_timeout)
+                    return False
+        finally:
+            await self._release_receipt_slot()
+
+    async def make_offers(self, subscriber_urls: List[str]) -> List[bool]:
+        """Make offers to all subscribers concurrently"""
+        # Sign once up front; every subscriber in this cycle gets the same offer
+        self.current_offer()
+        return await asyncio.gather(
+            *(self._make_offer_limited(url) for url in subscriber_urls)
+        )
 
+    async def get_provider_subscriptions(self) -> Optional[List]:
+            """Get subscriptions for this provider using SDK HTTP endpoint.
+
+            Returns None if the sidecar could not be reached or answered
+            with an error, so a failed listing is not taken as no subscribers.
+            """
+            with tracer.span("GET /subscriptions/provider") as span:
+                try:
+                    provider_address = self.signer.pubkey
+                    logger.debug("Requesting subscriptions for provider %s from %s",
+                                 provider_address, self.fxn_sdk_url)
+
+                    async with self.session.get(
+                        f"{self.fxn_sdk_url}/subscriptions/provider/{provider_address}"
+                    ) as response:
+                        span.set_tag("status", response.status)
+                        if response.status == 200:
+                            data = await response.json()
+                            logger.debug("Received subscriptions: %s", data)
+                            return data.get('subscriptions', [])
+                        else:
+                            response_text = await response.text()
+                            logger.error("Error getting subscriptions. Status: %s, body: %s",
+                                         response.status, response_text)
+                            return None
                 except Exception as e:
-                    print(f"Error in polling loop: {str(e)}")
-                    print(f"Error details: {type(e).__name__}")
-                    # Optional: print full traceback
-                    import traceback
-                    print(f"Traceback: {traceback.format_exc()}")
-                    await asyncio.sleep(60)  # Wait before retrying on error
+                    span.set_tag("error", type(e).__name__)
+                    logger.exception("Error calling FXN SDK: %s", e)
+                    return None
+
+    async def poll_subscribers_loop(self):
+            """Re-list subscribers every interval and offer to each one at its scheduled slot"""
+            dispatch_task = asyncio.create_task(self.offer_dispatch_loop())
+            try:
+                while True:
+                    try:
+                        cycle_started = time.monotonic()
+
+                        # Get current subscribers from FXN SDK via HTTP
+                        with tracer.span("subscribers.poll") as span:
+                            subscribers = await self.get_provider_subscriptions()
+                            # Keep the current schedule when the listing failed
+                            diff = None
+                            if subscribers is not None:
+                                diff = self.scheduler.update(subscribers)
+                            span.set_tag("subscribers", len(self.scheduler))
+                        if diff:
+                            logger.info("Subscribers: %d added, %d changed, %d removed, %d active",
+                                        len(diff.added), len(diff.changed), len(diff.removed),
+                                        len(self.scheduler))
+                            self._schedule_changed.set()
+
+                        # Wait for next interval, counted from the start of this cycle
+                        elapsed = time.monotonic() - cycle_started
+                        await asyncio.sleep(max(self.OFFER_INTERVAL - elapsed, 0))
+
+                    except Exception as e:
+                        logger.exception("Error in polling loop: %s", e)
+                        await asyncio.sleep(60)  # Wait before retrying on error
+            finally:
+                dispatch_task.cancel()
+
+    async def offer_dispatch_loop(self):
+        """Send offers as subscribers' slots come due"""
+        while True:
+            self._schedule_changed.clear()
+            recipient_urls = self.scheduler.pop_due()
+            if recipient_urls:
+                self._start_offers(recipient_urls)
+            wait = self.scheduler.seconds_until_next()
+            try:
+                # Wake early if the index changes, a new slot may be sooner
+                await asyncio.wait_for(
+                    self._schedule_changed.wait(),
+                    timeout=wait if wait is not None else self.OFFER_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    def _start_offers(self, recipient_urls: List[str]) -> None:
+        # Offers run in the background so the caller never waits on subscribers
+        task = asyncio.create_task(self.make_offers(recipient_urls))
+        self._offer_tasks.add(task)
+        task.add_done_callback(self._offer_tasks.discard)
+
+    def apply_subscription_event(self, event: str, data: Dict) -> List[str]:
+        """Update the subscriber index from a sidecar event.
+
+        Returns the recipient URLs of subscriptions that were added or
+        renewed, which are the only ones that need an offer straight away.
+        """
+        previous_end_times = {
+            pda: subscriber.end_time for pda, subscriber in self.scheduler.subscribers.items()
+        }
+        if event == "snapshot":
+            diff = self.scheduler.update(data)
+            fresh = diff.added + diff.changed
+        elif event == "change":
+            row = data["subscription"]
+            pda = row["subscriptionPDA"]
+            if data["type"] == "cancelled":
+                self.scheduler.remove(pda)
+                fresh = []
+            else:
+                change = self.scheduler.update_one(row)
+                fresh = [pda] if change in ("added", "changed") else []
+        else:
+            return []
+        self._schedule_changed.set()
+
+        recipient_urls = []
+        for pda in fresh:
+            subscriber = self.scheduler.subscribers[pda]
+            if subscriber.end_time > previous_end_times.get(pda, 0):
+                recipient_urls.append(subscriber.recipient)
+        return recipient_urls
+
+    async def _subscription_events(self):
+        """Yield (event, data) pairs from the sidecar's subscription event stream"""
+        url = f"{self.fxn_sdk_url}/subscriptions/provider/{self.signer.pubkey}/events"
+        # The sidecar pings every 15s; only the gap between reads is bounded
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=60)
+        async with self.session.get(url, timeout=timeout) as response:
+            response.raise_for_status()
+            parser = SSEParser()
+            async for raw_line in response.content:
+                message = parser.feed(raw_line.decode())
+                if message is not None:
+                    event, data = message
+                    yield event, json.loads(data)
+
+    async def watch_subscribers_loop(self):
+        """Offer to subscribers as the sidecar reports changes, instead of re-listing them.
+
+        Known subscribers are still offered to once per interval at their
+        scheduled slot. Dropped streams reconnect with backoff; a reconnect's
+        snapshot is diffed against the index so only new or renewed
+        subscribers get an immediate offer. Falls back to polling if the
+        sidecar has no event stream.
+        """
+        dispatch_task = asyncio.create_task(self.offer_dispatch_loop())
+        delay = 1
+        try:
+            while True:
+                try:
+                    async for event, data in self._subscription_events():
+                        delay = 1
+                        recipient_urls = self.apply_subscription_event(event, data)
+                        if recipient_urls:
+                            logger.info("New or renewed subscribers: %s", recipient_urls)
+                            self._start_offers(recipient_urls)
+                except aiohttp.ClientResponseError as e:
+                    if e.status == 404:
+                        logger.warning("Sidecar has no subscription events, falling back to polling")
+                        dispatch_task.cancel()
+                        await self.poll_subscribers_loop()
+                        return
+                    logger.warning("Subscription event stream failed: %s", e)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.info("Subscription event stream disconnected: %s", e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60)
+        finally:
+            dispatch_task.cancel()
 
     async def start(self):
             """Start the swarm's main loop"""
@@ -278,23 +646,34 @@ class BookkeepingSwarm:
                 # Initialize session if not already done
                 if self.session is None:
                     self.session = aiohttp.ClientSession()
-                    print("Initialized aiohttp ClientSession")
+                    logger.debug("Initialized aiohttp ClientSession")
+
+                # Pick up receipt jobs left queued by a previous run
+                self.start_receipt_workers()
 
-                # Start the polling loop
-                polling_task = asyncio.create_task(self.poll_subscribers_loop())
-                print("Started polling loop")
+                # Start the subscriber loop
+                polling_task = asyncio.create_task(self.watch_subscribers_loop())
+                logger.info("Started subscriber watch loop")
 
                 # Keep the swarm running
                 await polling_task
 
             except Exception as e:
-                print(f"Error in swarm: {e}")
+                logger.exception("Error in swarm: %s", e)
             finally:
                 if self.session:
                     await self.session.close()
 
     async def stop(self):
         """Clean shutdown of the swarm"""
+        for task in self._offer_tasks:
+            task.cancel()
+        for task in self.receipt_workers:
+            task.cancel()
+        await asyncio.gather(*self.receipt_workers, return_exceptions=True)
+        self.receipt_workers = []
+        self.job_queue.close()
+        self.result_cache.close()
         await self.session.close()
 
 async def main():
@@ -0,0 +1,187 @@
+# job_queue.py
+import json
+import time
+import heapq
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+@dataclass
+class ReceiptJob:
+    request_id: str
+    callback_url: str
+    request_data: Dict
+    attempts: int
+    result: Optional[Dict] = None
+
+class ReceiptJobQueue:
+    """SQLite-backed queue of receipt processing requests.
+
+    Jobs are keyed by request_id, so a request that is enqueued twice is only
+    processed once. Failed jobs are retried with exponential backoff until
+    max_attempts, and jobs left running by a crashed process are picked up
+    again on the next start.
+
+    The backlog of running and due jobs is counted in memory, so it is only
+    read from the database when the queue is opened; a queue file is meant
+    to be used by one process at a time.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 5,
+                 base_backoff: float = 2.0, max_backoff: float = 300.0):
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.db = sqlite3.connect(path, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS receipt_jobs (
+                request_id TEXT PRIMARY KEY,
+                callback_url TEXT NOT NULL,
+                request_data TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                result TEXT,
+                last_error TEXT,
+                created_at REAL NOT NULL
+            )
+        """)
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS receipt_jobs_due ON receipt_jobs (status, next_attempt_at)"
+        )
+        # Anything still marked running was interrupted by a restart
+        self.db.execute("UPDATE receipt_jobs SET status = 'pending' WHERE status = 'running'")
+
+        # Backlog counters: jobs running, jobs due, and the times at which
+        # jobs waiting out a retry backoff become due
+        self._running = 0
+        self._due = 0
+        self._backoff: List[float] = []
+        now = time.time()
+        for (next_attempt_at,) in self.db.execute(
+            "SELECT next_attempt_at FROM receipt_jobs WHERE status = 'pending'"
+        ):
+            if next_attempt_at <= now:
+                self._due += 1
+            else:
+                self._backoff.append(next_attempt_at)
+        heapq.heapify(self._backoff)
+
+    def _promote_due(self, now: float) -> None:
+        while self._backoff and self._backoff[0] <= now:
+            heapq.heappop(self._backoff)
+            self._due += 1
+
+    def enqueue(self, request_id: str, callback_url: str, request_data: Dict) -> bool:
+        """Add a job; returns False if request_id was already queued"""
+        now = time.time()
+        cursor = self.db.execute(
+            """INSERT OR IGNORE INTO receipt_jobs
+               (request_id, callback_url, request_data, next_attempt_at, created_at)
+               VALUES (?, ?, ?, ?, ?)""",
+            (request_id, callback_url, json.dumps(request_data), now, now)
+        )
+        if cursor.rowcount != 1:
+            return False
+        self._due += 1
+        return True
+
+    def claim(self) -> Optional[ReceiptJob]:
+        """Mark the oldest due job as running and return it"""
+        now = time.time()
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.db.execute(
+                """SELECT request_id, callback_url, request_data, attempts, result
+                   FROM receipt_jobs
+                   WHERE status = 'pending' AND next_attempt_at <= ?
+                   ORDER BY next_attempt_at LIMIT 1""",
+                (now,)
+            ).fetchone()
+            if row is not None:
+                self.db.execute(
+                    "UPDATE receipt_jobs SET status = 'running' WHERE request_id = ?",
+                    (row[0],)
+                )
+            self.db.execute("COMMIT")
+        except Exception:
+            self.db.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        self._promote_due(now)
+        self._due -= 1
+        self._running += 1
+        return ReceiptJob(
+            request_id=row[0],
+            callback_url=row[1],
+            request_data=json.loads(row[2]),
+            attempts=row[3],
+            result=json.loads(row[4]) if row[4] is not None else None
+        )
+
+    def save_result(self, request_id: str, result: Dict) -> None:
+        """Keep a processed result so retries only redo the delivery"""
+        self.db.execute(
+            "UPDATE receipt_jobs SET result = ? WHERE request_id = ?",
+            (json.dumps(result), request_id)
+        )
+
+    def complete(self, request_id: str) -> None:
+        """Mark a claimed job as done"""
+        self._running -= 1
+        self.db.execute(
+            "UPDATE receipt_jobs SET status = 'done', last_error = NULL WHERE request_id = ?",
+            (request_id,)
+        )
+
+    def retry(self, job: ReceiptJob, error: str) -> bool:
+        """Reschedule a failed job; returns False once it has run out of attempts"""
+        attempts = job.attempts + 1
+        self._running -= 1
+        if attempts >= self.max_attempts:
+            self.db.execute(
+                """UPDATE receipt_jobs SET status = 'failed', attempts = ?, last_error = ?
+                   WHERE request_id = ?""",
+                (attempts, error, job.request_id)
+            )
+            return False
+        delay = min(self.base_backoff * 2 ** (attempts - 1), self.max_backoff)
+        next_attempt_at = time.time() + delay
+        self.db.execute(
+            """UPDATE receipt_jobs
+               SET status = 'pending', attempts = ?, last_error = ?, next_attempt_at = ?
+               WHERE request_id = ?""",
+            (attempts, error, next_attempt_at, job.request_id)
+        )
+        heapq.heappush(self._backoff, next_attempt_at)
+        return True
+
+    def pending_count(self) -> int:
+        return self.db.execute(
+            "SELECT COUNT(*) FROM receipt_jobs WHERE status IN ('pending', 'running')"
+        ).fetchone()[0]
+
+    def backlog_count(self) -> int:
+        """Jobs running or due now; those waiting out a retry backoff are not counted"""
+        self._promote_due(time.time())
+        return self._running + self._due
+
+    def seconds_until_next_job(self) -> Optional[float]:
+        """Seconds until the next pending job is due, None if there are none"""
+        row = self.db.execute(
+            "SELECT MIN(next_attempt_at) FROM receipt_jobs WHERE status = 'pending'"
+        ).fetchone()
+        if row[0] is None:
+            return None
+        return max(row[0] - time.time(), 0.0)
+
+    def status(self, request_id: str) -> Optional[str]:
+        row = self.db.execute(
+            "SELECT status FROM receipt_jobs WHERE request_id = ?", (request_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def close(self) -> None:
+        self.db.close()
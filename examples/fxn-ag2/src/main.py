@@ -1,14 +1,22 @@
 # src/main.py
 import os
 import asyncio
+import logging
 import signal
 from dotenv import load_dotenv
 from pathlib import Path
 from src.bookkeeping_swarm import BookkeepingSwarm
+from fxn_protocol.tracing import tracer, start_metrics_server
 
 # Load .env file
 load_dotenv()
 
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
+
 async def main():
     # Validate required environment variables
     wallet_private_key = os.getenv("SOLANA_PRIVATE_KEY")
@@ -18,15 +26,24 @@ async def main():
     # Initialize the swarm
     swarm = BookkeepingSwarm(
         wallet_private_key=wallet_private_key,
-        port=int(os.getenv("FXN_SDK_PORT", "3000"))
+        port=int(os.getenv("FXN_SDK_PORT", "3000")),
+        # Set FXN_ENVELOPE_VERSION=1 while subscribers still verify the old envelopes
+        envelope_version=int(os.getenv("FXN_ENVELOPE_VERSION", "2"))
     )
 
+    # Prometheus-style span latencies at :FXN_METRICS_PORT/metrics
+    metrics_port = os.getenv("FXN_METRICS_PORT")
+    if metrics_port:
+        tracer.enabled = True
+        start_metrics_server(tracer, int(metrics_port))
+        logger.info("Serving metrics on port %s", metrics_port)
+
     # Setup graceful shutdown
     loop = asyncio.get_running_loop()
     stop_event = asyncio.Event()
 
     def signal_handler():
-        print("\nShutdown signal received. Cleaning up...")
+        logger.info("Shutdown signal received. Cleaning up...")
         stop_event.set()
 
     # Register signal handlers
@@ -34,8 +51,15 @@ async def main():
         asyncio.get_running_loop().add_signal_handler(sig, signal_handler)
 
     try:
-        # Create task for the polling loop
-        polling_task = asyncio.create_task(swarm.poll_subscribers_loop())
+        # Pick up receipt jobs left queued by a previous run
+        swarm.start_receipt_workers()
+
+        # React to subscription events from the sidecar, or re-list every
+        # interval when FXN_SUBSCRIPTION_MODE=poll
+        if os.getenv("FXN_SUBSCRIPTION_MODE", "push") == "poll":
+            polling_task = asyncio.create_task(swarm.poll_subscribers_loop())
+        else:
+            polling_task = asyncio.create_task(swarm.watch_subscribers_loop())
 
         # Wait for shutdown signal
         await stop_event.wait()
@@ -50,10 +74,10 @@ async def main():
     finally:
         # Ensure cleanup happens
         await swarm.stop()
-        print("Shutdown complete")
+        logger.info("Shutdown complete")
 
 if __name__ == "__main__":
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        print("\nProcess interrupted by user")
+        logger.info("Process interrupted by user")
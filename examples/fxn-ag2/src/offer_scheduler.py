@@ -0,0 +1,141 @@
+# offer_scheduler.py
+import time
+import heapq
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fxn_protocol.models import _end_time
+
+@dataclass
+class ScheduledSubscriber:
+    subscription_pda: str
+    recipient: str
+    end_time: int
+    next_offer_at: float
+    version: int = 0
+
+@dataclass
+class SubscriberDiff:
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+class OfferScheduler:
+    """Index of active subscribers keyed by subscription PDA, with one offer
+    due per subscriber every interval.
+
+    Each subscriber gets a fixed phase within the interval derived from its
+    PDA, so offers are spread evenly instead of all going out at once. Due
+    times live in a heap; entries are invalidated lazily by bumping the
+    subscriber's version. Subscribers whose end_time has passed are dropped.
+    """
+
+    def __init__(self, interval: float, clock=time.time):
+        self.interval = interval
+        self.clock = clock
+        self.subscribers: Dict[str, ScheduledSubscriber] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._sequence = 0
+
+    def _phase(self, subscription_pda: str) -> float:
+        return (zlib.crc32(subscription_pda.encode()) % 10000) / 10000 * self.interval
+
+    def _push(self, subscriber: ScheduledSubscriber) -> None:
+        # Versions are unique across subscribers, so a PDA that is removed and
+        # added again never revives its old heap entries
+        self._sequence += 1
+        subscriber.version = self._sequence
+        heapq.heappush(
+            self._heap,
+            (subscriber.next_offer_at, subscriber.version, subscriber.subscription_pda)
+        )
+
+    def upsert(self, subscription_pda: str, recipient: str, end_time: int) -> Optional[str]:
+        """Add or update a subscriber; returns "added", "changed" or None"""
+        now = self.clock()
+        if end_time <= now:
+            return "removed" if self.remove(subscription_pda) else None
+        subscriber = self.subscribers.get(subscription_pda)
+        if subscriber is None:
+            subscriber = ScheduledSubscriber(
+                subscription_pda, recipient, end_time,
+                next_offer_at=now + self._phase(subscription_pda)
+            )
+            self.subscribers[subscription_pda] = subscriber
+            self._push(subscriber)
+            return "added"
+        if subscriber.recipient == recipient and subscriber.end_time == end_time:
+            return None
+        # Keep the existing slot; only the details change
+        subscriber.recipient = recipient
+        subscriber.end_time = end_time
+        return "changed"
+
+    def remove(self, subscription_pda: str) -> bool:
+        # Its heap entries are skipped once the PDA is gone from the index
+        return self.subscribers.pop(subscription_pda, None) is not None
+
+    def update_one(self, row: Dict) -> Optional[str]:
+        """Apply one row of a provider listing; returns the change, if any"""
+        pda = row["subscriptionPDA"]
+        details = row.get("subscription") or {}
+        recipient = details.get("recipient")
+        if row.get("status") not in ("active", "expiring_soon") or not recipient:
+            return "removed" if self.remove(pda) else None
+        return self.upsert(pda, recipient, _end_time(details["endTime"]))
+
+    def update(self, rows: Iterable[Dict]) -> SubscriberDiff:
+        """Replace the index with a full subscriber listing and return the diff"""
+        diff = SubscriberDiff()
+        seen = set()
+        for row in rows:
+            pda = row["subscriptionPDA"]
+            seen.add(pda)
+            change = self.update_one(row)
+            if change == "added":
+                diff.added.append(pda)
+            elif change == "changed":
+                diff.changed.append(pda)
+            elif change == "removed":
+                diff.removed.append(pda)
+        for pda in [pda for pda in self.subscribers if pda not in seen]:
+            self.remove(pda)
+            diff.removed.append(pda)
+        return diff
+
+    def pop_due(self) -> List[str]:
+        """Recipient URLs whose offer is due, rescheduling each one interval later"""
+        now = self.clock()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, version, pda = heapq.heappop(self._heap)
+            subscriber = self.subscribers.get(pda)
+            if subscriber is None or subscriber.version != version:
+                continue
+            if subscriber.end_time <= now:
+                del self.subscribers[pda]
+                continue
+            due.append(subscriber.recipient)
+            # Advance from the slot, not from now, so the phase never drifts
+            subscriber.next_offer_at += self.interval
+            if subscriber.next_offer_at <= now:
+                subscriber.next_offer_at = now + self.interval
+            self._push(subscriber)
+        return due
+
+    def seconds_until_next(self) -> Optional[float]:
+        """Seconds until the next offer is due, None if nobody is scheduled"""
+        while self._heap:
+            due_at, version, pda = self._heap[0]
+            subscriber = self.subscribers.get(pda)
+            if subscriber is not None and subscriber.version == version:
+                return max(due_at - self.clock(), 0.0)
+            heapq.heappop(self._heap)
+        return None
+
+    def __len__(self) -> int:
+        return len(self.subscribers)
@@ -0,0 +1,109 @@
+# result_cache.py
+import json
+import time
+import sqlite3
+import hashlib
+from typing import Dict, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+def normalise_url(url: str) -> str:
+    """Canonical form of an image URL: lower-cased host, sorted query, no fragment"""
+    if url.startswith("data:"):
+        return url
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, ""))
+
+def url_key(url: str) -> str:
+    return "url:" + hashlib.sha256(normalise_url(url).encode()).hexdigest()
+
+def content_key(image_bytes: bytes) -> str:
+    return "sha256:" + hashlib.sha256(image_bytes).hexdigest()
+
+class ReceiptResultCache:
+    """SQLite-backed cache of processed receipts, keyed by image hash.
+
+    Entries expire ttl seconds after they were stored and the least recently
+    used are evicted beyond max_entries. Hit and miss counters cover the
+    lifetime of this instance.
+    """
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.db = sqlite3.connect(path, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS receipt_results (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+        """)
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS receipt_results_lru ON receipt_results (last_used_at)"
+        )
+
+    def get(self, *keys: str, count_miss: bool = True) -> Optional[Dict]:
+        """Return the result stored under the first live key, counting a hit or miss"""
+        now = time.time()
+        for key in keys:
+            row = self.db.execute(
+                "SELECT result, created_at FROM receipt_results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                continue
+            if now - row[1] >= self.ttl:
+                self.db.execute("DELETE FROM receipt_results WHERE key = ?", (key,))
+                self.expirations += 1
+                continue
+            self.db.execute(
+                "UPDATE receipt_results SET last_used_at = ? WHERE key = ?", (now, key)
+            )
+            self.hits += 1
+            return json.loads(row[0])
+        if count_miss:
+            self.misses += 1
+        return None
+
+    def record_miss(self) -> None:
+        self.misses += 1
+
+    def set(self, result: Dict, *keys: str) -> None:
+        """Store result under every key, evicting the least recently used beyond max_entries"""
+        now = time.time()
+        encoded = json.dumps(result)
+        self.db.executemany(
+            "INSERT OR REPLACE INTO receipt_results VALUES (?, ?, ?, ?)",
+            [(key, encoded, now, now) for key in keys]
+        )
+        excess = self.size() - self.max_entries
+        if excess > 0:
+            self.db.execute(
+                """DELETE FROM receipt_results WHERE key IN (
+                       SELECT key FROM receipt_results ORDER BY last_used_at LIMIT ?)""",
+                (excess,)
+            )
+            self.evictions += excess
+
+    def size(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM receipt_results").fetchone()[0]
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "size": self.size()
+        }
+
+    def close(self) -> None:
+        self.db.close()
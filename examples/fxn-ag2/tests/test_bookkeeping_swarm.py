@@ -8,9 +8,15 @@ from aioresponses import aioresponses
 
 import os
 import sys
+import time
 import logging
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The swarm uses the Python SDK from this repository when it is not installed
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "python"
+))
 
 from src.bookkeeping_swarm import BookkeepingSwarm
 
@@ -33,6 +39,11 @@ def mock_env():
     }):
         yield
 
+@pytest.fixture(autouse=True)
+def isolated_workspace(tmp_path, monkeypatch):
+    # The swarm keeps its workspace and receipt job database in the cwd
+    monkeypatch.chdir(tmp_path)
+
 @pytest.mark.asyncio
 async def test_make_offer_with_receipt_request(test_private_key):
     """Test making an offer and handling an immediate receipt request"""
@@ -198,7 +209,7 @@ async def test_full_workflow(test_private_key, test_public_key):
                         "subscriber": "test-subscriber",
                         "subscriptionPDA": "test-pda",
                         "subscription": {
-                            "endTime": "67b290c4",
+                            "endTime": format(int(time.time()) + 86400, "x"),
                             "recipient": subscriber_url
                         },
                         "status": "active"
@@ -298,3 +309,500 @@ async def test_full_workflow(test_private_key, test_public_key):
                 except asyncio.CancelledError:
                     pass
                 await swarm.stop()
+
+@pytest.mark.asyncio
+async def test_failed_listing_keeps_scheduled_subscribers(test_private_key, test_public_key):
+    """A sidecar error skips the cycle instead of dropping every subscriber"""
+    with aioresponses() as m:
+        sdk_url = f"http://localhost:3000/subscriptions/provider/{test_public_key}"
+        m.get(sdk_url, status=200, payload={
+            "success": True,
+            "subscriptions": [{
+                "subscriber": "test-subscriber",
+                "subscriptionPDA": "test-pda",
+                "subscription": {
+                    "endTime": format(int(time.time()) + 86400, "x"),
+                    "recipient": "http://localhost:3005"
+                },
+                "status": "active"
+            }]
+        })
+        m.get(sdk_url, status=500, body="sidecar unavailable", repeat=True)
+
+        swarm = BookkeepingSwarm(
+            wallet_private_key=test_private_key,
+            port=3000,
+            offer_interval=0.2
+        )
+
+        async def no_offers():
+            await asyncio.Event().wait()
+
+        try:
+            with patch.object(swarm, 'offer_dispatch_loop', side_effect=no_offers):
+                polling_task = asyncio.create_task(swarm.poll_subscribers_loop())
+                await asyncio.sleep(0.1)
+                scheduled = swarm.scheduler.subscribers["test-pda"]
+                # Two failed listings
+                await asyncio.sleep(0.4)
+                assert await swarm.get_provider_subscriptions() is None
+                assert swarm.scheduler.subscribers == {"test-pda": scheduled}
+                polling_task.cancel()
+                await asyncio.gather(polling_task, return_exceptions=True)
+        finally:
+            await swarm.stop()
+
+@pytest.mark.asyncio
+async def test_make_offers_runs_concurrently_with_timeout(test_private_key):
+    """Offers are dispatched concurrently and slow subscribers time out"""
+    swarm = BookkeepingSwarm(
+        wallet_private_key=test_private_key,
+        port=3000,
+        offer_interval=1,
+        max_concurrent_offers=10,
+        offer_timeout=0.5
+    )
+
+    async def slow_offer(subscriber_url):
+        await asyncio.sleep(5 if subscriber_url.endswith("slow") else 0.2)
+        return True
+
+    try:
+        with patch.object(swarm, 'make_offer', side_effect=slow_offer):
+            urls = [f"http://localhost:30{i:02d}" for i in range(10)] + ["http://localhost:3099/slow"]
+            started = asyncio.get_running_loop().time()
+            results = await swarm.make_offers(urls)
+            elapsed = asyncio.get_running_loop().time() - started
+
+        assert results == [True] * 10 + [False]
+        assert elapsed < 1.5, f"Offers were not concurrent, took {elapsed:.2f}s"
+    finally:
+        await swarm.stop()
+
+@pytest.mark.asyncio
+async def test_receipt_request_is_processed_by_worker(test_private_key):
+    """make_offer returns without waiting for receipt processing"""
+    with aioresponses() as m:
+        subscriber_url = "http://localhost:3005"
+        m.post(
+            f"{subscriber_url}/offers",
+            status=200,
+            payload={
+                "type": "receipt_request",
+                "image_url": "https://example.com/receipt.jpg",
+                "request_id": "test-request-1"
+            }
+        )
+        m.post(f"{subscriber_url}/results", status=200, payload={"status": "success"})
+
+        swarm = BookkeepingSwarm(
+            wallet_private_key=test_private_key,
+            port=3000,
+            offer_interval=1,
+            receipt_workers=2
+        )
+
+        async def fake_process(image_url, callback_url):
+            return {"amount": 42.99}
+
+        try:
+            with patch.object(swarm, 'analyze_receipt', side_effect=fake_process):
+                assert await swarm.make_offer(subscriber_url) is True
+                for _ in range(100):
+                    if swarm.job_queue.status("test-request-1") == "done":
+                        break
+                    await asyncio.sleep(0.01)
+            assert swarm.job_queue.status("test-request-1") == "done"
+            assert len(swarm.receipt_workers) == 2
+        finally:
+            await swarm.stop()
+
+@pytest.mark.asyncio
+async def test_receipt_jobs_are_deduplicated_and_retried(test_private_key):
+    """Duplicate request ids are ignored and failed deliveries are retried"""
+    with aioresponses() as m:
+        subscriber_url = "http://localhost:3005"
+        # First delivery fails, the retry succeeds
+        m.post(f"{subscriber_url}/results", status=500)
+        m.post(f"{subscriber_url}/results", status=200, payload={"status": "success"})
+
+        swarm = BookkeepingSwarm(
+            wallet_private_key=test_private_key,
+            port=3000,
+            offer_interval=1,
+            receipt_workers=1
+        )
+        swarm.job_queue.base_backoff = 0.05
+        calls = []
+
+        async def fake_process(image_url, callback_url):
+            calls.append(image_url)
+            return {"amount": 42.99}
+
+        request_data = {
+            "type": "receipt_request",
+            "image_url": "https://example.com/receipt.jpg",
+            "request_id": "test-request-1"
+        }
+        try:
+            with patch.object(swarm, 'analyze_receipt', side_effect=fake_process):
+                assert await swarm.enqueue_receipt_request(request_data, subscriber_url) is True
+                assert await swarm.enqueue_receipt_request(request_data, subscriber_url) is False
+                for _ in range(200):
+                    if swarm.job_queue.status("test-request-1") == "done":
+                        break
+                    await asyncio.sleep(0.01)
+            assert swarm.job_queue.status("test-request-1") == "done"
+            # The saved result is reused, only the delivery is retried
+            assert len(calls) == 1
+        finally:
+            await swarm.stop()
+
+@pytest.mark.asyncio
+async def test_full_receipt_queue_holds_offers_back(test_private_key):
+    """Offers wait for room in the receipt queue instead of dropping requests"""
+    with aioresponses() as m:
+        urls = ["http://localhost:3005", "http://localhost:3006"]
+        for i, url in enumerate(urls):
+            m.post(f"{url}/offers", status=200, payload={
+                "type": "receipt_request",
+                "image_url": f"https://example.com/receipt{i}.jpg",
+                "request_id": f"r{i}"
+            })
+            m.post(f"{url}/results", status=200, payload={"status": "success"})
+
+        swarm = BookkeepingSwarm(
+            wallet_private_key=test_private_key,
+            port=3000,
+            offer_interval=1,
+            receipt_workers=1,
+            receipt_queue_size=1,
+            offer_timeout=0.3
+        )
+        release = asyncio.Event()
+
+        async def blocked_process(image_url, callback_url):
+            await release.wait()
+            return {"amount": 42.99}
+
+        try:
+            with patch.object(swarm, 'analyze_receipt', side_effect=blocked_process):
+                offers = asyncio.create_task(swarm.make_offers(urls))
+                # Well past the offer timeout while the first job holds the queue
+                await asyncio.sleep(0.6)
+                assert swarm.job_queue.status("r0") == "running"
+                assert swarm.job_queue.status("r1") is None
+                offered = [str(url) for method, url in m.requests if str(url).endswith("/offers")]
+                assert offered == [f"{urls[0]}/offers"]
+
+                release.set()
+                assert await offers == [True, True]
+                for _ in range(100):
+                    if swarm.job_queue.status("r1") == "done":
+                        break
+                    await asyncio.sleep(0.01)
+            assert swarm.job_queue.status("r0") == "done"
+            assert swarm.job_queue.status("r1") == "done"
+        finally:
+            await swarm.stop()
+
+@pytest.mark.asyncio
+async def test_jobs_queued_before_restart_run_on_start(test_private_key, tmp_path):
+    """Pending jobs from a previous run are processed without a new receipt request"""
+    from src.job_queue import ReceiptJobQueue
+
+    job_db_path = str(tmp_path / "jobs.sqlite3")
+    queue = ReceiptJobQueue(job_db_path)
+    queue.enqueue("r0", "http://localhost:3005", {"image_url": "https://example.com/r0.jpg"})
+    queue.close()
+
+    with aioresponses() as m:
+        m.post("http://localhost:3005/results", status=200, payload={"status": "success"})
+
+        swarm = BookkeepingSwarm(
+            wallet_private_key=test_private_key,
+            port=3000,
+            offer_interval=1,
+            receipt_workers=1,
+            job_db_path=job_db_path
+        )
+
+        async def fake_process(image_url, callback_url):
+            return {"amount": 42.99}
+
+        async def no_subscribers():
+            await asyncio.Event().wait()
+
+        with patch.object(swarm, 'analyze_receipt', side_effect=fake_process), \
+                patch.object(swarm, 'watch_subscribers_loop', side_effect=no_subscribers):
+            started = asyncio.create_task(swarm.start())
+            try:
+                for _ in range(100):
+                    if swarm.job_queue.status("r0") == "done":
+                        break
+                    await asyncio.sleep(0.01)
+                assert swarm.job_queue.status("r0") == "done"
+            finally:
+                started.cancel()
+                await asyncio.gather(started, return_exceptions=True)
+                await swarm.stop()
+
+def test_backlog_excludes_jobs_in_retry_backoff(tmp_path):
+    """Jobs waiting out a retry backoff do not count against the queue size"""
+    from src.job_queue import ReceiptJobQueue
+
+    queue = ReceiptJobQueue(str(tmp_path / "jobs.sqlite3"), base_backoff=60)
+    queue.enqueue("r0", "http://localhost:3005", {"image_url": "https://example.com/r0.jpg"})
+    assert queue.backlog_count() == 1
+    assert queue.retry(queue.claim(), "subscriber unavailable")
+    assert queue.backlog_count() == 0
+    assert queue.pending_count() == 1
+    queue.close()
+
+def test_backlog_is_counted_in_memory(tmp_path):
+    """The backlog is read from the database on open and tracked after that"""
+    from src.job_queue import ReceiptJobQueue
+
+    path = str(tmp_path / "jobs.sqlite3")
+    queue = ReceiptJobQueue(path, base_backoff=0.05)
+    for i in range(3):
+        queue.enqueue(f"r{i}", "http://localhost:3005", {"image_url": f"https://example.com/r{i}.jpg"})
+    queue.claim()
+    queue.retry(queue.claim(), "subscriber unavailable")
+    queue.close()
+
+    # Reopening resets the running job and finds the one in backoff
+    queue = ReceiptJobQueue(path)
+    statements = []
+    queue.db.set_trace_callback(statements.append)
+    assert queue.backlog_count() == 2
+    time.sleep(0.1)
+    assert queue.backlog_count() == 3
+    assert statements == []
+
+    queue.complete(queue.claim().request_id)
+    assert queue.retry(queue.claim(), "subscriber unavailable")
+    assert queue.backlog_count() == 1
+    queue.close()
+
+@pytest.mark.asyncio
+async def test_process_receipt_uses_content_hash_cache(test_private_key):
+    """A resubmitted receipt image is answered from the cache without model calls"""
+    with aioresponses() as m:
+        image_bytes = b"fake receipt image"
+        m.get("https://example.com/receipt.jpg", status=200, body=image_bytes, repeat=True)
+        m.get("https://cdn.example.com/copy.jpg", status=200, body=image_bytes, repeat=True)
+
+        swarm = BookkeepingSwarm(
+            wallet_private_key=test_private_key,
+            port=3000,
+            offer_interval=1
+        )
+        chats = []
+
+        async def async_mock_chat(*args, **kwargs):
+            chats.append(args)
+            return Mock(summary={"amount": 42.99})
+
+        try:
+            with patch('autogen.GroupChatManager.a_initiate_chat', new=async_mock_chat):
+                first = await swarm.process_receipt("https://example.com/receipt.jpg", "http://localhost:3005")
+                again = await swarm.process_receipt("https://EXAMPLE.com/receipt.jpg#top", "http://localhost:3005")
+                copy = await swarm.process_receipt("https://cdn.example.com/copy.jpg", "http://localhost:3005")
+
+            assert len(chats) == 2
+            assert first["data"] == again["data"] == copy["data"] == {"amount": 42.99}
+            stats = swarm.cache_stats()
+            assert stats["hits"] == 2 and stats["misses"] == 1
+            assert stats["hit_rate"] == pytest.approx(2 / 3)
+        finally:
+            await swarm.stop()
+
+def test_signed_payloads_verify(test_private_key, test_public_key):
+    """Version 2 envelopes carry a detached signature over canonical JSON"""
+    from src.signing import PayloadSigner, canonical_json, verify_payload
+    from solana.keypair import Keypair
+    import base58
+
+    signer = PayloadSigner(Keypair.from_secret_key(base58.b58decode(test_private_key)))
+    assert signer.pubkey == test_public_key
+    assert canonical_json({"b": 1, "a": [1, 2]}) == b'{"a":[1,2],"b":1}'
+
+    envelopes = [signer.sign({"n": i}) for i in range(3)]
+    assert all(signer.verify(envelope) for envelope in envelopes)
+    assert envelopes[0]["version"] == 2
+    assert len(base58.b58decode(envelopes[0]["signature"])) == 64
+
+    tampered = dict(envelopes[0], data={"n": 99})
+    assert not verify_payload(tampered)
+    assert not verify_payload(dict(envelopes[0], version=3))
+
+def test_legacy_envelopes_still_sign_and_verify(test_private_key):
+    """Version 1 keeps the old envelope: no version field and the whole signed message"""
+    from src.signing import LEGACY_ENVELOPE_VERSION, PayloadSigner, verify_payload
+    from solana.keypair import Keypair
+    import base58
+
+    keypair = Keypair.from_secret_key(base58.b58decode(test_private_key))
+    signer = PayloadSigner(keypair, LEGACY_ENVELOPE_VERSION)
+    data = {"type": "service_offer", "capabilities": {"receipt_analysis": True}}
+    envelope = signer.sign(data)
+
+    assert "version" not in envelope
+    assert envelope["signature"] == base58.b58encode(keypair.sign(json.dumps(data).encode())).decode()
+    assert verify_payload(envelope)
+    assert not verify_payload(dict(envelope, data={"type": "other"}))
+    # A v1 signature is not accepted as a detached v2 one
+    assert not verify_payload(dict(envelope, version=2))
+
+    with pytest.raises(ValueError):
+        PayloadSigner(keypair, 3)
+
+@pytest.mark.asyncio
+async def test_offer_is_signed_once_per_window(test_private_key):
+    """Subscribers share one signed offer until it is invalidated"""
+    swarm = BookkeepingSwarm(
+        wallet_private_key=test_private_key,
+        port=3000,
+        offer_interval=60,
+        offer_timeout=5
+    )
+    try:
+        with patch.object(swarm.signer, 'sign', wraps=swarm.signer.sign) as sign:
+            first = swarm.current_offer()
+            assert swarm.current_offer() is first
+            assert sign.call_count == 1
+
+            offer = json.loads(first)
+            assert swarm.signer.verify(offer)
+            assert offer["data"]["valid_until"] > offer["data"]["timestamp"]
+
+            swarm.set_capabilities({"receipt_analysis": True})
+            resigned = json.loads(swarm.current_offer())
+            assert sign.call_count == 2
+            assert resigned["data"]["capabilities"] == {"receipt_analysis": True}
+    finally:
+        await swarm.stop()
+
+@pytest.mark.asyncio
+async def test_watch_subscribers_offers_only_to_changes(test_private_key, test_public_key):
+    """Offers go to subscribers the event stream reports as added or renewed"""
+    now = int(time.time())
+
+    def row(pda, end_time, recipient):
+        return {
+            "subscriber": f"subscriber-{pda}",
+            "subscriptionPDA": pda,
+            "subscription": {"endTime": end_time, "recipient": recipient},
+            "status": "active"
+        }
+
+    # The sidecar's keep-alive pings are SSE comments and yield nothing
+    events = ": ping\n\n" + "".join(
+        f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        for event, data in [
+            ("snapshot", [row("pda-1", format(now + 3600, "x"), "http://localhost:3005")]),
+            ("change", {"type": "added", "subscription": row("pda-2", format(now + 3600, "x"), "http://localhost:3006")}),
+            ("change", {"type": "updated", "subscription": row("pda-1", format(now + 3600, "x"), "http://localhost:3005")}),
+            ("change", {"type": "renewed", "subscription": row("pda-1", format(now + 7200, "x"), "http://localhost:3005")}),
+            ("change", {"type": "cancelled", "subscription": row("pda-2", format(now + 3600, "x"), "http://localhost:3006")}),
+        ]
+    )
+
+    with aioresponses() as m:
+        m.get(
+            f"http://localhost:3000/subscriptions/provider/{test_public_key}/events",
+            status=200,
+            body=events
+        )
+        swarm = BookkeepingSwarm(
+            wallet_private_key=test_private_key,
+            port=3000,
+            offer_interval=60
+        )
+        offered = []
+
+        async def fake_offers(urls):
+            offered.extend(urls)
+            return [True] * len(urls)
+
+        try:
+            with patch.object(swarm, 'make_offers', side_effect=fake_offers):
+                async for event, data in swarm._subscription_events():
+                    for url in swarm.apply_subscription_event(event, data):
+                        await swarm.make_offers([url])
+
+            assert offered == ["http://localhost:3005", "http://localhost:3006", "http://localhost:3005"]
+            assert list(swarm.scheduler.subscribers) == ["pda-1"]
+        finally:
+            await swarm.stop()
+
+def test_offer_scheduler_spreads_offers_and_drops_expired():
+    """Subscribers are offered to once per interval at their own slot"""
+    from src.offer_scheduler import OfferScheduler
+
+    clock = [1000.0]
+    scheduler = OfferScheduler(interval=60, clock=lambda: clock[0])
+
+    def row(i, end_time):
+        return {
+            "subscriptionPDA": f"pda-{i}",
+            "subscription": {"endTime": format(end_time, "x"), "recipient": f"http://sub-{i}"},
+            "status": "active"
+        }
+
+    diff = scheduler.update([row(i, 1000 + 90) for i in range(100)] + [row(100, 999)])
+    assert len(diff.added) == 100 and len(scheduler) == 100
+
+    # Over one interval every subscriber is due exactly once, a few at a time
+    offered = []
+    for second in range(60):
+        clock[0] = 1000.0 + second + 1
+        batch = scheduler.pop_due()
+        assert len(batch) < 20
+        offered.extend(batch)
+    assert sorted(offered) == sorted(f"http://sub-{i}" for i in range(100))
+
+    # A second listing only reports what changed
+    rows = [row(i, 1000 + 90) for i in range(1, 100)]
+    rows[0] = row(1, 5000)
+    diff = scheduler.update(rows)
+    assert (diff.added, diff.changed, diff.removed) == ([], ["pda-1"], ["pda-0"])
+
+    # Past end_time, subscribers are dropped instead of offered to
+    clock[0] = 1121.0
+    assert scheduler.pop_due() == ["http://sub-1"]
+    assert len(scheduler) == 1
+
+@pytest.mark.asyncio
+async def test_offers_and_receipts_are_traced(test_private_key):
+    """Spans nest per receipt and feed the latency percentiles and metrics"""
+    from fxn_protocol.tracing import tracer
+    tracer.reset()
+    tracer.enabled = True
+    swarm = BookkeepingSwarm(wallet_private_key=test_private_key, port=3000, offer_interval=60)
+    try:
+        with aioresponses() as m, patch('autogen.GroupChatManager.a_initiate_chat') as mock_chat:
+            mock_chat.return_value = Mock(summary={"amount": 1})
+            m.post("http://localhost:3005/offers", status=200, payload={"type": "ack"})
+            m.post("http://localhost:3006/offers", status=503)
+            assert await swarm.make_offers(["http://localhost:3005", "http://localhost:3006"]) == [True, False]
+            await swarm.process_receipt("receipt.jpg", "http://localhost:3005")
+
+        spans = {span.name: span for span in tracer.spans}
+        assert spans["receipt.analyze"].parent_id == spans["receipt.process"].span_id
+        assert spans["receipt.image_analysis"].trace_id == spans["receipt.process"].span_id
+        assert spans["receipt.analyze"].tags["cached"] is False
+
+        percentiles = tracer.percentiles()
+        assert percentiles["offer.send"]["count"] == 2
+        assert percentiles["offer.sign"]["count"] == 1
+        assert percentiles["receipt.process"]["p50"] <= percentiles["receipt.process"]["p99"]
+
+        metrics = tracer.prometheus()
+        assert 'fxn_span_duration_seconds_count{span="offer.send"} 2' in metrics
+        assert 'fxn_span_duration_seconds{span="receipt.process",quantile="0.95"}' in metrics
+    finally:
+        tracer.enabled = False
+        tracer.reset()
+        await swarm.stop()
@@ -0,0 +1,94 @@
+# benchmarks/bench_subscriptions.py
+"""Decode time, memory and filter throughput of subscription listings.
+
+Compares the previous list of plain dataclasses with the slotted Subscription
+and the columnar SubscriptionBatch. Run from the python/ directory:
+
+    python benchmarks/bench_subscriptions.py --rows 50000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fxn_protocol.models import Subscription, SubscriptionBatch, _decode_row
+
+
+@dataclass
+class PlainSubscription:
+    """The Subscription model before it was slotted"""
+    end_time: int
+    recipient: str
+    subscription_pda: str
+    status: str
+
+
+def listing(rows: int) -> str:
+    """A provider listing body in the shape the server returns"""
+    now = int(time.time())
+    statuses = ("active", "expiring_soon", "active", "active")
+    return json.dumps({"success": True, "subscriptions": [
+        {
+            "subscriber": f"Subscriber{i:040d}",
+            "subscriptionPDA": f"Pda{i:041d}",
+            "subscription": {"endTime": format(now + i * 60, "x"), "recipient": f"http://10.0.{i % 256}.1:3005"},
+            "status": statuses[i % len(statuses)],
+        }
+        for i in range(rows)
+    ]})
+
+
+def measure(build, body: str):
+    rows = json.loads(body)["subscriptions"]
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(rows)
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--filter-runs", type=int, default=5)
+    args = parser.parse_args()
+
+    body = listing(args.rows)
+    cutoff = int(time.time()) + args.rows * 30
+
+    builders = {
+        "list[dataclass]": lambda rows: [PlainSubscription(*_decode_row(row)) for row in rows],
+        "list[Subscription]": lambda rows: [Subscription.from_json(row) for row in rows],
+        "SubscriptionBatch": SubscriptionBatch.from_json,
+    }
+    filters = {
+        "list[dataclass]": lambda subs: [s for s in subs if s.status == "active" and s.end_time < cutoff],
+        "list[Subscription]": lambda subs: [s for s in subs if s.status == "active" and s.end_time < cutoff],
+        "SubscriptionBatch": lambda batch: batch.active_expiring_before(cutoff),
+    }
+
+    print(f"{args.rows} rows")
+    print(f"{'model':<20}{'decode rows/s':>15}{'memory MiB':>12}{'filter rows/s':>15}")
+    for name, build in builders.items():
+        result, elapsed, memory = measure(build, body)
+        # Best of several runs; one filter pass is short enough to be noisy
+        filter_elapsed = float("inf")
+        for _ in range(args.filter_runs):
+            start = time.perf_counter()
+            matched = filters[name](result)
+            filter_elapsed = min(filter_elapsed, time.perf_counter() - start)
+        print(f"{name:<20}{args.rows / elapsed:>15.0f}{memory / 2 ** 20:>12.2f}"
+              f"{args.rows / filter_elapsed:>15.0f}   ({len(matched)} matched)")
+
+
+if __name__ == "__main__":
+    main()
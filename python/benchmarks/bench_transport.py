@@ -0,0 +1,56 @@
+# benchmarks/bench_transport.py
+"""Calls/sec of per-call requests.post versus the pooled FXNClient transport.
+
+Run from the python/ directory:
+
+    python benchmarks/bench_transport.py --calls 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fxn_protocol.client import FXNClient
+from benchmarks.stub_server import StubServer
+
+PROVIDER = {"connection": {}, "wallet": {}, "opts": {"preflightCommitment": "processed"}}
+
+
+def bench_unpooled(base_url: str, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        response = requests.post(f"{base_url}/fee", json={"provider": PROVIDER, "fee": 1})
+        response.raise_for_status()
+        response.json()["signature"]
+    return calls / (time.perf_counter() - start)
+
+
+def bench_pooled(port: int, calls: int) -> float:
+    with FXNClient(port=port, host="127.0.0.1", start_server=False) as client:
+        start = time.perf_counter()
+        for _ in range(calls):
+            client.set_fee(PROVIDER, 1)
+        return calls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    with StubServer() as server:
+        base_url = f"http://127.0.0.1:{server.port}"
+        unpooled = bench_unpooled(base_url, args.calls)
+        pooled = bench_pooled(server.port, args.calls)
+
+    print(f"requests.post (new connection per call): {unpooled:8.0f} calls/sec")
+    print(f"FXNClient pooled keep-alive session:     {pooled:8.0f} calls/sec")
+    print(f"speedup: {pooled / unpooled:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/stub_server.py
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers the FXN server routes with canned responses"""
+    # HTTP/1.1 so clients can keep connections alive between calls
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this Nagle's
+    # algorithm stalls every keep-alive response on the peer's delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def _send_json(self, payload: Dict[str, Any], status: int = 200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._read_body()
+        if self.path.startswith("/subscriptions/"):
+            self._send_json({"success": True, "subscriptions": []})
+        else:
+            self._send_json({"success": False, "error": "Not found"}, status=404)
+
+    def do_POST(self):
+        self._read_body()
+        self._send_json({"success": True, "signature": "stub-signature"})
+
+    do_PUT = do_POST
+
+
+class _ThreadingServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Concurrent benchmarks open hundreds of connections at once
+    request_queue_size = 1024
+
+
+class StubServer:
+    """Runs a StubHandler server on a background thread"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, handler=StubHandler):
+        self.httpd = _ThreadingServer((host, port), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.httpd.server_address[1]
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.httpd.shutdown()
+        self.httpd.server_close()
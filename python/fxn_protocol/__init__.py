@@ -0,0 +1,8 @@
+from .client import FXNClient, BatchResult, StartupMetrics
+from .models import Subscription, SubscriptionBatch, SubscriptionRows
+from .events import SubscriptionEvent
+from .async_client import AsyncFXNClient
+from .tracing import Tracer, tracer
+
+__all__ = ["FXNClient", "AsyncFXNClient", "Subscription", "SubscriptionBatch", "SubscriptionRows", "BatchResult", "StartupMetrics",
+           "SubscriptionEvent", "Tracer", "tracer"]
@@ -0,0 +1,315 @@
+import asyncio
+import logging
+import aiohttp
+from typing import Optional, List, Dict, Any, AsyncIterator
+
+from .cache import TTLCache, FRESH, STALE
+from .tracing import tracer
+from .models import Subscription, SubscriptionBatch
+from .events import SSEParser, SubscriptionEvent, SubscriptionWatcher, WATCH_READ_TIMEOUT
+from .client import (
+    BatchResult, _batch_payload, _invalidation_predicate,
+    _stream_params, _parse_stream_line, _watch_params
+)
+
+logger = logging.getLogger(__name__)
+
+class AsyncFXNClient:
+    """Awaitable counterpart of FXNClient for an already running FXN server.
+
+    All calls share one aiohttp session, so many concurrent requests are
+    multiplexed over a bounded connection pool instead of a thread each.
+    """
+
+    def __init__(self, port: int = 3000, host: str = "localhost",
+                 limit: int = 100, limit_per_host: int = 0,
+                 timeout: Optional[float] = 30, cache_ttl: Optional[float] = None,
+                 cache_max_size: int = 1024, cache_stale_ttl: float = 0):
+        self.base_url = f"http://{host}:{port}"
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.subscription_cache = (
+            TTLCache(cache_ttl, cache_max_size, cache_stale_ttl)
+            if cache_ttl is not None else None
+        )
+        self._refresh_tasks = set()
+
+    async def __aenter__(self):
+        self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily so the session binds to the running event loop
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self.session
+
+    async def close(self):
+        """Close the shared session and its pooled connections"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _request(self, method: str, path: str, payload: Dict[str, Any],
+                       **path_params: str) -> Dict[str, Any]:
+        # Spans are named after the route template so every address shares
+        # one histogram; the address itself goes in a tag
+        with tracer.span(f"{method} {path}", sidecar=self.base_url, **path_params) as span:
+            async with self._get_session().request(
+                method,
+                f"{self.base_url}{path.format(**path_params)}",
+                json=payload
+            ) as response:
+                span.set_tag("status", response.status)
+                response.raise_for_status()
+                return await response.json()
+
+    async def _cached(self, key, load):
+        cache = self.subscription_cache
+        if cache is None:
+            return await load()
+        value, state = cache.get(key)
+        if state == FRESH:
+            return list(value)
+        if state == STALE:
+            # Serve the stale listing and refresh it in the background
+            if cache.start_refresh(key):
+                task = asyncio.create_task(self._refresh(key, load, cache.generation))
+                self._refresh_tasks.add(task)
+                task.add_done_callback(self._refresh_tasks.discard)
+            return list(value)
+        generation = cache.generation
+        value = await load()
+        cache.set(key, value, generation)
+        return list(value)
+
+    async def _refresh(self, key, load, generation: int):
+        try:
+            self.subscription_cache.set(key, await load(), generation)
+        except Exception as e:
+            # Keep serving the stale entry; the next expired read retries
+            logger.warning("Background refresh of %s failed: %s", key, e)
+        finally:
+            self.subscription_cache.finish_refresh(key)
+
+    def _invalidate_subscriptions(self, data_providers: List[str]):
+        if self.subscription_cache is not None and data_providers:
+            self.subscription_cache.invalidate(_invalidation_predicate(data_providers))
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Hit/miss counters of the subscription cache"""
+        if self.subscription_cache is None:
+            return {}
+        return self.subscription_cache.stats()
+
+    async def subscribe(self, provider: dict, data_provider: str, recipient: str,
+                        duration_in_days: int, nft_token_account: str) -> str:
+        """Create a new subscription"""
+        try:
+            data = await self._request("POST", "/subscribe", {
+                "provider": provider,
+                "dataProvider": data_provider,
+                "recipient": recipient,
+                "durationInDays": duration_in_days,
+                "nftTokenAccount": nft_token_account
+            })
+        finally:
+            self._invalidate_subscriptions([data_provider])
+        return data["signature"]
+
+    async def renew(self, provider: dict, data_provider: str, new_recipient: str,
+                    new_end_time: int, quality_score: int, nft_token_account: str) -> str:
+        """Renew an existing subscription"""
+        try:
+            data = await self._request("POST", "/renew", {
+                "provider": provider,
+                "dataProvider": data_provider,
+                "newRecipient": new_recipient,
+                "newEndTime": new_end_time,
+                "qualityScore": quality_score,
+                "nftTokenAccount": nft_token_account
+            })
+        finally:
+            self._invalidate_subscriptions([data_provider])
+        return data["signature"]
+
+    async def cancel(self, provider: dict, data_provider: str, quality_score: int,
+                     nft_token_account: Optional[str] = None) -> str:
+        """Cancel a subscription"""
+        try:
+            data = await self._request("POST", "/cancel", {
+                "provider": provider,
+                "dataProvider": data_provider,
+                "qualityScore": quality_score,
+                "nftTokenAccount": nft_token_account
+            })
+        finally:
+            self._invalidate_subscriptions([data_provider])
+        return data["signature"]
+
+    async def get_provider_subscriptions(self, provider: dict, provider_address: str) -> List[Subscription]:
+        """Get all subscriptions for a provider"""
+        async def load():
+            data = await self._request(
+                "GET",
+                "/subscriptions/provider/{address}",
+                {"provider": provider},
+                address=provider_address
+            )
+            return [Subscription.from_json(sub) for sub in data["subscriptions"]]
+        return await self._cached(("provider", provider_address), load)
+
+    async def get_provider_subscriptions_batch(self, provider: dict,
+                                               provider_address: str) -> SubscriptionBatch:
+        """Get all subscriptions for a provider as columns (not cached)"""
+        data = await self._request(
+            "GET",
+            "/subscriptions/provider/{address}",
+            {"provider": provider},
+            address=provider_address
+        )
+        return SubscriptionBatch.from_json(data["subscriptions"])
+
+    async def iter_provider_subscriptions(self, provider: dict, provider_address: str,
+                                          page_size: int = 100, cursor: int = 0,
+                                          limit: Optional[int] = None) -> AsyncIterator[Subscription]:
+        """Yield a provider's subscriptions as the server streams them"""
+        while cursor is not None:
+            async with self._get_session().get(
+                f"{self.base_url}/subscriptions/provider/{provider_address}/stream",
+                params=_stream_params(cursor, page_size, limit),
+                json={"provider": provider},
+                # A large listing may outlast the session's total timeout while
+                # the caller works through it, so only bound each read
+                timeout=aiohttp.ClientTimeout(
+                    total=None, connect=self.timeout, sock_read=self.timeout
+                )
+            ) as response:
+                response.raise_for_status()
+                cursor = None
+                async for line in response.content:
+                    if not line.strip():
+                        continue
+                    item = _parse_stream_line(line)
+                    if "nextCursor" in item:
+                        cursor = item["nextCursor"]
+                    else:
+                        yield Subscription.from_json(item)
+
+    async def watch_subscriptions(self, provider_address: str,
+                                  reconcile_interval: Optional[float] = None,
+                                  retry_interval: float = 1.0,
+                                  max_retry_interval: float = 30.0) -> AsyncIterator[SubscriptionEvent]:
+        """Yield added/renewed/updated/cancelled events for a provider's subscriptions"""
+        watcher = SubscriptionWatcher()
+        delay = retry_interval
+        while True:
+            try:
+                async with self._get_session().get(
+                    f"{self.base_url}/subscriptions/provider/{provider_address}/events",
+                    params=_watch_params(reconcile_interval),
+                    # The stream is open-ended, so only bound the gap between reads
+                    timeout=aiohttp.ClientTimeout(
+                        total=None, connect=self.timeout, sock_read=WATCH_READ_TIMEOUT
+                    )
+                ) as response:
+                    response.raise_for_status()
+                    parser = SSEParser()
+                    async for line in response.content:
+                        message = parser.feed(line.decode())
+                        if message is not None:
+                            delay = retry_interval
+                            for event in watcher.apply(*message):
+                                yield event
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+                    asyncio.TimeoutError) as e:
+                logger.info("Subscription watch disconnected, retrying in %.1fs: %s", delay, e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_retry_interval)
+
+    async def get_user_subscriptions(self, provider: dict, user_address: str) -> List[Subscription]:
+        """Get all subscriptions for a user"""
+        async def load():
+            data = await self._request(
+                "GET",
+                "/subscriptions/user/{address}",
+                {"provider": provider},
+                address=user_address
+            )
+            return [Subscription.from_json(sub) for sub in data["subscriptions"]]
+        return await self._cached(("user", user_address), load)
+
+    async def set_fee(self, provider: dict, fee: int) -> str:
+        """Set the data provider fee"""
+        data = await self._request("POST", "/fee", {
+            "provider": provider,
+            "fee": fee
+        })
+        return data["signature"]
+
+    async def batch(self, provider: dict, operations: List[Dict[str, Any]],
+                    concurrency: Optional[int] = None) -> List[BatchResult]:
+        """Run subscribe/renew/cancel/set_fee operations in a single request"""
+        payload = _batch_payload(provider, operations, concurrency)
+        try:
+            data = await self._request("POST", "/batch", payload)
+        finally:
+            self._invalidate_subscriptions(
+                [op.get("data_provider") for op in operations if op["type"] != "set_fee"]
+            )
+        return [BatchResult(**result) for result in data["results"]]
+
+    async def register_agent(self, provider: dict, name: str, description: str,
+                             restrict_subscriptions: bool, capabilities: List[str], fee: int) -> str:
+        """Register this wallet as an agent"""
+        data = await self._request("POST", "/agent", {
+            "provider": provider,
+            "name": name,
+            "description": description,
+            "restrict_subscriptions": restrict_subscriptions,
+            "capabilities": capabilities,
+            "fee": fee
+        })
+        return data["signature"]
+
+    async def edit_agent(self, provider: dict, name: str, description: str,
+                         restrict_subscriptions: bool, capabilities: List[str], fee: int) -> str:
+        """Edit the details of a registered agent"""
+        data = await self._request("PUT", "/agent", {
+            "provider": provider,
+            "name": name,
+            "description": description,
+            "restrict_subscriptions": restrict_subscriptions,
+            "capabilities": capabilities,
+            "fee": fee
+        })
+        return data["signature"]
+
+    async def request_subscription(self, provider: dict, data_provider: str) -> str:
+        """Request a subscription to a data provider that restricts subscriptions"""
+        data = await self._request("POST", "/subscribe/request", {
+            "provider": provider,
+            "dataProvider": data_provider
+        })
+        return data["signature"]
+
+    async def approve_subscription(self, provider: dict, subscriber_address: str,
+                                   request_index: int) -> str:
+        """Approve a pending subscription request"""
+        data = await self._request("POST", "/subscribe/approve", {
+            "provider": provider,
+            "subscriberAddress": subscriber_address,
+            "requestIndex": request_index
+        })
+        return data["signature"]
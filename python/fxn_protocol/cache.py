@@ -0,0 +1,98 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ttl seconds.
+
+    Entries older than ttl but younger than ttl + stale_ttl are returned as
+    STALE so the caller can serve them while it refreshes in the background.
+    """
+
+    def __init__(self, ttl: float, max_size: int = 1024, stale_ttl: float = 0):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._refreshing: Set[Hashable] = set()
+        # Bumped on every invalidation; loads started before an invalidation
+        # must not store their (possibly outdated) result
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: Hashable) -> Tuple[Optional[Any], str]:
+        """Return (value, FRESH | STALE | MISS) for key"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry[0]
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], FRESH
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self.stale_hits += 1
+                    return entry[1], STALE
+                del self._entries[key]
+            self.misses += 1
+            return None, MISS
+
+    def set(self, key: Hashable, value: Any, generation: int):
+        """Store value unless the cache was invalidated since generation"""
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, predicate=None):
+        """Drop entries whose key matches predicate, or every entry"""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            if predicate is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def start_refresh(self, key: Hashable) -> bool:
+        """Claim the background refresh of key; False if one is in flight"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def finish_refresh(self, key: Hashable):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries)
+            }
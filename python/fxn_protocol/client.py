@@ -1,99 +1,428 @@
-# python/fxn_protocol/client.py
+import json
+import logging
 import requests
-import subprocess
 import atexit
 import time
-from typing import Optional, List, Dict, Any
+import itertools
+import threading
+from requests.adapters import HTTPAdapter
+from typing import Optional, List, Dict, Any, Iterator
 from dataclasses import dataclass
 
+from . import sidecar
+from .cache import TTLCache, FRESH, STALE
+from .models import Subscription, SubscriptionBatch
+from .events import SSEParser, SubscriptionEvent, SubscriptionWatcher, WATCH_READ_TIMEOUT
+from .sidecar import StartupMetrics
+from .tracing import tracer
+
+logger = logging.getLogger(__name__)
+
 @dataclass
-class Subscription:
-    end_time: int
-    recipient: str
-    subscription_pda: str
-    status: str
+class BatchResult:
+    success: bool
+    signature: Optional[Any] = None
+    error: Optional[str] = None
+
+BATCH_OPERATIONS = ("subscribe", "renew", "cancel", "set_fee")
+
+def _batch_payload(provider: dict, operations: List[Dict[str, Any]],
+                   concurrency: Optional[int]) -> Dict[str, Any]:
+    # Operations use the method keyword names (data_provider, new_end_time, ...)
+    # plus a "type"; the server expects the camelCase names of the single routes
+    converted = []
+    for operation in operations:
+        if operation.get("type") not in BATCH_OPERATIONS:
+            raise ValueError(f"Unsupported batch operation type: {operation.get('type')}")
+        converted.append({
+            key if key == "type" else _camel_case(key): value
+            for key, value in operation.items()
+        })
+    payload = {"provider": provider, "operations": converted}
+    if concurrency is not None:
+        payload["concurrency"] = concurrency
+    return payload
+
+def _camel_case(name: str) -> str:
+    first, *rest = name.split("_")
+    return first + "".join(word.title() for word in rest)
+
+def _stream_params(cursor: int, page_size: int, limit: Optional[int]) -> Dict[str, int]:
+    params = {"cursor": cursor, "pageSize": page_size}
+    if limit is not None:
+        params["limit"] = limit
+    return params
+
+def _parse_stream_line(line: bytes) -> Dict[str, Any]:
+    item = json.loads(line)
+    if "error" in item:
+        raise RuntimeError(f"Subscription stream failed: {item['error']}")
+    return item
+
+def _watch_params(reconcile_interval: Optional[float]) -> Dict[str, float]:
+    return {} if reconcile_interval is None else {"reconcileInterval": reconcile_interval}
+
+def _invalidation_predicate(data_providers: List[str]):
+    # Writes change the data provider's subscriber list and the signing
+    # wallet's own list, whose address the client does not know
+    providers = set(data_providers)
+    return lambda key: key[0] == "user" or key[1] in providers
 
 class FXNClient:
-    def __init__(self, port: int = 3000, host: str = "localhost"):
-        self.base_url = f"http://{host}:{port}"
-        self._start_server(port)
-
-    def _start_server(self, port: int):
-        # Start the Node.js server
-        self.server_process = subprocess.Popen(
-            ["node", "server/dist/index.js"],
-            env={"PORT": str(port)}
+    def __init__(self, port: int = 3000, host: str = "localhost",
+                 pool_connections: int = 1, pool_maxsize: int = 10,
+                 pool_block: bool = False, timeout: Optional[float] = 30,
+                 start_server: bool = True, startup_timeout: float = 10,
+                 max_probe_interval: float = 0.25, shared: bool = False,
+                 sidecars: int = 1, cache_ttl: Optional[float] = None,
+                 cache_max_size: int = 1024, cache_stale_ttl: float = 0):
+        # With sidecars > 1 the client talks to servers on port, port + 1, ...
+        # and spreads calls across them round-robin
+        self.host = host
+        self.ports = [port + i for i in range(sidecars)]
+        self.base_urls = [f"http://{host}:{p}" for p in self.ports]
+        self.base_url = self.base_urls[0]
+        self._next_base_url = itertools.cycle(self.base_urls)
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.max_probe_interval = max_probe_interval
+        self.shared = shared
+        self.startup_metrics: Optional[StartupMetrics] = None
+        self.server_processes = []
+        self._acquired_ports: List[int] = []
+        # Subscription listings are cached only when cache_ttl is set
+        self.subscription_cache = (
+            TTLCache(cache_ttl, cache_max_size, cache_stale_ttl)
+            if cache_ttl is not None else None
+        )
+        self.session = self._create_session(
+            max(pool_connections, sidecars), pool_maxsize, pool_block
+        )
+        if start_server:
+            self._start_servers()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _create_session(self, pool_connections: int, pool_maxsize: int,
+                        pool_block: bool) -> requests.Session:
+        # One keep-alive session per client so calls reuse sidecar connections.
+        # pool_maxsize caps the open connections per host; with pool_block
+        # set, callers wait for a free connection instead of opening extras.
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _start_servers(self):
+        started = time.perf_counter()
+        attempts = 0
+        try:
+            if self.shared:
+                # Attach to servers already running for other clients or processes
+                for port in self.ports:
+                    attempts += sidecar.acquire(
+                        port, self.host, self.startup_timeout, self.max_probe_interval
+                    )
+                    self._acquired_ports.append(port)
+            else:
+                # Start the Node.js servers, then wait for all of them together
+                self.server_processes = [sidecar.launch_server(port) for port in self.ports]
+                atexit.register(self._stop_server)
+                for base_url, process in zip(self.base_urls, self.server_processes):
+                    attempts += sidecar.wait_until_ready(
+                        self.session, base_url, process,
+                        self.startup_timeout, self.max_probe_interval
+                    )
+        except ConnectionError:
+            self._stop_server()
+            raise
+        self.startup_metrics = StartupMetrics(
+            startup_seconds=time.perf_counter() - started,
+            probe_attempts=attempts
         )
-        # Give the server time to start
-        time.sleep(1)
-        atexit.register(self._stop_server)
 
     def _stop_server(self):
-        if hasattr(self, 'server_process'):
-            self.server_process.terminate()
+        for process in self.server_processes:
+            if process.poll() is None:
+                process.terminate()
+        while self._acquired_ports:
+            sidecar.release(self._acquired_ports.pop())
+
+    def close(self):
+        """Close pooled connections and stop or release this client's servers"""
+        self.session.close()
+        self._stop_server()
+
+    def _request(self, method: str, path: str, payload: Dict[str, Any],
+                 **path_params: str) -> Dict[str, Any]:
+        # Spans are named after the route template so every address shares
+        # one histogram; the address itself goes in a tag
+        base_url = next(self._next_base_url)
+        with tracer.span(f"{method} {path}", sidecar=base_url, **path_params) as span:
+            response = self.session.request(
+                method,
+                f"{base_url}{path.format(**path_params)}",
+                json=payload,
+                timeout=self.timeout
+            )
+            span.set_tag("status", response.status_code)
+            response.raise_for_status()
+            return response.json()
+
+    def _cached(self, key, load):
+        cache = self.subscription_cache
+        if cache is None:
+            return load()
+        value, state = cache.get(key)
+        if state == FRESH:
+            return list(value)
+        if state == STALE:
+            # Serve the stale listing and refresh it in the background
+            if cache.start_refresh(key):
+                threading.Thread(
+                    target=self._refresh, args=(key, load, cache.generation), daemon=True
+                ).start()
+            return list(value)
+        generation = cache.generation
+        value = load()
+        cache.set(key, value, generation)
+        return list(value)
+
+    def _refresh(self, key, load, generation: int):
+        try:
+            self.subscription_cache.set(key, load(), generation)
+        except Exception as e:
+            # Keep serving the stale entry; the next expired read retries
+            logger.warning("Background refresh of %s failed: %s", key, e)
+        finally:
+            self.subscription_cache.finish_refresh(key)
+
+    def _invalidate_subscriptions(self, data_providers: List[str]):
+        if self.subscription_cache is not None and data_providers:
+            self.subscription_cache.invalidate(_invalidation_predicate(data_providers))
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Hit/miss counters of the subscription cache"""
+        if self.subscription_cache is None:
+            return {}
+        return self.subscription_cache.stats()
 
     def subscribe(self, provider: dict, data_provider: str, recipient: str,
                  duration_in_days: int, nft_token_account: str) -> str:
         """Create a new subscription"""
-        response = requests.post(f"{self.base_url}/subscribe", json={
-            "provider": provider,
-            "dataProvider": data_provider,
-            "recipient": recipient,
-            "durationInDays": duration_in_days,
-            "nftTokenAccount": nft_token_account
-        })
-        response.raise_for_status()
-        return response.json()["signature"]
+        try:
+            return self._request("POST", "/subscribe", {
+                "provider": provider,
+                "dataProvider": data_provider,
+                "recipient": recipient,
+                "durationInDays": duration_in_days,
+                "nftTokenAccount": nft_token_account
+            })["signature"]
+        finally:
+            self._invalidate_subscriptions([data_provider])
 
     def renew(self, provider: dict, data_provider: str, new_recipient: str,
               new_end_time: int, quality_score: int, nft_token_account: str) -> str:
         """Renew an existing subscription"""
-        response = requests.post(f"{self.base_url}/renew", json={
-            "provider": provider,
-            "dataProvider": data_provider,
-            "newRecipient": new_recipient,
-            "newEndTime": new_end_time,
-            "qualityScore": quality_score,
-            "nftTokenAccount": nft_token_account
-        })
-        response.raise_for_status()
-        return response.json()["signature"]
+        try:
+            return self._request("POST", "/renew", {
+                "provider": provider,
+                "dataProvider": data_provider,
+                "newRecipient": new_recipient,
+                "newEndTime": new_end_time,
+                "qualityScore": quality_score,
+                "nftTokenAccount": nft_token_account
+            })["signature"]
+        finally:
+            self._invalidate_subscriptions([data_provider])
 
     def cancel(self, provider: dict, data_provider: str, quality_score: int,
                nft_token_account: Optional[str] = None) -> str:
         """Cancel a subscription"""
-        response = requests.post(f"{self.base_url}/cancel", json={
-            "provider": provider,
-            "dataProvider": data_provider,
-            "qualityScore": quality_score,
-            "nftTokenAccount": nft_token_account
-        })
-        response.raise_for_status()
-        return response.json()["signature"]
+        try:
+            return self._request("POST", "/cancel", {
+                "provider": provider,
+                "dataProvider": data_provider,
+                "qualityScore": quality_score,
+                "nftTokenAccount": nft_token_account
+            })["signature"]
+        finally:
+            self._invalidate_subscriptions([data_provider])
 
     def get_provider_subscriptions(self, provider: dict, provider_address: str) -> List[Subscription]:
         """Get all subscriptions for a provider"""
-        response = requests.get(
-            f"{self.base_url}/subscriptions/provider/{provider_address}",
-            json={"provider": provider}
+        def load():
+            data = self._request(
+                "GET",
+                "/subscriptions/provider/{address}",
+                {"provider": provider},
+                address=provider_address
+            )
+            return [Subscription.from_json(sub) for sub in data["subscriptions"]]
+        return self._cached(("provider", provider_address), load)
+
+    def get_provider_subscriptions_batch(self, provider: dict,
+                                         provider_address: str) -> SubscriptionBatch:
+        """Get all subscriptions for a provider as columns (not cached)"""
+        data = self._request(
+            "GET",
+            "/subscriptions/provider/{address}",
+            {"provider": provider},
+            address=provider_address
         )
-        response.raise_for_status()
-        return [Subscription(**sub) for sub in response.json()["subscriptions"]]
+        return SubscriptionBatch.from_json(data["subscriptions"])
+
+    def iter_provider_subscriptions(self, provider: dict, provider_address: str,
+                                    page_size: int = 100, cursor: int = 0,
+                                    limit: Optional[int] = None) -> Iterator[Subscription]:
+        """Yield a provider's subscriptions as the server streams them
+
+        The server reads subscriber accounts page_size at a time (max 100)
+        and writes each page as soon as it is fetched. With limit set, each
+        request covers at most limit subscribers and the generator follows
+        the returned cursor until the list is exhausted. Unlike
+        get_provider_subscriptions, results are in subscriber-list order
+        rather than sorted by end time, and are never cached.
+        """
+        while cursor is not None:
+            response = self.session.get(
+                f"{next(self._next_base_url)}/subscriptions/provider/{provider_address}/stream",
+                params=_stream_params(cursor, page_size, limit),
+                json={"provider": provider},
+                stream=True,
+                timeout=self.timeout
+            )
+            with response:
+                response.raise_for_status()
+                cursor = None
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    item = _parse_stream_line(line)
+                    if "nextCursor" in item:
+                        cursor = item["nextCursor"]
+                    else:
+                        yield Subscription.from_json(item)
+
+    def watch_subscriptions(self, provider_address: str,
+                            reconcile_interval: Optional[float] = None,
+                            retry_interval: float = 1.0,
+                            max_retry_interval: float = 30.0) -> Iterator[SubscriptionEvent]:
+        """Yield added/renewed/updated/cancelled events for a provider's subscriptions
+
+        The first events describe every current subscription as added; after
+        that only changes are yielded. Dropped connections are re-opened with
+        exponential backoff and the new snapshot is diffed against what was
+        already seen. reconcile_interval sets how often (in seconds) the
+        server re-lists subscriptions to catch expiries.
+        """
+        watcher = SubscriptionWatcher()
+        delay = retry_interval
+        while True:
+            try:
+                response = self.session.get(
+                    f"{next(self._next_base_url)}/subscriptions/provider/{provider_address}/events",
+                    params=_watch_params(reconcile_interval),
+                    stream=True,
+                    timeout=(self.timeout, WATCH_READ_TIMEOUT)
+                )
+                with response:
+                    response.raise_for_status()
+                    parser = SSEParser()
+                    for line in response.iter_lines(decode_unicode=True):
+                        message = parser.feed(line)
+                        if message is not None:
+                            delay = retry_interval
+                            yield from watcher.apply(*message)
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                logger.info("Subscription watch disconnected, retrying in %.1fs: %s", delay, e)
+            time.sleep(delay)
+            delay = min(delay * 2, max_retry_interval)
 
     def get_user_subscriptions(self, provider: dict, user_address: str) -> List[Subscription]:
         """Get all subscriptions for a user"""
-        response = requests.get(
-            f"{self.base_url}/subscriptions/user/{user_address}",
-            json={"provider": provider}
-        )
-        response.raise_for_status()
-        return [Subscription(**sub) for sub in response.json()["subscriptions"]]
+        def load():
+            data = self._request(
+                "GET",
+                "/subscriptions/user/{address}",
+                {"provider": provider},
+                address=user_address
+            )
+            return [Subscription.from_json(sub) for sub in data["subscriptions"]]
+        return self._cached(("user", user_address), load)
 
     def set_fee(self, provider: dict, fee: int) -> str:
         """Set the data provider fee"""
-        response = requests.post(f"{self.base_url}/fee", json={
+        return self._request("POST", "/fee", {
             "provider": provider,
             "fee": fee
-        })
-        response.raise_for_status()
-        return response.json()["signature"]
+        })["signature"]
+
+    def batch(self, provider: dict, operations: List[Dict[str, Any]],
+              concurrency: Optional[int] = None) -> List[BatchResult]:
+        """Run subscribe/renew/cancel/set_fee operations in a single request
+
+        Each operation is a dict with a "type" and the keyword arguments of
+        the matching method, e.g. {"type": "cancel", "data_provider": ...,
+        "quality_score": 90}. The server runs up to `concurrency` of them at
+        once and returns one result per operation, in order.
+        """
+        payload = _batch_payload(provider, operations, concurrency)
+        try:
+            data = self._request("POST", "/batch", payload)
+        finally:
+            self._invalidate_subscriptions(
+                [op.get("data_provider") for op in operations if op["type"] != "set_fee"]
+            )
+        return [BatchResult(**result) for result in data["results"]]
+
+    def register_agent(self, provider: dict, name: str, description: str,
+                       restrict_subscriptions: bool, capabilities: List[str], fee: int) -> str:
+        """Register this wallet as an agent"""
+        return self._request("POST", "/agent", {
+            "provider": provider,
+            "name": name,
+            "description": description,
+            "restrict_subscriptions": restrict_subscriptions,
+            "capabilities": capabilities,
+            "fee": fee
+        })["signature"]
+
+    def edit_agent(self, provider: dict, name: str, description: str,
+                   restrict_subscriptions: bool, capabilities: List[str], fee: int) -> str:
+        """Edit the details of a registered agent"""
+        return self._request("PUT", "/agent", {
+            "provider": provider,
+            "name": name,
+            "description": description,
+            "restrict_subscriptions": restrict_subscriptions,
+            "capabilities": capabilities,
+            "fee": fee
+        })["signature"]
+
+    def request_subscription(self, provider: dict, data_provider: str) -> str:
+        """Request a subscription to a data provider that restricts subscriptions"""
+        return self._request("POST", "/subscribe/request", {
+            "provider": provider,
+            "dataProvider": data_provider
+        })["signature"]
+
+    def approve_subscription(self, provider: dict, subscriber_address: str,
+                             request_index: int) -> str:
+        """Approve a pending subscription request"""
+        return self._request("POST", "/subscribe/approve", {
+            "provider": provider,
+            "subscriberAddress": subscriber_address,
+            "requestIndex": request_index
+        })["signature"]
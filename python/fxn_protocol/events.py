@@ -0,0 +1,100 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .models import Subscription
+
+ADDED = "added"
+RENEWED = "renewed"
+UPDATED = "updated"
+CANCELLED = "cancelled"
+
+# The server sends a comment line every 15s, so a read this long without any
+# data means the connection is dead
+WATCH_READ_TIMEOUT = 60
+
+@dataclass
+class SubscriptionEvent:
+    type: str
+    subscription: Subscription
+
+def _change_type(before: Optional[Subscription], after: Optional[Subscription]) -> Optional[str]:
+    if before is None:
+        return ADDED
+    if after is None:
+        return CANCELLED
+    if before == after:
+        return None
+    return RENEWED if after.end_time > before.end_time else UPDATED
+
+def diff_subscriptions(known: Dict[str, Subscription],
+                       current: Iterable[Subscription]) -> List[SubscriptionEvent]:
+    """Events that turn known (keyed by subscription PDA) into current"""
+    current = {sub.subscription_pda: sub for sub in current}
+    events = []
+    for pda in list(known) + [pda for pda in current if pda not in known]:
+        before, after = known.get(pda), current.get(pda)
+        change = _change_type(before, after)
+        if change is not None:
+            events.append(SubscriptionEvent(change, after or before))
+    return events
+
+class SSEParser:
+    """Incremental parser for a text/event-stream body, fed one line at a time"""
+
+    def __init__(self):
+        self.event = "message"
+        self.data: List[str] = []
+
+    def feed(self, line: str) -> Optional[Tuple[str, str]]:
+        """Return (event, data) when line completes an event"""
+        line = line.rstrip("\r\n")
+        if not line:
+            if not self.data:
+                return None
+            message = (self.event, "\n".join(self.data))
+            self.event, self.data = "message", []
+            return message
+        if line.startswith(":"):
+            return None
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "event":
+            self.event = value
+        elif field == "data":
+            self.data.append(value)
+        return None
+
+class SubscriptionWatcher:
+    """Tracks a provider's subscriptions from /events and yields only deltas.
+
+    After a reconnect the server sends a fresh snapshot, which is diffed
+    against what was already seen so nothing is reported twice.
+    """
+
+    def __init__(self):
+        self.known: Dict[str, Subscription] = {}
+
+    def apply(self, event: str, data: str) -> List[SubscriptionEvent]:
+        payload: Any = json.loads(data)
+        if event == "snapshot":
+            events = diff_subscriptions(
+                self.known, (Subscription.from_json(row) for row in payload)
+            )
+        elif event == "change":
+            subscription = Subscription.from_json(payload["subscription"])
+            after = None if payload["type"] == CANCELLED else subscription
+            change = _change_type(self.known.get(subscription.subscription_pda), after)
+            if change is None or (after is None and subscription.subscription_pda not in self.known):
+                return []
+            events = [SubscriptionEvent(change, subscription)]
+        else:
+            # "error" events are transient; the server retries on its next sync
+            return []
+        for item in events:
+            if item.type == CANCELLED:
+                self.known.pop(item.subscription.subscription_pda, None)
+            else:
+                self.known[item.subscription.subscription_pda] = item.subscription
+        return events
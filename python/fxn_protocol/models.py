@@ -0,0 +1,210 @@
+import sys
+from array import array
+from itertools import compress
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Filters fall back to comparing rows in Python
+    np = None
+
+def _end_time(value: Any) -> int:
+    # The server serialises BN end times as hex strings
+    if isinstance(value, str):
+        return int(value, 16)
+    return int(value)
+
+def _decode_row(row: Dict[str, Any]) -> Tuple[int, str, str, str]:
+    # Returns (end_time, recipient, subscription_pda, status)
+    if "subscription_pda" in row:
+        return _end_time(row["end_time"]), row["recipient"], row["subscription_pda"], row["status"]
+    details = row.get("subscription")
+    if isinstance(details, dict):
+        # Provider listing: {subscriber, subscriptionPDA, subscription: {...}, status}
+        return _end_time(details["endTime"]), details["recipient"], row["subscriptionPDA"], row["status"]
+    # User listing: {dataProvider, subscription, endTime, recipient, status}
+    return _end_time(row["endTime"]), row["recipient"], details, row["status"]
+
+@dataclass
+class Subscription:
+    __slots__ = ("end_time", "recipient", "subscription_pda", "status")
+    end_time: int
+    recipient: str
+    subscription_pda: str
+    status: str
+
+    @classmethod
+    def from_json(cls, row: Dict[str, Any]) -> "Subscription":
+        """Build a Subscription from a row of a subscription listing"""
+        return cls(*_decode_row(row))
+
+class SubscriptionBatch:
+    """Column-oriented subscription listing.
+
+    End times live in one signed 64-bit array and statuses are stored as
+    one-byte codes into status_names, so large listings decode faster and
+    take a fraction of the memory of Subscription objects. Filters return a
+    SubscriptionRows view of the matching row indices rather than copying
+    columns; with numpy installed they compare whole columns at once.
+    """
+    __slots__ = ("end_times", "recipients", "subscription_pdas", "status_codes", "status_names")
+
+    def __init__(self, end_times: Optional[array] = None,
+                 recipients: Optional[List[str]] = None,
+                 subscription_pdas: Optional[List[str]] = None,
+                 statuses: Optional[List[str]] = None):
+        self.end_times = end_times if end_times is not None else array("q")
+        self.recipients = recipients if recipients is not None else []
+        self.subscription_pdas = subscription_pdas if subscription_pdas is not None else []
+        self.status_codes = array("B")
+        self.status_names: List[str] = []
+        if statuses:
+            codes = self._status_codes()
+            self.status_codes.extend(codes[status] for status in statuses)
+
+    def _status_codes(self) -> Dict[str, int]:
+        # Status name -> code; a listing only ever has a handful of statuses
+        return {name: code for code, name in enumerate(self.status_names)}
+
+    def _status_code(self, codes: Dict[str, int], status: str) -> int:
+        code = codes.get(status)
+        if code is None:
+            code = codes[status] = len(self.status_names)
+            self.status_names.append(sys.intern(status))
+        return code
+
+    @classmethod
+    def from_json(cls, rows: Iterable[Dict[str, Any]]) -> "SubscriptionBatch":
+        """Build the columns from listing rows in one pass"""
+        batch = cls()
+        end_times = batch.end_times.append
+        recipients = batch.recipients.append
+        subscription_pdas = batch.subscription_pdas.append
+        status_codes = batch.status_codes.append
+        codes: Dict[str, int] = {}
+        for row in rows:
+            end_time, recipient, subscription_pda, status = _decode_row(row)
+            end_times(end_time)
+            recipients(recipient)
+            subscription_pdas(subscription_pda)
+            code = codes.get(status)
+            if code is None:
+                code = batch._status_code(codes, status)
+            status_codes(code)
+        return batch
+
+    @property
+    def statuses(self) -> List[str]:
+        names = self.status_names
+        return [names[code] for code in self.status_codes]
+
+    def __len__(self) -> int:
+        return len(self.end_times)
+
+    def __getitem__(self, index: int) -> Subscription:
+        return Subscription(
+            self.end_times[index],
+            self.recipients[index],
+            self.subscription_pdas[index],
+            self.status_names[self.status_codes[index]]
+        )
+
+    def __iter__(self) -> Iterator[Subscription]:
+        return map(Subscription, self.end_times, self.recipients,
+                   self.subscription_pdas, self.statuses)
+
+    def take(self, indices: Iterable[int]) -> "SubscriptionBatch":
+        """Return a new batch with the rows at indices"""
+        indices = list(indices)
+        batch = SubscriptionBatch(
+            array("q", [self.end_times[i] for i in indices]),
+            [self.recipients[i] for i in indices],
+            [self.subscription_pdas[i] for i in indices]
+        )
+        batch.status_codes = array("B", [self.status_codes[i] for i in indices])
+        batch.status_names = list(self.status_names)
+        return batch
+
+    def where(self, status: Optional[str] = None, ends_before: Optional[int] = None,
+              ends_after: Optional[int] = None) -> "SubscriptionRows":
+        """Rows matching every given condition; end times are unix seconds"""
+        code = None
+        if status is not None:
+            if status not in self.status_names:
+                return SubscriptionRows(self, array("q"))
+            code = self.status_names.index(status)
+        if np is not None:
+            return SubscriptionRows(self, self._where_numpy(code, ends_before, ends_after))
+        upper = ends_before if ends_before is not None else sys.maxsize
+        lower = ends_after if ends_after is not None else -sys.maxsize - 1
+        if code is None:
+            mask = [lower < end_time < upper for end_time in self.end_times]
+        else:
+            mask = [
+                lower < end_time < upper and row_code == code
+                for end_time, row_code in zip(self.end_times, self.status_codes)
+            ]
+        return SubscriptionRows(self, array("q", compress(range(len(mask)), mask)))
+
+    def _where_numpy(self, code: Optional[int], ends_before: Optional[int],
+                     ends_after: Optional[int]) -> array:
+        # frombuffer shares memory with the array columns, nothing is copied
+        mask = np.ones(len(self), dtype=bool)
+        if len(self):
+            end_times = np.frombuffer(self.end_times, dtype=np.int64)
+            if ends_before is not None:
+                mask &= end_times < ends_before
+            if ends_after is not None:
+                mask &= end_times > ends_after
+            if code is not None:
+                mask &= np.frombuffer(self.status_codes, dtype=np.uint8) == code
+        indices = array("q")
+        indices.frombytes(np.flatnonzero(mask).astype(np.int64).tobytes())
+        return indices
+
+    def active(self) -> "SubscriptionRows":
+        return self.where(status="active")
+
+    def active_expiring_before(self, timestamp: int) -> "SubscriptionRows":
+        """Active subscriptions that end before timestamp"""
+        return self.where(status="active", ends_before=timestamp)
+
+class SubscriptionRows:
+    """Rows of a SubscriptionBatch picked by a filter.
+
+    Only the row indices are stored; values are read from the batch when
+    they are used. take() copies the rows into a batch of their own.
+    """
+    __slots__ = ("batch", "indices")
+
+    def __init__(self, batch: SubscriptionBatch, indices: array):
+        self.batch = batch
+        self.indices = indices
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, index: int) -> Subscription:
+        return self.batch[self.indices[index]]
+
+    def __iter__(self) -> Iterator[Subscription]:
+        return map(self.batch.__getitem__, self.indices)
+
+    @property
+    def end_times(self) -> List[int]:
+        end_times = self.batch.end_times
+        return [end_times[i] for i in self.indices]
+
+    @property
+    def recipients(self) -> List[str]:
+        recipients = self.batch.recipients
+        return [recipients[i] for i in self.indices]
+
+    @property
+    def subscription_pdas(self) -> List[str]:
+        subscription_pdas = self.batch.subscription_pdas
+        return [subscription_pdas[i] for i in self.indices]
+
+    def take(self) -> SubscriptionBatch:
+        return self.batch.take(self.indices)
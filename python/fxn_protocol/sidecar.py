@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import atexit
+import signal
+import tempfile
+import threading
+import subprocess
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional, Dict, Any
+
+import requests
+
+try:
+    import fcntl
+except ImportError:  # Windows: the lockfile is still used, just without flock
+    fcntl = None
+
+SERVER_COMMAND = ["node", "server/dist/index.js"]
+
+@dataclass
+class StartupMetrics:
+    startup_seconds: float
+    probe_attempts: int
+
+def launch_server(port: int) -> subprocess.Popen:
+    """Spawn a Node.js FXN server listening on port"""
+    return subprocess.Popen(SERVER_COMMAND, env={"PORT": str(port)})
+
+def wait_until_ready(session: requests.Session, base_url: str,
+                     process: Optional[subprocess.Popen],
+                     startup_timeout: float, max_probe_interval: float) -> int:
+    """Poll /health until the server answers and return the number of probes.
+
+    Backs off exponentially up to max_probe_interval. Any HTTP response means
+    the server is accepting connections. Raises ConnectionError if the process
+    exits or startup_timeout elapses first.
+    """
+    started = time.perf_counter()
+    interval = 0.005
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            session.get(f"{base_url}/health", timeout=max_probe_interval)
+            return attempts
+        except requests.exceptions.RequestException:
+            pass
+        if process is not None and process.poll() is not None:
+            raise ConnectionError(
+                f"FXN server exited with code {process.returncode} during startup"
+            )
+        if time.perf_counter() - started >= startup_timeout:
+            raise ConnectionError(
+                f"FXN server not ready at {base_url} after {startup_timeout}s"
+            )
+        time.sleep(interval)
+        interval = min(interval * 2, max_probe_interval)
+
+@dataclass
+class SharedSidecar:
+    port: int
+    pid: Optional[int]          # None when attached to a server nobody registered
+    probe_attempts: int
+    process: Optional[subprocess.Popen] = None  # Set when this process launched it
+    refs: int = 1
+
+# Servers this process holds, reference counted across FXNClient instances.
+# Other processes are tracked in a per-port lockfile listing holder pids, so
+# the last holder on the machine terminates the server.
+_shared: Dict[int, SharedSidecar] = {}
+_shared_lock = threading.Lock()
+_atexit_registered = False
+
+def _state_path(port: int) -> str:
+    return os.path.join(tempfile.gettempdir(), f"fxn-sidecar-{port}.json")
+
+@contextmanager
+def _locked_state(port: int):
+    with open(_state_path(port) + ".lock", "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _read_state(port: int) -> Dict[str, Any]:
+    try:
+        with open(_state_path(port)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_state(port: int, state: Dict[str, Any]):
+    path = _state_path(port)
+    if not state.get("holders"):
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def acquire(port: int, host: str = "localhost", startup_timeout: float = 10,
+            max_probe_interval: float = 0.25) -> int:
+    """Attach to the shared server on port, starting it if none is running.
+
+    Returns the number of readiness probes made, 0 if already held here.
+    """
+    global _atexit_registered
+    with _shared_lock:
+        sidecar = _shared.get(port)
+        if sidecar is not None:
+            sidecar.refs += 1
+            return 0
+
+        base_url = f"http://{host}:{port}"
+        with _locked_state(port), requests.Session() as session:
+            state = _read_state(port)
+            holders = [pid for pid in state.get("holders", []) if _pid_alive(pid)]
+            server_pid = state.get("pid")
+            process = None
+            if server_pid is None or not _pid_alive(server_pid):
+                # Nothing registered: reuse a server someone started by hand,
+                # otherwise launch one and record it for other processes
+                try:
+                    session.get(f"{base_url}/health", timeout=max_probe_interval)
+                    server_pid = None
+                except requests.exceptions.RequestException:
+                    process = launch_server(port)
+                    server_pid = process.pid
+                holders = []
+            try:
+                attempts = wait_until_ready(
+                    session, base_url, process, startup_timeout, max_probe_interval
+                )
+            except ConnectionError:
+                if process is not None:
+                    process.terminate()
+                raise
+            holders.append(os.getpid())
+            _write_state(port, {"pid": server_pid, "holders": holders})
+
+        sidecar = SharedSidecar(
+            port=port,
+            pid=server_pid,
+            probe_attempts=attempts,
+            process=process
+        )
+        _shared[port] = sidecar
+        if not _atexit_registered:
+            atexit.register(_release_all)
+            _atexit_registered = True
+        return attempts
+
+def release(port: int):
+    """Drop one reference; the last holder across processes stops the server"""
+    with _shared_lock:
+        sidecar = _shared.get(port)
+        if sidecar is None:
+            return
+        sidecar.refs -= 1
+        if sidecar.refs > 0:
+            return
+        del _shared[port]
+
+        with _locked_state(port):
+            state = _read_state(port)
+            holders = [
+                pid for pid in state.get("holders", [])
+                if pid != os.getpid() and _pid_alive(pid)
+            ]
+            server_pid = state.get("pid")
+            if not holders and server_pid is not None and _pid_alive(server_pid):
+                if sidecar.process is not None:
+                    sidecar.process.terminate()
+                else:
+                    os.kill(server_pid, signal.SIGTERM)
+            _write_state(port, {"pid": server_pid, "holders": holders})
+
+def _release_all():
+    for port in list(_shared):
+        _shared[port].refs = 1
+        release(port)
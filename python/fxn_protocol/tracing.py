@@ -0,0 +1,232 @@
+import os
+import time
+import bisect
+import logging
+import itertools
+import threading
+from collections import deque
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+QUANTILES = (0.5, 0.95, 0.99)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("fxn_current_span", default=None)
+
+class Histogram:
+    """Fixed-bucket latency histogram with estimated quantiles"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate by linear interpolation within the bucket holding rank q"""
+        if not self.count:
+            return 0.0
+        return min(max(self._interpolate(q), self.min), self.max)
+
+    def _interpolate(self, q: float) -> float:
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    # Overflow bucket has no upper bound
+                    return lower
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+class Span:
+    """One timed operation; use as a context manager"""
+    __slots__ = ("tracer", "name", "span_id", "parent_id", "trace_id", "tags",
+                 "start", "end", "error", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, tags: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.tags = tags
+        self.span_id = next(tracer._ids)
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.error: Optional[str] = None
+        self._token = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.end is None else self.end - self.start
+
+    def set_tag(self, key: str, value: Any) -> None:
+        self.tags[key] = value
+
+    def finish(self) -> None:
+        if self.end is None:
+            self.end = time.perf_counter()
+            self.tracer._record(self)
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        _current_span.reset(self._token)
+        self.finish()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "trace_id": self.trace_id,
+            "duration": self.duration,
+            "error": self.error,
+            "tags": dict(self.tags)
+        }
+
+class _NoopSpan:
+    """Returned while tracing is disabled so traced code needs no checks"""
+    __slots__ = ()
+
+    def set_tag(self, key: str, value: Any) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class Tracer:
+    """Collects spans and per-name latency histograms.
+
+    Disabled by default: span() then returns a shared no-op span, so traced
+    code costs one attribute check. Parent ids follow the context, so spans
+    nest across awaits in the same task and across calls in the same thread.
+    """
+
+    def __init__(self, enabled: bool = False, buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+                 max_spans: int = 1000, prefix: str = "fxn"):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.prefix = prefix
+        self.histograms: Dict[str, Histogram] = {}
+        self.errors: Dict[str, int] = {}
+        # Most recent finished spans, for debugging and tests
+        self.spans: Deque[Span] = deque(maxlen=max_spans)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **tags: Any):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, tags)
+
+    def _record(self, span: Span) -> None:
+        duration = span.end - span.start
+        with self._lock:
+            histogram = self.histograms.get(span.name)
+            if histogram is None:
+                histogram = self.histograms[span.name] = Histogram(self.buckets)
+            histogram.observe(duration)
+            if span.error is not None:
+                self.errors[span.name] = self.errors.get(span.name, 0) + 1
+            self.spans.append(span)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("span %s %.2fms id=%s parent=%s tags=%s error=%s", span.name,
+                         duration * 1000, span.span_id, span.parent_id, span.tags, span.error)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.errors.clear()
+            self.spans.clear()
+
+    def percentiles(self) -> Dict[str, Dict[str, float]]:
+        """p50/p95/p99 (seconds), count and errors for each span name"""
+        with self._lock:
+            return {
+                name: {
+                    **{f"p{int(q * 100)}": histogram.quantile(q) for q in QUANTILES},
+                    "count": histogram.count,
+                    "errors": self.errors.get(name, 0)
+                }
+                for name, histogram in self.histograms.items()
+            }
+
+    def prometheus(self) -> str:
+        """Span latencies in the Prometheus text exposition format"""
+        metric = f"{self.prefix}_span_duration_seconds"
+        errors_metric = f"{self.prefix}_span_errors_total"
+        lines = [f"# HELP {metric} Duration of traced operations.", f"# TYPE {metric} summary"]
+        with self._lock:
+            names = sorted(self.histograms)
+            for name in names:
+                histogram = self.histograms[name]
+                name = _label(name)
+                for q in QUANTILES:
+                    lines.append(f'{metric}{{span="{name}",quantile="{q}"}} {histogram.quantile(q):.6f}')
+                lines.append(f'{metric}_sum{{span="{name}"}} {histogram.sum:.6f}')
+                lines.append(f'{metric}_count{{span="{name}"}} {histogram.count}')
+            lines.append(f"# HELP {errors_metric} Traced operations that raised.")
+            lines.append(f"# TYPE {errors_metric} counter")
+            for name in names:
+                lines.append(f'{errors_metric}{{span="{_label(name)}"}} {self.errors.get(name, 0)}')
+        return "\n".join(lines) + "\n"
+
+def _label(value: str) -> str:
+    """Escape a Prometheus label value"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def start_metrics_server(tracer: "Tracer", port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve tracer.prometheus() at /metrics from a daemon thread"""
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = tracer.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug("metrics: " + format, *args)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="fxn-metrics", daemon=True).start()
+    return server
+
+# Shared tracer; enable with FXN_TRACING=1 or tracer.enabled = True
+tracer = Tracer(enabled=os.getenv("FXN_TRACING", "").lower() in ("1", "true", "yes"))
@@ -0,0 +1,31 @@
+# tests/test_batch.py
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fxn_protocol.client import _batch_payload
+
+
+def test_batch_payload_uses_route_field_names():
+    """Batch operations are sent with the camelCase names of the single routes"""
+    payload = _batch_payload({"wallet": {}}, [
+        {"type": "renew", "data_provider": "Provider1", "new_recipient": "http://a",
+         "new_end_time": 10, "quality_score": 90, "nft_token_account": "Nft1"},
+        {"type": "set_fee", "fee": 5},
+    ], concurrency=4)
+
+    assert payload == {
+        "provider": {"wallet": {}},
+        "operations": [
+            {"type": "renew", "dataProvider": "Provider1", "newRecipient": "http://a",
+             "newEndTime": 10, "qualityScore": 90, "nftTokenAccount": "Nft1"},
+            {"type": "set_fee", "fee": 5},
+        ],
+        "concurrency": 4
+    }
+    assert "concurrency" not in _batch_payload({}, [], concurrency=None)
+    with pytest.raises(ValueError):
+        _batch_payload({}, [{"type": "register_agent"}], concurrency=None)
@@ -0,0 +1,152 @@
+# tests/test_cache.py
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fxn_protocol import AsyncFXNClient, FXNClient
+from fxn_protocol.cache import FRESH, MISS, STALE, TTLCache
+from benchmarks.stub_server import StubHandler, StubServer
+
+PROVIDER = {"connection": {}, "wallet": {}}
+ADDRESS = "Provider1111111111111111111111111111111111"
+
+
+class ListingHandler(StubHandler):
+    """Serves listings whose recipient names the request that loaded them.
+
+    While the class's gate is cleared, listing requests wait for it.
+    """
+    lock = threading.Lock()
+    listings = 0
+    gate = threading.Event()
+
+    def do_GET(self):
+        self._read_body()
+        with ListingHandler.lock:
+            ListingHandler.listings += 1
+            number = ListingHandler.listings
+        ListingHandler.gate.wait(5)
+        self._send_json({"success": True, "subscriptions": [{
+            "subscriber": "Subscriber1",
+            "subscriptionPDA": "Pda1",
+            "subscription": {"endTime": "ffffffff", "recipient": f"http://load-{number}"},
+            "status": "active"
+        }]})
+
+
+@pytest.fixture
+def server():
+    ListingHandler.listings = 0
+    ListingHandler.gate.set()
+    with StubServer(handler=ListingHandler) as stub:
+        yield stub
+    ListingHandler.gate.set()
+
+
+def wait_for_listings(count):
+    for _ in range(500):
+        if ListingHandler.listings >= count:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"expected {count} listing requests, saw {ListingHandler.listings}")
+
+
+def test_lru_eviction_and_expiry():
+    """The least recently used entry goes first and entries age from fresh to stale to missing"""
+    cache = TTLCache(ttl=0.05, max_size=2, stale_ttl=0.05)
+    cache.set("a", 1, cache.generation)
+    cache.set("b", 2, cache.generation)
+    assert cache.get("a") == (1, FRESH)
+    cache.set("c", 3, cache.generation)
+    assert cache.get("b") == (None, MISS)
+    assert cache.get("a") == (1, FRESH)
+    assert cache.stats()["evictions"] == 1
+
+    time.sleep(0.06)
+    assert cache.get("a") == (1, STALE)
+    time.sleep(0.05)
+    assert cache.get("a") == (None, MISS)
+
+
+def test_set_after_invalidation_is_dropped():
+    """A load started before an invalidation does not store its result"""
+    cache = TTLCache(ttl=60)
+    generation = cache.generation
+    cache.invalidate(lambda key: key == "a")
+    cache.set("a", "outdated", generation)
+    assert cache.get("a") == (None, MISS)
+
+
+def test_write_during_listing_load_is_not_cached_over(server):
+    """A subscribe that lands while a listing is loading invalidates that load's result"""
+    client = FXNClient(port=server.port, host="127.0.0.1", start_server=False, cache_ttl=60)
+    ListingHandler.gate.clear()
+    results = []
+    reader = threading.Thread(
+        target=lambda: results.append(client.get_provider_subscriptions(PROVIDER, ADDRESS))
+    )
+    reader.start()
+    wait_for_listings(1)
+
+    client.subscribe(PROVIDER, ADDRESS, "http://subscriber", 30, "Nft1")
+    ListingHandler.gate.set()
+    reader.join(5)
+
+    # The in-flight caller still gets its answer, but it is not cached
+    assert results[0][0].recipient == "http://load-1"
+    assert client.get_provider_subscriptions(PROVIDER, ADDRESS)[0].recipient == "http://load-2"
+    assert client.get_provider_subscriptions(PROVIDER, ADDRESS)[0].recipient == "http://load-2"
+    assert ListingHandler.listings == 2
+    client.close()
+
+
+def test_stale_listing_is_served_while_one_refresh_runs(server):
+    """Expired listings are returned at once and refreshed by a single background load"""
+    client = FXNClient(port=server.port, host="127.0.0.1", start_server=False,
+                       cache_ttl=0.05, cache_stale_ttl=60)
+    assert client.get_provider_subscriptions(PROVIDER, ADDRESS)[0].recipient == "http://load-1"
+    time.sleep(0.06)
+
+    ListingHandler.gate.clear()
+    for _ in range(5):
+        started = time.perf_counter()
+        assert client.get_provider_subscriptions(PROVIDER, ADDRESS)[0].recipient == "http://load-1"
+        assert time.perf_counter() - started < 0.5
+    wait_for_listings(2)
+    ListingHandler.gate.set()
+
+    for _ in range(100):
+        if client.get_provider_subscriptions(PROVIDER, ADDRESS)[0].recipient == "http://load-2":
+            break
+        time.sleep(0.01)
+    assert client.get_provider_subscriptions(PROVIDER, ADDRESS)[0].recipient == "http://load-2"
+    assert ListingHandler.listings == 2
+    assert client.cache_stats()["stale_hits"] >= 5
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_async_stale_listing_refreshes_once(server):
+    """The async client also serves stale listings behind one background refresh"""
+    async with AsyncFXNClient(port=server.port, host="127.0.0.1",
+                              cache_ttl=0.05, cache_stale_ttl=60) as client:
+        first = await client.get_provider_subscriptions(PROVIDER, ADDRESS)
+        assert first[0].recipient == "http://load-1"
+        time.sleep(0.06)
+
+        for _ in range(5):
+            stale = await client.get_provider_subscriptions(PROVIDER, ADDRESS)
+            assert stale[0].recipient == "http://load-1"
+        assert len(client._refresh_tasks) == 1
+        for task in list(client._refresh_tasks):
+            await task
+
+        fresh = await client.get_provider_subscriptions(PROVIDER, ADDRESS)
+        assert fresh[0].recipient == "http://load-2"
+        assert ListingHandler.listings == 2
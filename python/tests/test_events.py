@@ -0,0 +1,96 @@
+# tests/test_events.py
+import itertools
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fxn_protocol import FXNClient
+from fxn_protocol.events import SSEParser, SubscriptionWatcher
+from benchmarks.stub_server import StubHandler, StubServer
+
+
+def row(pda, end_time, recipient="http://subscriber"):
+    return {
+        "subscriber": f"Subscriber-{pda}",
+        "subscriptionPDA": pda,
+        "subscription": {"endTime": format(end_time, "x"), "recipient": recipient},
+        "status": "active"
+    }
+
+
+def changes(events):
+    return [(event.type, event.subscription.subscription_pda) for event in events]
+
+
+def test_sse_parser_handles_comments_and_multiline_data():
+    """Comments are skipped, data lines are joined and the event name resets after each event"""
+    parser = SSEParser()
+    lines = [": keep-alive", "event: snapshot", "data: [1,", "data: 2]", "", "data: {}", ""]
+    messages = [message for message in map(parser.feed, lines) if message is not None]
+    assert messages == [("snapshot", "[1,\n2]"), ("message", "{}")]
+
+
+def test_watcher_diffs_a_reconnect_snapshot():
+    """A snapshot after a reconnect reports only what changed while disconnected"""
+    watcher = SubscriptionWatcher()
+    assert changes(watcher.apply("snapshot", json.dumps([row("A", 100), row("B", 100)]))) == [
+        ("added", "A"), ("added", "B")
+    ]
+    assert watcher.apply("snapshot", json.dumps([row("A", 100), row("B", 100)])) == []
+
+    events = watcher.apply("snapshot", json.dumps([row("A", 200), row("B", 100, "http://moved"), row("C", 100)]))
+    assert changes(events) == [("renewed", "A"), ("updated", "B"), ("added", "C")]
+
+    assert changes(watcher.apply("snapshot", json.dumps([row("C", 100)]))) == [
+        ("cancelled", "A"), ("cancelled", "B")
+    ]
+    assert set(watcher.known) == {"C"}
+
+
+def test_watcher_ignores_repeated_and_unknown_changes():
+    """Change events that repeat known state, or cancel unknown subscriptions, yield nothing"""
+    watcher = SubscriptionWatcher()
+    watcher.apply("snapshot", json.dumps([row("A", 100)]))
+    assert watcher.apply("change", json.dumps({"type": "renewed", "subscription": row("A", 100)})) == []
+    assert watcher.apply("change", json.dumps({"type": "cancelled", "subscription": row("Z", 100)})) == []
+    assert watcher.apply("error", json.dumps({"error": "sync failed"})) == []
+    assert changes(watcher.apply("change", json.dumps({"type": "cancelled", "subscription": row("A", 100)}))) == [
+        ("cancelled", "A")
+    ]
+
+
+class ReconnectingEventsHandler(StubHandler):
+    """Sends one snapshot per connection and then closes it, as a dropped stream would"""
+    protocol_version = "HTTP/1.0"
+    snapshots = []
+    connections = itertools.count()
+
+    def do_GET(self):
+        self._read_body()
+        snapshot = self.snapshots[min(next(self.connections), len(self.snapshots) - 1)]
+        body = f": connected\n\nevent: snapshot\ndata: {json.dumps(snapshot)}\n\n".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def test_watch_subscriptions_resumes_after_reconnect():
+    """The client reconnects after the stream drops and reports only the differences"""
+    ReconnectingEventsHandler.snapshots = [
+        [row("A", 100), row("B", 100)],
+        [row("A", 200), row("C", 100)],
+    ]
+    ReconnectingEventsHandler.connections = itertools.count()
+    with StubServer(handler=ReconnectingEventsHandler) as server:
+        client = FXNClient(port=server.port, host="127.0.0.1", start_server=False)
+        watch = client.watch_subscriptions("Provider1", retry_interval=0.01)
+        events = list(itertools.islice(watch, 5))
+        watch.close()
+        client.close()
+
+    assert changes(events) == [
+        ("added", "A"), ("added", "B"), ("renewed", "A"), ("cancelled", "B"), ("added", "C")
+    ]
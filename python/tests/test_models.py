@@ -0,0 +1,87 @@
+# tests/test_models.py
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fxn_protocol import models
+from fxn_protocol.models import Subscription, SubscriptionBatch, _decode_row
+
+
+def test_decode_provider_user_and_model_rows():
+    """Provider listings, user listings and already-decoded rows give the same fields"""
+    provider_row = {
+        "subscriber": "Subscriber1",
+        "subscriptionPDA": "Pda1",
+        "subscription": {"endTime": "ff", "recipient": "http://a"},
+        "status": "active"
+    }
+    user_row = {
+        "dataProvider": "Provider1",
+        "subscription": "Pda1",
+        "endTime": "ff",
+        "recipient": "http://a",
+        "status": "active"
+    }
+    model_row = {"end_time": 255, "recipient": "http://a", "subscription_pda": "Pda1", "status": "active"}
+
+    expected = (255, "http://a", "Pda1", "active")
+    assert _decode_row(provider_row) == expected
+    assert _decode_row(user_row) == expected
+    assert _decode_row(model_row) == expected
+    assert Subscription.from_json({**user_row, "endTime": 255}) == Subscription(*expected)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def filter_path(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(models, "np", None)
+    return request.param
+
+
+def test_batch_filters_match_the_row_model(filter_path):
+    """SubscriptionBatch filters select the same rows as filtering Subscription objects,
+    with and without numpy"""
+    rows = [
+        {"end_time": end_time, "recipient": f"http://{i}", "subscription_pda": f"Pda{i}", "status": status}
+        for i, (end_time, status) in enumerate([
+            (100, "active"), (200, "expiring_soon"), (300, "active"), (400, "active")
+        ])
+    ]
+    batch = SubscriptionBatch.from_json(rows)
+    subscriptions = [Subscription.from_json(row) for row in rows]
+
+    assert len(batch) == 4
+    assert list(batch) == subscriptions
+    assert batch[2] == subscriptions[2]
+    assert list(batch.active_expiring_before(350)) == [subscriptions[0], subscriptions[2]]
+    assert list(batch.where(ends_after=150, ends_before=350)) == subscriptions[1:3]
+    assert list(batch.take([3, 0])) == [subscriptions[3], subscriptions[0]]
+    assert batch.statuses == [row["status"] for row in rows]
+    assert len(batch.where(status="expired")) == 0
+    assert len(SubscriptionBatch().active()) == 0
+
+
+def test_filters_return_a_view_of_row_indices(filter_path):
+    """Filters keep row indices into the batch and read values on demand"""
+    batch = SubscriptionBatch.from_json([
+        {"end_time": 100 * i, "recipient": f"http://{i}", "subscription_pda": f"Pda{i}",
+         "status": "active" if i % 2 else "expiring_soon"}
+        for i in range(6)
+    ])
+    rows = batch.active_expiring_before(450)
+
+    assert list(rows.indices) == [1, 3]
+    assert rows.batch is batch
+    assert rows[1] == batch[3]
+    assert rows.recipients == ["http://1", "http://3"]
+    assert rows.subscription_pdas == ["Pda1", "Pda3"]
+    assert rows.end_times == [100, 300]
+
+    copied = rows.take()
+    assert isinstance(copied, SubscriptionBatch)
+    assert list(copied) == list(rows)
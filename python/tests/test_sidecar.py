@@ -0,0 +1,253 @@
+# tests/test_sidecar.py
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fxn_protocol import FXNClient, sidecar
+from benchmarks.stub_server import StubHandler, StubServer
+
+
+class FakeProcess:
+    """Stands in for the Node.js server process; this test process's pid is alive"""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.returncode = None
+        self.terminated = False
+
+    def poll(self):
+        return None
+
+    def terminate(self):
+        self.terminated = True
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path, monkeypatch):
+    # Keep the per-port lockfiles away from any real servers on this machine
+    monkeypatch.setattr(sidecar.tempfile, "gettempdir", lambda: str(tmp_path))
+    monkeypatch.setattr(sidecar, "_shared", {})
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_last_release_stops_the_server_this_process_launched(monkeypatch):
+    """Each acquire adds a reference and only the last release terminates the server"""
+    port = free_port()
+    launched = []
+    servers = []
+
+    def launch_server(launch_port):
+        servers.append(StubServer(port=launch_port).__enter__())
+        launched.append(FakeProcess())
+        return launched[-1]
+
+    monkeypatch.setattr(sidecar, "launch_server", launch_server)
+    try:
+        assert sidecar.acquire(port, "127.0.0.1") > 0
+        assert sidecar.acquire(port, "127.0.0.1") == 0
+        assert len(launched) == 1
+        assert sidecar._shared[port].refs == 2
+        assert os.path.exists(sidecar._state_path(port))
+
+        sidecar.release(port)
+        assert not launched[0].terminated
+        assert sidecar._shared[port].refs == 1
+
+        sidecar.release(port)
+        assert launched[0].terminated
+        assert port not in sidecar._shared
+        assert not os.path.exists(sidecar._state_path(port))
+
+        # Releasing again is harmless
+        sidecar.release(port)
+    finally:
+        for server in servers:
+            server.__exit__(None, None, None)
+
+
+def test_server_started_by_hand_is_reused_and_left_running(monkeypatch):
+    """A server nobody registered is attached to, never launched or stopped"""
+    def launch_server(port):
+        raise AssertionError("a server was already listening")
+
+    monkeypatch.setattr(sidecar, "launch_server", launch_server)
+    monkeypatch.setattr(sidecar.os, "kill", lambda pid, sig: pytest.fail(f"signalled {pid}"))
+    with StubServer() as server:
+        sidecar.acquire(server.port, "127.0.0.1")
+        assert sidecar._shared[server.port].pid is None
+        sidecar.release(server.port)
+        assert server.port not in sidecar._shared
+
+
+def test_other_holders_keep_the_server_running(monkeypatch):
+    """The server survives this process's release while another live process holds it"""
+    port = free_port()
+    process = FakeProcess()
+    servers = []
+
+    def launch_server(launch_port):
+        servers.append(StubServer(port=launch_port).__enter__())
+        return process
+
+    monkeypatch.setattr(sidecar, "launch_server", launch_server)
+    try:
+        sidecar.acquire(port, "127.0.0.1")
+        # Another process that is still alive has attached as well
+        other_pid = os.getppid()
+        state = sidecar._read_state(port)
+        sidecar._write_state(port, {"pid": state["pid"], "holders": state["holders"] + [other_pid]})
+
+        sidecar.release(port)
+        assert not process.terminated
+        assert sidecar._read_state(port)["holders"] == [other_pid]
+    finally:
+        for server in servers:
+            server.__exit__(None, None, None)
+
+
+def test_wait_until_ready_backs_off_until_the_server_answers():
+    """Probes repeat with growing gaps until /health answers"""
+    port = free_port()
+    servers = []
+    timer = threading.Timer(0.1, lambda: servers.append(StubServer(port=port).__enter__()))
+    timer.start()
+    try:
+        with requests.Session() as session:
+            attempts = sidecar.wait_until_ready(
+                session, f"http://127.0.0.1:{port}", FakeProcess(),
+                startup_timeout=5, max_probe_interval=0.05
+            )
+        # 5ms, 10ms, 20ms, 40ms and then 50ms gaps cover the first 100ms
+        assert 4 <= attempts < 20
+    finally:
+        timer.join()
+        for server in servers:
+            server.__exit__(None, None, None)
+
+
+def test_wait_until_ready_fails_fast_when_the_process_exits():
+    """An exited server process is reported at once rather than after the timeout"""
+    process = FakeProcess()
+    process.poll = lambda: 1
+    process.returncode = 1
+    started = time.perf_counter()
+    with requests.Session() as session, pytest.raises(ConnectionError, match="exited with code 1"):
+        sidecar.wait_until_ready(session, f"http://127.0.0.1:{free_port()}", process,
+                                 startup_timeout=5, max_probe_interval=0.05)
+    assert time.perf_counter() - started < 1
+
+
+def test_wait_until_ready_gives_up_after_the_startup_timeout():
+    with requests.Session() as session, pytest.raises(ConnectionError, match="not ready"):
+        sidecar.wait_until_ready(session, f"http://127.0.0.1:{free_port()}", FakeProcess(),
+                                 startup_timeout=0.1, max_probe_interval=0.02)
+
+
+def test_client_records_startup_metrics(monkeypatch):
+    """The client waits for every server it launched and reports the probes it made"""
+    servers = []
+    launched = []
+
+    def launch_server(port):
+        # The server takes a moment to start listening
+        threading.Timer(0.05, lambda: servers.append(StubServer(port=port).__enter__())).start()
+        launched.append(FakeProcess())
+        return launched[-1]
+
+    monkeypatch.setattr(sidecar, "launch_server", launch_server)
+    port = free_port()
+    try:
+        client = FXNClient(port=port, host="127.0.0.1", max_probe_interval=0.02)
+        metrics = client.startup_metrics
+        assert metrics.probe_attempts > 1
+        assert 0.05 <= metrics.startup_seconds < 5
+        client.close()
+        assert launched[0].terminated
+    finally:
+        for server in servers:
+            server.__exit__(None, None, None)
+
+
+def free_ports(count):
+    """count consecutive ports that are free right now"""
+    while True:
+        first = free_port()
+        sockets = []
+        try:
+            for port in range(first, first + count):
+                sock = socket.socket()
+                sockets.append(sock)
+                sock.bind(("127.0.0.1", port))
+            return first
+        except OSError:
+            continue
+        finally:
+            for sock in sockets:
+                sock.close()
+
+
+class CountingHandler(StubHandler):
+    """Counts requests per server port"""
+    lock = threading.Lock()
+    requests = {}
+
+    def do_GET(self):
+        with CountingHandler.lock:
+            port = self.server.server_address[1]
+            CountingHandler.requests[port] = CountingHandler.requests.get(port, 0) + 1
+        super().do_GET()
+
+    def do_POST(self):
+        with CountingHandler.lock:
+            port = self.server.server_address[1]
+            CountingHandler.requests[port] = CountingHandler.requests.get(port, 0) + 1
+        super().do_POST()
+
+
+def test_calls_are_spread_round_robin_across_sidecars():
+    """With sidecars=3 the client uses port, port + 1 and port + 2 in turn"""
+    port = free_ports(3)
+    CountingHandler.requests = {}
+    servers = [StubServer(port=port + i, handler=CountingHandler).__enter__() for i in range(3)]
+    try:
+        client = FXNClient(port=port, host="127.0.0.1", sidecars=3, start_server=False)
+        assert client.ports == [port, port + 1, port + 2]
+        for _ in range(4):
+            client.set_fee({}, 5)
+            client.get_user_subscriptions({}, "User1")
+        client.close()
+        assert CountingHandler.requests == {port: 3, port + 1: 3, port + 2: 2}
+    finally:
+        for server in servers:
+            server.__exit__(None, None, None)
+
+
+def test_shared_client_acquires_every_sidecar(monkeypatch):
+    """A shared client holds each of its servers and releases all of them on close"""
+    port = free_ports(2)
+    servers = [StubServer(port=port + i).__enter__() for i in range(2)]
+    monkeypatch.setattr(sidecar, "launch_server", lambda port: pytest.fail("a server was already listening"))
+    try:
+        first = FXNClient(port=port, host="127.0.0.1", sidecars=2, shared=True)
+        second = FXNClient(port=port, host="127.0.0.1", sidecars=2, shared=True)
+        assert {p: sidecar._shared[p].refs for p in (port, port + 1)} == {port: 2, port + 1: 2}
+        # The second client found both servers already held here
+        assert second.startup_metrics.probe_attempts == 0
+        first.close()
+        second.close()
+        assert sidecar._shared == {}
+    finally:
+        for server in servers:
+            server.__exit__(None, None, None)
@@ -0,0 +1,168 @@
+# tests/test_stream.py
+import asyncio
+import json
+import os
+import sys
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fxn_protocol import AsyncFXNClient, FXNClient
+from benchmarks.stub_server import StubHandler, StubServer
+
+PROVIDER = {"connection": {}, "wallet": {}}
+ADDRESS = "Provider1111111111111111111111111111111111"
+
+
+def row(i):
+    return {
+        "subscriber": f"Subscriber{i}",
+        "subscriptionPDA": f"Pda{i}",
+        "subscription": {"endTime": format(1000 + i, "x"), "recipient": f"http://subscriber-{i}"},
+        "status": "active"
+    }
+
+
+class StreamHandler(StubHandler):
+    """Streams NDJSON pages of the class's rows, one chunk per line, as the
+    FXN server does.
+
+    line_delay spaces the lines out, stall_after holds the stream open
+    after that many rows, and error_after ends it with an error line
+    instead of a cursor.
+    """
+    rows = []
+    requests = []
+    line_delay = 0.0
+    stall_after = None
+    error_after = None
+
+    def do_GET(self):
+        self._read_body()
+        url = urlparse(self.path)
+        query = {key: int(values[0]) for key, values in parse_qs(url.query).items()}
+        StreamHandler.requests.append((url.path, query))
+        cursor = query.get("cursor", 0)
+        end = min(len(self.rows), cursor + query.get("limit", len(self.rows)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, item in enumerate(self.rows[cursor:end]):
+            if i == self.error_after:
+                self._write_line({"error": "RPC node unavailable"})
+                break
+            if i == self.stall_after:
+                time.sleep(1)
+            self._write_line(item)
+            time.sleep(self.line_delay)
+        else:
+            self._write_line({"nextCursor": end if end < len(self.rows) else None})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_line(self, item):
+        line = json.dumps(item).encode() + b"\n"
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+
+
+@pytest.fixture
+def server():
+    StreamHandler.rows = [row(i) for i in range(5)]
+    StreamHandler.requests = []
+    StreamHandler.line_delay = 0.0
+    StreamHandler.stall_after = None
+    StreamHandler.error_after = None
+    with StubServer(handler=StreamHandler) as server:
+        yield server
+
+
+def test_stream_follows_the_cursor_in_list_order(server):
+    """With limit set, each request covers limit rows and the next cursor is followed"""
+    client = FXNClient(port=server.port, host="127.0.0.1", start_server=False)
+    subscriptions = list(client.iter_provider_subscriptions(PROVIDER, ADDRESS, page_size=10, limit=2))
+    client.close()
+
+    assert [s.subscription_pda for s in subscriptions] == [f"Pda{i}" for i in range(5)]
+    assert subscriptions[4].end_time == 1004
+    assert [query for _, query in StreamHandler.requests] == [
+        {"cursor": 0, "pageSize": 10, "limit": 2},
+        {"cursor": 2, "pageSize": 10, "limit": 2},
+        {"cursor": 4, "pageSize": 10, "limit": 2},
+    ]
+    assert StreamHandler.requests[0][0] == f"/subscriptions/provider/{ADDRESS}/stream"
+
+
+def test_stream_yields_rows_before_the_response_ends(server):
+    """Rows arrive as they are written, not once the whole page is read"""
+    StreamHandler.line_delay = 0.1
+    client = FXNClient(port=server.port, host="127.0.0.1", start_server=False)
+    started = time.perf_counter()
+    first = next(client.iter_provider_subscriptions(PROVIDER, ADDRESS))
+    assert first.subscription_pda == "Pda0"
+    assert time.perf_counter() - started < 0.3
+    client.close()
+
+
+def test_stream_error_line_raises(server):
+    """An error line after some rows raises once the earlier rows are yielded"""
+    StreamHandler.error_after = 2
+    client = FXNClient(port=server.port, host="127.0.0.1", start_server=False)
+    received = []
+    with pytest.raises(RuntimeError, match="RPC node unavailable"):
+        for subscription in client.iter_provider_subscriptions(PROVIDER, ADDRESS):
+            received.append(subscription.subscription_pda)
+    assert received == ["Pda0", "Pda1"]
+    client.close()
+
+
+def test_stream_read_timeout_applies_per_read(server):
+    """A stalled stream times out, a slow one that keeps writing does not"""
+    StreamHandler.line_delay = 0.1
+    client = FXNClient(port=server.port, host="127.0.0.1", start_server=False, timeout=0.3)
+    assert len(list(client.iter_provider_subscriptions(PROVIDER, ADDRESS))) == 5
+
+    StreamHandler.stall_after = 1
+    with pytest.raises(requests.exceptions.ConnectionError):
+        list(client.iter_provider_subscriptions(PROVIDER, ADDRESS))
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_async_stream_follows_the_cursor(server):
+    async with AsyncFXNClient(port=server.port, host="127.0.0.1") as client:
+        subscriptions = [
+            s async for s in client.iter_provider_subscriptions(PROVIDER, ADDRESS, limit=3)
+        ]
+    assert [s.subscription_pda for s in subscriptions] == [f"Pda{i}" for i in range(5)]
+    assert [query["cursor"] for _, query in StreamHandler.requests] == [0, 3]
+
+
+@pytest.mark.asyncio
+async def test_async_stream_error_line_raises(server):
+    StreamHandler.error_after = 1
+    async with AsyncFXNClient(port=server.port, host="127.0.0.1") as client:
+        with pytest.raises(RuntimeError, match="RPC node unavailable"):
+            async for _ in client.iter_provider_subscriptions(PROVIDER, ADDRESS):
+                pass
+
+
+@pytest.mark.asyncio
+async def test_async_stream_may_outlast_the_total_timeout(server):
+    """The session's total timeout does not cut off a stream that keeps writing"""
+    StreamHandler.line_delay = 0.1
+    async with AsyncFXNClient(port=server.port, host="127.0.0.1", timeout=0.3) as client:
+        started = time.perf_counter()
+        subscriptions = [s async for s in client.iter_provider_subscriptions(PROVIDER, ADDRESS)]
+        assert len(subscriptions) == 5
+        assert time.perf_counter() - started > 0.3
+
+        # A stream that stops writing still times out between reads
+        StreamHandler.stall_after = 1
+        with pytest.raises(asyncio.TimeoutError):
+            async for _ in client.iter_provider_subscriptions(PROVIDER, ADDRESS):
+                pass
@@ -5,10 +5,15 @@ import { AnchorProvider } from '@coral-xyz/anchor';
 import {Connection, PublicKey} from '@solana/web3.js';
 
 const app = express();
-app.use(express.json());
+app.use(express.json({ limit: '10mb' }));
 
 const DEFAULT_RPC_ENDPOINT = "https://api.devnet.solana.com";
 const DEFAULT_COMMITMENT = "confirmed";
+const MAX_BATCH_CONCURRENCY = 8;
+const MAX_STREAM_PAGE_SIZE = 100; // getMultipleAccounts accepts at most 100 keys
+const DEFAULT_RECONCILE_INTERVAL_MS = 30000;
+const CHANGE_DEBOUNCE_MS = 250;
+const SSE_HEARTBEAT_MS = 15000;
 
 // Helper to create SolanaAdapter instance from request
 const getAdapter = (provider: any) => {
@@ -50,6 +55,11 @@ const createDefaultProvider = (publicKeyStr: string) => {
     );
 };
 
+// Health check endpoint, polled by clients waiting for the server to start
+app.get('/health', (req, res) => {
+    res.json({ success: true, uptime: process.uptime() });
+});
+
 // Register Agent endpoint
 app.post('/agent', async (req, res) => {
     try {
@@ -229,6 +239,187 @@ app.get('/subscriptions/provider/:providerAddress', async (req, res) => {
     }
 });
 
+// Stream subscriptions for provider as NDJSON, one subscription per line.
+// Subscribers are read `pageSize` at a time starting at `cursor`; once `limit`
+// subscribers have been read the final line carries the cursor to resume from.
+app.get('/subscriptions/provider/:providerAddress/stream', async (req, res) => {
+    const writeLine = (data: any) => new Promise<void>((resolve) => {
+        if (res.write(JSON.stringify(data) + '\n')) {
+            resolve();
+        } else {
+            res.once('drain', resolve);
+        }
+    });
+
+    try {
+        const { providerAddress } = req.params;
+        const cursor = Math.max(Number(req.query.cursor) || 0, 0);
+        const pageSize = Math.min(Math.max(Number(req.query.pageSize) || 100, 1), MAX_STREAM_PAGE_SIZE);
+        const limit = Number(req.query.limit) || Infinity;
+
+        const providerKey = new PublicKey(providerAddress);
+        const adapter = new SolanaAdapter(createDefaultProvider(providerAddress));
+        const subscribers = await adapter.getSubscribersForProvider(providerKey);
+        const end = Math.min(subscribers.length, cursor + limit);
+
+        res.status(200).type('application/x-ndjson');
+        for (let start = cursor; start < end; start += pageSize) {
+            const page = await adapter.getSubscriptionsPage(
+                providerKey,
+                subscribers.slice(start, Math.min(start + pageSize, end))
+            );
+            for (const subscription of page) {
+                await writeLine(subscription);
+            }
+        }
+        await writeLine({ nextCursor: end < subscribers.length ? end : null });
+        res.end();
+    } catch (error: any) {
+        console.error('Error streaming provider subscriptions:', error);
+        if (res.headersSent) {
+            await writeLine({ error: error.message || 'Internal server error' });
+            res.end();
+        } else {
+            res.status(500).json({ success: false, error: error.message || 'Internal server error' });
+        }
+    }
+});
+
+// Read every unexpired subscription of a provider, a page of subscribers per RPC call
+const loadProviderSubscriptions = async (adapter: SolanaAdapter, providerKey: PublicKey) => {
+    const subscribers = await adapter.getSubscribersForProvider(providerKey);
+    const rows: any[] = [];
+    for (let start = 0; start < subscribers.length; start += MAX_STREAM_PAGE_SIZE) {
+        rows.push(...await adapter.getSubscriptionsPage(
+            providerKey,
+            subscribers.slice(start, start + MAX_STREAM_PAGE_SIZE)
+        ));
+    }
+    // Serialise once so rows compare as plain JSON (PublicKeys and BNs as strings)
+    return rows.map((row) => JSON.parse(JSON.stringify(row)));
+};
+
+// Classify how a subscription changed between two listings
+const subscriptionChange = (before: any, after: any) => {
+    if (!before) return 'added';
+    if (!after) return 'cancelled';
+    if (JSON.stringify(before) === JSON.stringify(after)) return null;
+    const previousEnd = parseInt(before.subscription.endTime, 16);
+    const nextEnd = parseInt(after.subscription.endTime, 16);
+    return nextEnd > previousEnd ? 'renewed' : 'updated';
+};
+
+// Push subscription changes of a provider as server-sent events. The first
+// `snapshot` event lists every subscription; each later `change` event carries
+// {type: added|renewed|updated|cancelled, subscription}. Changes are detected
+// from account notifications on the subscribers list and subscription
+// accounts, plus a periodic re-listing that also catches expiries.
+app.get('/subscriptions/provider/:providerAddress/events', async (req, res) => {
+    const { providerAddress } = req.params;
+    const reconcileMs = Math.max(
+        Number(req.query.reconcileInterval) * 1000 || DEFAULT_RECONCILE_INTERVAL_MS,
+        1000
+    );
+
+    let providerKey: PublicKey;
+    let adapter: SolanaAdapter;
+    try {
+        providerKey = new PublicKey(providerAddress);
+        adapter = new SolanaAdapter(createDefaultProvider(providerAddress));
+    } catch (error: any) {
+        res.status(400).json({ success: false, error: error.message });
+        return;
+    }
+
+    res.status(200).set({
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'Connection': 'keep-alive',
+    });
+    res.flushHeaders();
+
+    const send = (event: string, data: any) => {
+        res.write(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`);
+    };
+
+    let known = new Map<string, any>();
+    let closed = false;
+    let snapshotSent = false;
+    let watchedAccounts = '';
+    let unwatch = async () => {};
+    let syncing = false;
+    let syncAgain = false;
+    let debounce: NodeJS.Timeout | null = null;
+
+    const sync = async () => {
+        if (syncing) {
+            syncAgain = true;
+            return;
+        }
+        syncing = true;
+        try {
+            do {
+                syncAgain = false;
+                const rows = await loadProviderSubscriptions(adapter, providerKey);
+                if (closed) return;
+                const next = new Map(rows.map((row) => [row.subscriptionPDA, row]));
+
+                if (!snapshotSent) {
+                    send('snapshot', rows);
+                    snapshotSent = true;
+                } else {
+                    for (const key of new Set([...known.keys(), ...next.keys()])) {
+                        const type = subscriptionChange(known.get(key), next.get(key));
+                        if (type) {
+                            send('change', { type, subscription: next.get(key) || known.get(key) });
+                        }
+                    }
+                }
+                known = next;
+
+                // Re-register account listeners when the set of subscriptions changes
+                const accounts = [...next.keys()].sort().join(',');
+                if (accounts !== watchedAccounts) {
+                    await unwatch();
+                    watchedAccounts = accounts;
+                    unwatch = adapter.watchProviderAccounts(
+                        providerKey,
+                        [...next.keys()].map((key) => new PublicKey(key)),
+                        scheduleSync
+                    );
+                }
+            } while (syncAgain && !closed);
+        } catch (error: any) {
+            console.error('Error watching provider subscriptions:', error);
+            send('error', { error: error.message || 'Internal server error' });
+        } finally {
+            syncing = false;
+        }
+    };
+
+    // Bursts of account notifications collapse into one re-listing
+    const scheduleSync = () => {
+        if (debounce || closed) return;
+        debounce = setTimeout(() => {
+            debounce = null;
+            sync();
+        }, CHANGE_DEBOUNCE_MS);
+    };
+
+    const reconcile = setInterval(sync, reconcileMs);
+    const heartbeat = setInterval(() => res.write(': ping\n\n'), SSE_HEARTBEAT_MS);
+
+    req.on('close', async () => {
+        closed = true;
+        clearInterval(reconcile);
+        clearInterval(heartbeat);
+        if (debounce) clearTimeout(debounce);
+        await unwatch();
+    });
+
+    await sync();
+});
+
 // Get subscriptions for user
 app.get('/subscriptions/user/:userAddress', async (req, res) => {
     try {
@@ -260,6 +451,72 @@ app.post('/fee', async (req, res) => {
     }
 });
 
+// Operations accepted by /batch, keyed by each operation's type field
+const batchOperations: Record<string, (adapter: SolanaAdapter, op: any) => Promise<any>> = {
+    subscribe: (adapter, op) => adapter.createSubscription({
+        dataProvider: new PublicKey(op.dataProvider),
+        recipient: op.recipient,
+        durationInDays: op.durationInDays,
+    }),
+    renew: (adapter, op) => adapter.renewSubscription({
+        dataProvider: new PublicKey(op.dataProvider),
+        newRecipient: op.newRecipient,
+        newEndTime: op.newEndTime,
+        qualityScore: op.qualityScore,
+    }),
+    cancel: (adapter, op) => adapter.cancelSubscription({
+        dataProvider: new PublicKey(op.dataProvider),
+        qualityScore: op.qualityScore,
+    }),
+    set_fee: (adapter, op) => adapter.setDataProviderFee({ fee: op.fee }),
+};
+
+// Map items through fn with at most `limit` calls in flight, keeping input order
+const mapWithConcurrency = async <T, R>(
+    items: T[],
+    limit: number,
+    fn: (item: T) => Promise<R>
+): Promise<R[]> => {
+    const results: R[] = new Array(items.length);
+    let next = 0;
+    const worker = async () => {
+        while (next < items.length) {
+            const index = next++;
+            results[index] = await fn(items[index]);
+        }
+    };
+    await Promise.all(Array.from({ length: Math.min(limit, items.length) }, worker));
+    return results;
+};
+
+// Batch endpoint: run many subscription operations in one request
+app.post('/batch', async (req, res) => {
+    try {
+        const { provider, operations, concurrency } = req.body;
+        if (!Array.isArray(operations)) {
+            throw new Error('Operations must be an array');
+        }
+        const adapter = getAdapter(provider);
+        const limit = Math.min(Math.max(Number(concurrency) || MAX_BATCH_CONCURRENCY, 1), MAX_BATCH_CONCURRENCY);
+
+        const results = await mapWithConcurrency(operations, limit, async (op: any) => {
+            try {
+                const run = batchOperations[op.type];
+                if (!run) {
+                    throw new Error(`Unknown operation type: ${op.type}`);
+                }
+                return { success: true, signature: await run(adapter, op) };
+            } catch (error: any) {
+                return { success: false, error: error.message };
+            }
+        });
+
+        res.json({ success: true, results });
+    } catch (error: any) {
+        res.status(500).json({ success: false, error: error.message });
+    }
+});
+
 const PORT = process.env.PORT || 3000;
 app.listen(PORT, () => {
     console.log(`Server running on port2 ${PORT}`);
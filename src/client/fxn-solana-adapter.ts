@@ -646,6 +646,84 @@ export class SolanaAdapter {
         }
     }
 
+    async getSubscribersForProvider(providerPublicKey: PublicKey): Promise<PublicKey[]> {
+        try {
+            const [subscribersListPDA] = PublicKey.findProgramAddressSync(
+                [Buffer.from("subscribers"), providerPublicKey.toBuffer()],
+                this.program.programId
+            );
+
+            const subscribersList = await this.program.account.subscribersList.fetch(
+                subscribersListPDA
+            );
+            return subscribersList.subscribers;
+        } catch (error) {
+            console.error('Error getting provider subscribers:', error);
+            throw this.handleError(error);
+        }
+    }
+
+    // Fetch the unexpired subscriptions of one page of subscribers with a
+    // single RPC call, keeping the order of the subscribers list
+    async getSubscriptionsPage(
+        providerPublicKey: PublicKey,
+        subscribers: PublicKey[]
+    ): Promise<SubscriberDetails[]> {
+        try {
+            const subscriptionPDAs = subscribers.map((subscriber) =>
+                PublicKey.findProgramAddressSync(
+                    [
+                        Buffer.from("subscription"),
+                        subscriber.toBuffer(),
+                        providerPublicKey.toBuffer()
+                    ],
+                    this.program.programId
+                )[0]
+            );
+
+            const accounts = await this.program.account.subscription.fetchMultiple(subscriptionPDAs);
+            const now = new BN(Math.floor(Date.now() / 1000));
+
+            const page: SubscriberDetails[] = [];
+            accounts.forEach((subscription, index) => {
+                if (subscription && subscription.endTime.gt(now)) {
+                    page.push({
+                        subscriber: subscribers[index],
+                        subscriptionPDA: subscriptionPDAs[index],
+                        subscription,
+                        status: this.getSubscriptionStatus(subscription.endTime)
+                    });
+                }
+            });
+            return page;
+        } catch (error) {
+            console.error('Error getting provider subscriptions page:', error);
+            throw this.handleError(error);
+        }
+    }
+
+    // Watch a provider's subscribers list and the given subscription accounts
+    // over the RPC websocket. onChange is called with the account that
+    // changed; the returned function removes every listener.
+    watchProviderAccounts(
+        providerPublicKey: PublicKey,
+        subscriptionPDAs: PublicKey[],
+        onChange: (account: PublicKey) => void
+    ): () => Promise<void> {
+        const [subscribersListPDA] = PublicKey.findProgramAddressSync(
+            [Buffer.from("subscribers"), providerPublicKey.toBuffer()],
+            this.program.programId
+        );
+        const connection = this.provider.connection;
+        const listenerIds = [subscribersListPDA, ...subscriptionPDAs].map((account) =>
+            connection.onAccountChange(account, () => onChange(account), 'confirmed')
+        );
+
+        return async () => {
+            await Promise.all(listenerIds.map((id) => connection.removeAccountChangeListener(id)));
+        };
+    }
+
     async getAllSubscriptionsForUser(userPublicKey: PublicKey): Promise<SubscriptionDetails[]> {
         try {
             // Get the mySubscriptions PDA